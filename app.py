@@ -27,46 +27,20 @@ from services.voice_identity.capture.prompts import VOICE_PROMPTS
 from services.voice_identity.interface import enroll_voice
 
 # Phase 1–3 — Core Services
-from services.asr.audio_buffer import AudioBuffer
-from services.asr.vad_gate import VadGate
-from services.asr.streaming_asr import StreamingASR
-from services.asr.phrase_committer import PhraseCommitter
-from services.translation.emotion import EmotionDetector
-from services.translation.translator import EmotionAwareTranslator
-from services.tts.voice_cloner import VoiceCloner
+from services.pipeline.session import end_session, get_session, process_chunk
+from services.pipeline.overload import SessionRejected
+from services.pipeline.startup import LOADER, PIPELINE_MODELS
+from services.pipeline.sharding import NUM_WORKERS, WorkerPool
+from services.monitoring.metrics import ERRORS, start_metrics_server
+from services.transport.server import StreamServer, local_events, pool_events
+from services.translation.languages import DEFAULT_TARGET_LANGS, LANGUAGES, SOURCE_LANG
 
 
 # Type alias for audio data
 AudioTuple = tuple[int, NDArray[np.float32]]
 
-
-class SessionState:
-    """Container for user session state."""
-    
-    def __init__(self, user_id: str) -> None:
-        self.user_id = user_id
-        self.buffer = AudioBuffer(max_seconds=5)
-        self.vad = VadGate()
-        self.asr = StreamingASR()
-        self.committer = PhraseCommitter(min_words=4)
-        self.emotion = EmotionDetector()
-        self.translator = EmotionAwareTranslator()
-        self.tts = VoiceCloner()
-        
-        # Streaming state
-        self.last_live_asr: str = ""
-        self.last_translation: str = ""
-
-
-# SESSION STORE (per user)
-SESSIONS: dict[str, SessionState] = {}
-
-
-def get_session(user_id: str) -> SessionState:
-    """Get or create a session for the given user ID."""
-    if user_id not in SESSIONS:
-        SESSIONS[user_id] = SessionState(user_id)
-    return SESSIONS[user_id]
+# Set when DUBYOU_WORKERS > 0: sessions live in worker processes
+POOL: Optional[WorkerPool] = None
 
 
 def phase0_enroll(audio: Optional[AudioTuple]) -> str:
@@ -92,7 +66,7 @@ def phase0_enroll(audio: Optional[AudioTuple]) -> str:
     user_id = str(uuid.uuid4())[:8]
 
     try:
-        enroll_voice(audio_np, sr, user_id)
+        enroll_voice(audio_np, sr, user_id, encoder=LOADER.get("speaker_encoder"))
     except ValueError as e:
         return f"❌ Enrollment validation failed:\n{e}"
     except Exception as e:
@@ -108,7 +82,8 @@ def phase0_enroll(audio: Optional[AudioTuple]) -> str:
 
 def streaming_pipeline(
     audio: Optional[AudioTuple], 
-    user_id: str
+    user_id: str,
+    target_langs: Optional[list[str]] = None
 ) -> tuple[str, str, Optional[tuple[int, NDArray[np.float32]]]]:
     """
     Phase 1–3 — Streaming translation pipeline.
@@ -118,6 +93,7 @@ def streaming_pipeline(
     Args:
         audio: Tuple of (sample_rate, audio_chunk) or None
         user_id: User identifier from enrollment
+        target_langs: Languages to dub into (first one is played back)
         
     Returns:
         Tuple of (live_asr_text, translated_text, audio_output)
@@ -125,69 +101,39 @@ def streaming_pipeline(
     if not user_id or audio is None:
         return "", "", None
 
+    if POOL is not None:
+        sr, chunk = audio
+        return POOL.submit(user_id, chunk, sr, target_langs)
+
+    # Models load in the background; don't block the UI on first use
+    unavailable = LOADER.start().unavailable(PIPELINE_MODELS)
+    if unavailable:
+        return unavailable, "", None
+
     sr, chunk = audio
     chunk = chunk.astype(np.float32)
 
     try:
         session = get_session(user_id)
+    except SessionRejected as e:
+        return str(e), "", None
     except Exception as e:
+        ERRORS.inc(stage="session")
         print(f"Error getting session: {e}")
         return "", "", None
 
-    # 1️⃣ Always buffer audio
-    session.buffer.add(chunk, sr)
-
-    # 2️⃣ Voice activity detection
-    if session.vad.is_speech(chunk):
-        try:
-            # Sliding window ASR (last 3 seconds)
-            live_text = session.asr.transcribe(
-                session.buffer.get_recent(3)
-            )
-
-            session.last_live_asr = live_text
-
-            # Commit stable phrase
-            phrase = session.committer.process(live_text)
+    session.set_target_langs(target_langs)
+    return process_chunk(session, chunk, sr)
 
-            if phrase:
-                # Emotion detection
-                emotion = session.emotion.detect(phrase)
 
-                # Emotion-aware translation (EN → HI)
-                hindi_text = session.translator.translate(
-                    phrase,
-                    src_lang="eng_Latn",
-                    tgt_lang="hin_Deva",
-                    emotion=emotion
-                )
-
-                session.last_translation = hindi_text
-
-                # Streaming TTS (Hindi spoken in YOUR English voice)
-                audio_chunk = session.tts.speak_chunk(
-                    hindi_text,
-                    emotion=emotion
-                )
-
-                return (
-                    session.last_live_asr,
-                    session.last_translation,
-                    audio_chunk
-                )
-        except Exception as e:
-            print(f"Error in pipeline processing: {e}")
-            return session.last_live_asr, session.last_translation, None
-
-    # 3️⃣ Handle silence → flush buffer
-    if session.vad.should_flush():
-        session.buffer.reset()
-
-    return (
-        session.last_live_asr,
-        session.last_translation,
-        None
-    )
+def end_streaming(user_id: str) -> None:
+    """Recording stopped: end the session and delete its checkpoint"""
+    if not user_id:
+        return
+    if POOL is not None:
+        POOL.end_session(user_id)
+    else:
+        end_session(user_id)
 
 
 # UI — Gradio App
@@ -251,6 +197,17 @@ def create_app() -> gr.Blocks:
                     placeholder="Enter your 8-character user ID"
                 )
 
+                target_langs_input = gr.Dropdown(
+                    choices=[
+                        (info["label"], code)
+                        for code, info in LANGUAGES.items()
+                        if code != SOURCE_LANG
+                    ],
+                    value=list(DEFAULT_TARGET_LANGS),
+                    multiselect=True,
+                    label="🌐 Target languages (first one is spoken below)"
+                )
+
                 mic = gr.Audio(
                     sources=["microphone"],
                     type="numpy",
@@ -278,9 +235,10 @@ def create_app() -> gr.Blocks:
 
                 mic.stream(
                     fn=streaming_pipeline,
-                    inputs=[mic, user_id_input],
+                    inputs=[mic, user_id_input, target_langs_input],
                     outputs=[live_asr, translated_txt, tts_audio]
                 )
+                mic.stop_recording(fn=end_streaming, inputs=user_id_input)
 
         gr.Markdown(
             """
@@ -294,6 +252,13 @@ def create_app() -> gr.Blocks:
 
 
 if __name__ == "__main__":
+    if NUM_WORKERS > 0:
+        POOL = WorkerPool(NUM_WORKERS)
+        StreamServer(events=pool_events(POOL)).start()
+    else:
+        LOADER.start()
+        StreamServer(events=local_events).start()
+    start_metrics_server()
     demo = create_app()
     demo.launch(
         share=True,
@@ -0,0 +1,156 @@
+# ============================================================
+# commit_latency.py — Speech-end → commit latency per policy
+# ============================================================
+"""
+Replays a synthetic word timeline (no models) through the old
+word-count PhraseCommitter and the VAD/timestamp CommitPolicy, with the
+same chunking, 3 s window and silence flush as the live pipeline.
+
+    python -m benchmarks.commit_latency --utterances 500 --out commit.json
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+from services.asr.commit_policy import CommitPolicy
+from services.asr.phrase_committer import PhraseCommitter
+
+
+CHUNK = 0.1
+WINDOW = 3.0
+FLUSH_SILENCE = 0.8
+
+VOCAB = "yes okay so we should ship the new build before friday then".split()
+
+
+def make_script(n_utterances, seed=0):
+    """
+    [[(word, start, end), ...] per utterance], absolute seconds
+    """
+    rng = np.random.default_rng(seed)
+    t = 0.5
+    utterances = []
+    for _ in range(n_utterances):
+        n_words = int(rng.choice([2, 3, 5, 8, 12]))
+        words = []
+        for k in range(n_words):
+            duration = rng.uniform(0.25, 0.45)
+            text = VOCAB[int(rng.integers(len(VOCAB)))]
+            if k == n_words - 1 and rng.random() < 0.5:
+                text += "."
+            words.append((text, t, t + duration))
+            t += duration + 0.08
+        utterances.append(words)
+        t += rng.uniform(0.6, 1.5)
+    return utterances, t
+
+
+def _heard(all_words, window_start, now):
+    """
+    ASR view of [window_start, now]: finished words, plus the word in
+    progress with its end clipped to now
+    """
+    return [
+        (text, start, min(end, now))
+        for text, start, end in all_words
+        if start >= window_start and start < now
+    ]
+
+
+def run_word_count(utterances, end_time, min_words=4):
+    all_words = [w for u in utterances for w in u]
+    committer = PhraseCommitter(min_words=min_words)
+    committed_at = {}
+    buffer_start = 0.0
+    last_voice = 0.0
+
+    for now in np.arange(CHUNK, end_time, CHUNK):
+        speaking = any(s < now and e > now - CHUNK for _, s, e in all_words)
+        if speaking:
+            last_voice = now
+            window = _heard(all_words, max(buffer_start, now - WINDOW), now)
+            before = len(committer.last_tokens)
+            if committer.process(" ".join(w[0] for w in window)):
+                for word in window[before:]:
+                    committed_at.setdefault((word[0], word[1]), now)
+        elif now - last_voice > FLUSH_SILENCE:
+            buffer_start = now
+
+    return committed_at
+
+
+def run_commit_policy(utterances, end_time):
+    all_words = [w for u in utterances for w in u]
+    sr = 16000
+    policy = CommitPolicy(sample_rate=sr)
+    committed_at = {}
+    buffer_start = 0.0
+    last_voice = 0.0
+
+    for now in np.arange(CHUNK, end_time, CHUNK):
+        speaking = any(s < now and e > now - CHUNK for _, s, e in all_words)
+        if speaking:
+            last_voice = now
+        pause = now - last_voice
+        if not (speaking or (policy.has_pending() and pause >= policy.pause_sec)):
+            if pause > FLUSH_SILENCE:
+                buffer_start = now
+                policy.reset()
+            continue
+
+        window = _heard(all_words, max(buffer_start, now - WINDOW), now)
+        phrase, commit_sample = policy.update(
+            [(text, int(s * sr), int(e * sr)) for text, s, e in window],
+            window_end=int(now * sr),
+            pause_seconds=pause
+        )
+        if phrase:
+            for text, start, end in window:
+                if int(end * sr) <= commit_sample:
+                    committed_at.setdefault((text, start), now)
+            buffer_start = commit_sample / sr
+
+    return committed_at
+
+
+def summarize(utterances, committed_at):
+    latencies = []
+    missed = 0
+    for words in utterances:
+        text, start, end = words[-1]
+        at = committed_at.get((text, start))
+        if at is None:
+            missed += 1
+        else:
+            latencies.append(at - end)
+
+    result = {"utterances": len(utterances), "missed": missed}
+    if latencies:
+        p50, p95 = np.percentile(np.asarray(latencies) * 1000, [50, 95])
+        result.update(p50_ms=round(float(p50), 1), p95_ms=round(float(p95), 1))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare phrase commit policies")
+    parser.add_argument("--utterances", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write JSON results here")
+    args = parser.parse_args()
+
+    utterances, end_time = make_script(args.utterances, args.seed)
+    report = {
+        "word_count": summarize(utterances, run_word_count(utterances, end_time)),
+        "commit_policy": summarize(utterances, run_commit_policy(utterances, end_time)),
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+# ============================================================
+# replay.py — Offline replay benchmark for the streaming pipeline
+# ============================================================
+"""
+Feeds WAV files (or synthetic speech) through services.pipeline.session
+.process_chunk — the same step app.streaming_pipeline runs — with N
+concurrent virtual speakers. Stub backends keep it CPU-only.
+
+    python -m benchmarks.replay --speakers 8 --seconds 30 --speed 4 \
+        --out bench.json --compare baseline.json
+"""
+
+import argparse
+import json
+import platform
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+from services.monitoring.tracing import Tracer, summarize
+from services.pipeline.scheduler import SCHEDULER
+from services.pipeline.session import SessionState, process_chunk
+
+
+SAMPLE_RATE = 16000
+
+VOCAB = (
+    "hello today we are going to talk about how this system translates "
+    "speech from one language into another while keeping your voice"
+).split()
+
+
+# ------------------------------------------------------------
+# Deterministic stub backends
+# ------------------------------------------------------------
+class StubDevice:
+    """
+    Models a GPU with `slots` concurrent kernels (0 = unlimited): stub
+    compute time is spent holding a slot
+    """
+
+    def __init__(self, slots=0):
+        self.semaphore = threading.Semaphore(slots) if slots else None
+
+    def compute(self, seconds):
+        if self.semaphore is None:
+            time.sleep(seconds)
+            return
+        with self.semaphore:
+            time.sleep(seconds)
+
+
+UNLIMITED = StubDevice()
+
+
+class StubASR:
+    def __init__(self, latency=0.05, words_per_sec=2.5, device=UNLIMITED):
+        self.latency = latency
+        self.words_per_sec = words_per_sec
+        self.device = device
+
+    def transcribe_words(self, audio_np):
+        """
+        One word every 1 / words_per_sec seconds from the start of each
+        voiced run, so repeated decodes of the same audio agree
+        """
+        if audio_np is None or len(audio_np) < 1600:
+            return []
+        self.device.compute(self.latency)
+
+        frame = 1600
+        n = len(audio_np) // frame
+        frames = audio_np[:n * frame].reshape(n, frame)
+        voiced = np.sqrt(np.mean(frames ** 2, axis=1)) > 0.015
+
+        step = 1.0 / self.words_per_sec
+        words = []
+        i = 0
+        while i < n:
+            if not voiced[i]:
+                i += 1
+                continue
+            j = i
+            while j < n and voiced[j]:
+                j += 1
+            t, k = i * 0.1, 0
+            while t + 0.9 * step <= j * 0.1:
+                text = VOCAB[k % len(VOCAB)] + ("," if k % 5 == 4 else "")
+                words.append((text, t, t + 0.9 * step))
+                t += step
+                k += 1
+            i = j
+        return words
+
+    def transcribe(self, audio_np):
+        return " ".join(text for text, _, _ in self.transcribe_words(audio_np))
+
+
+class StubEmotion:
+    def detect(self, text):
+        return "neutral"
+
+
+class StubTranslator:
+    def __init__(self, latency=0.03, device=UNLIMITED):
+        self.latency = latency
+        self.device = device
+
+    def translate(self, text, src_lang, tgt_lang, emotion, **options):
+        self.device.compute(self.latency)
+        return " ".join(reversed(text.split()))
+
+    def translate_many(self, text, src_lang, tgt_langs, emotion, **options):
+        # One encode plus a batched decode: cost grows slowly with targets
+        self.device.compute(self.latency * (1 + 0.25 * (len(tgt_langs) - 1)))
+        return {lang: " ".join(reversed(text.split())) for lang in tgt_langs}
+
+
+class StubTTS:
+    sample_rate = 24000
+
+    def __init__(self, first_chunk_latency=0.08, chunk_latency=0.02,
+                 seconds_per_word=0.3, chunk_sec=0.25, device=UNLIMITED):
+        self.device = device
+        self.first_chunk_latency = first_chunk_latency
+        self.chunk_latency = chunk_latency
+        self.seconds_per_word = seconds_per_word
+        self.chunk_sec = chunk_sec
+
+    def stream(self, text, user_id, language="hi", normalizer=None):
+        total = int(len(text.split()) * self.seconds_per_word * self.sample_rate)
+        step = int(self.chunk_sec * self.sample_rate)
+        self.device.compute(self.first_chunk_latency)
+        for start in range(0, total, step):
+            if start:
+                self.device.compute(self.chunk_latency)
+            n = min(step, total - start)
+            yield np.full(n, 0.1, dtype=np.float32)
+
+
+def stub_backends(args, device=UNLIMITED):
+    return {
+        "asr": StubASR(latency=args.asr_latency, device=device),
+        "emotion": StubEmotion(),
+        "translator": StubTranslator(latency=args.mt_latency, device=device),
+        "tts": StubTTS(first_chunk_latency=args.tts_latency, device=device),
+    }
+
+
+# ------------------------------------------------------------
+# Input audio
+# ------------------------------------------------------------
+def synthetic_speech(seconds, seed=0):
+    """
+    2 s voiced bursts separated by 1 s pauses
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * SAMPLE_RATE)
+    t = np.arange(n) / SAMPLE_RATE
+    audio = 0.1 * np.sin(2 * np.pi * 180 * t) + 0.02 * rng.standard_normal(n)
+    audio[(t % 3.0) >= 2.0] = 0.0
+    return audio.astype(np.float32)
+
+
+def load_wav(path):
+    import soundfile as sf
+
+    audio, sr = sf.read(path, dtype="float32")
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if sr != SAMPLE_RATE:
+        positions = np.arange(0, len(audio), sr / SAMPLE_RATE)
+        audio = np.interp(positions, np.arange(len(audio)), audio)
+    return audio.astype(np.float32)
+
+
+# ------------------------------------------------------------
+# Replay
+# ------------------------------------------------------------
+def replay_speaker(session, audio, chunk_sec, speed, max_lag, result):
+    chunk = int(chunk_sec * SAMPLE_RATE)
+    chunks = [audio[i:i + chunk] for i in range(0, len(audio), chunk)]
+
+    chunk_latencies = []
+    dropped = 0
+    start = time.perf_counter()
+
+    for idx, piece in enumerate(chunks):
+        if speed > 0:
+            due = start + idx * chunk_sec / speed
+            now = time.perf_counter()
+            if now < due:
+                time.sleep(due - now)
+            elif now - due > max_lag / speed:
+                # Client would have dropped this chunk while we were busy
+                dropped += 1
+                continue
+
+        t0 = time.perf_counter()
+        process_chunk(session, piece, SAMPLE_RATE)
+        chunk_latencies.append(time.perf_counter() - t0)
+
+    result["chunks"] = len(chunks) - dropped
+    result["dropped"] = dropped
+    result["chunk_latencies"] = chunk_latencies
+    result["audio_seconds"] = len(audio) / SAMPLE_RATE
+
+
+def run(args):
+    if args.wav:
+        inputs = [load_wav(path) for path in args.wav]
+    else:
+        inputs = [synthetic_speech(args.seconds, seed=i) for i in range(args.speakers)]
+
+    tracemalloc.start()
+
+    # The benchmark's large trace rings are not per-session cost:
+    # allocate them before the baseline
+    tracers = [
+        Tracer(f"bench-{i}", capacity=100000, enabled=True)
+        for i in range(args.speakers)
+    ]
+    mem_before = tracemalloc.get_traced_memory()[0]
+
+    device = StubDevice(args.device_slots)
+    sessions = []
+    for i in range(args.speakers):
+        session = SessionState(f"bench-{i}", backends=stub_backends(args, device))
+        session.tracer = tracers[i]
+        session.set_target_langs(args.targets)
+        sessions.append(session)
+
+    results = [{} for _ in sessions]
+    threads = [
+        threading.Thread(
+            target=replay_speaker,
+            args=(
+                session,
+                inputs[i % len(inputs)],
+                args.chunk_ms / 1000,
+                args.speed,
+                args.max_lag,
+                results[i],
+            ),
+        )
+        for i, session in enumerate(sessions)
+    ]
+
+    wall_start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+
+    mem_after, mem_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = {"chunk": []}
+    for session, result in zip(sessions, results):
+        latencies["chunk"].extend(result["chunk_latencies"])
+        for stage, values in session.tracer.stage_latencies().items():
+            latencies.setdefault(stage, []).extend(values)
+
+    audio_seconds = sum(r["audio_seconds"] for r in results)
+    chunks = sum(r["chunks"] for r in results)
+
+    return {
+        "config": {
+            key: value for key, value in vars(args).items()
+            if key not in ("out", "compare")
+        },
+        "host": platform.platform(),
+        "wall_seconds": round(wall, 3),
+        "throughput": {
+            "chunks_per_sec": round(chunks / wall, 2),
+            "audio_seconds_per_sec": round(audio_seconds / wall, 3),
+            "phrases": sum(s.tracer._count for s in sessions),
+        },
+        "dropped_chunks": sum(r["dropped"] for r in results),
+        "memory": {
+            "growth_per_session_kb": round(
+                (mem_after - mem_before) / len(sessions) / 1024, 1
+            ),
+            "peak_kb": round(mem_peak / 1024, 1),
+        },
+        "latency": summarize(latencies),
+        "scheduler": SCHEDULER.stats() if SCHEDULER.enabled else None,
+    }
+
+
+def compare(report, baseline):
+    """
+    Print relative change against a previous report
+    """
+    def pct(new, old):
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    old_tp = baseline["throughput"]["audio_seconds_per_sec"]
+    new_tp = report["throughput"]["audio_seconds_per_sec"]
+    print(f"throughput   {old_tp:>10} -> {new_tp:<10} {pct(new_tp, old_tp)}")
+
+    for stage, stats in report["latency"].items():
+        old = baseline["latency"].get(stage)
+        if old is None:
+            continue
+        before = f"{old['p95_ms']}ms"
+        after = f"{stats['p95_ms']}ms"
+        print(
+            f"{stage:<12} p95 {before:>10} -> {after:<10} "
+            f"{pct(stats['p95_ms'], old['p95_ms'])}"
+        )
+
+    print(
+        f"dropped      {baseline['dropped_chunks']:>10} -> "
+        f"{report['dropped_chunks']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--wav", nargs="*", help="Input WAV files (default: synthetic)")
+    parser.add_argument("--seconds", type=float, default=30.0, help="Synthetic audio length")
+    parser.add_argument("--speakers", type=int, default=4)
+    parser.add_argument("--chunk-ms", type=int, default=100)
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="1 = real time, 4 = 4x faster, 0 = as fast as possible")
+    parser.add_argument("--max-lag", type=float, default=1.0,
+                        help="Seconds behind schedule before chunks are dropped")
+    parser.add_argument("--asr-latency", type=float, default=0.05)
+    parser.add_argument("--mt-latency", type=float, default=0.03)
+    parser.add_argument("--tts-latency", type=float, default=0.08)
+    parser.add_argument("--device-slots", type=int, default=0,
+                        help="Stub model calls share this many device slots (0 = unlimited)")
+    parser.add_argument("--targets", nargs="+", default=["hin_Deva"],
+                        help="Target languages per session")
+    parser.add_argument("--out", help="Write JSON report here")
+    parser.add_argument("--compare", help="Baseline JSON report to diff against")
+    args = parser.parse_args()
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
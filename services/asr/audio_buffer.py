@@ -6,10 +6,17 @@ class AudioBuffer:
         self.sample_rate = sample_rate
         self.max_samples = int(max_seconds * sample_rate)
         self.buffer = np.zeros(0, dtype=np.float32)
+        # Absolute index (samples since session start) of buffer[0]
+        self.start_sample = 0
+
+    @property
+    def end_sample(self):
+        return self.start_sample + len(self.buffer)
 
     def add(self, chunk: np.ndarray, sr: int):
         self.buffer = np.concatenate([self.buffer, chunk])
         if len(self.buffer) > self.max_samples:
+            self.start_sample += len(self.buffer) - self.max_samples
             self.buffer = self.buffer[-self.max_samples:]
         return self.buffer
 
@@ -17,5 +24,14 @@ class AudioBuffer:
         samples = int(seconds * self.sample_rate)
         return self.buffer[-samples:]
 
+    def trim_before(self, sample: int):
+        """
+        Drop audio before absolute sample index `sample`
+        """
+        cut = min(max(sample - self.start_sample, 0), len(self.buffer))
+        self.buffer = self.buffer[cut:]
+        self.start_sample += cut
+
     def reset(self):
+        self.start_sample = self.end_sample
         self.buffer = np.zeros(0, dtype=np.float32)
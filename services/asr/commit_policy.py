@@ -0,0 +1,101 @@
+import string
+
+
+PUNCTUATION = ".,!?;:"
+
+
+def _norm(word):
+    return word.lower().strip(string.punctuation)
+
+
+class CommitPolicy:
+    """
+    Commits ASR words at the earliest stable boundary instead of waiting
+    for a fixed word count.
+
+    Words are (text, start_sample, end_sample) in absolute session
+    samples. A word is stable once it ends `stability_margin` before the
+    end of the decoded window and the previous hypothesis agreed on it.
+    A phrase is committed when
+      - the speaker paused for `pause_sec` (everything heard is final),
+      - a stable word ends in punctuation, or
+      - the oldest pending word is `max_latency` old (stable words only).
+    """
+
+    def __init__(
+        self,
+        sample_rate=16000,
+        stability_margin=0.4,
+        pause_sec=0.3,
+        max_latency=2.0,
+        min_words=2
+    ):
+        self.sample_rate = sample_rate
+        self.margin = int(stability_margin * sample_rate)
+        self.pause_sec = pause_sec
+        self.max_latency = int(max_latency * sample_rate)
+        self.min_words = min_words
+        self.agree_tolerance = int(0.2 * sample_rate)
+
+        # Words ending at or before this sample have been emitted
+        self.committed_until = 0
+        self.prev_words = []
+        self.pending = False
+
+    def has_pending(self):
+        return self.pending
+
+    def _agrees(self, word):
+        text, start, _ = word
+        return any(
+            _norm(text) == _norm(p_text) and abs(start - p_start) <= self.agree_tolerance
+            for p_text, p_start, _ in self.prev_words
+        )
+
+    def update(self, words, window_end, pause_seconds=0.0):
+        """
+        Returns (phrase, commit_sample) or (None, None).
+        The caller may discard audio before commit_sample.
+        """
+        # Words centred before the last commit were already emitted
+        fresh = [
+            w for w in words
+            if (w[1] + w[2]) // 2 > self.committed_until
+        ]
+
+        stable = []
+        for word in fresh:
+            if word[2] > window_end - self.margin or not self._agrees(word):
+                break
+            stable.append(word)
+
+        self.prev_words = fresh
+        self.pending = bool(fresh)
+
+        commit = []
+        if fresh and pause_seconds >= self.pause_sec:
+            commit = fresh
+        elif stable:
+            punct = [
+                i for i, (text, _, _) in enumerate(stable)
+                if text[-1] in PUNCTUATION
+            ]
+            if punct and punct[-1] + 1 >= self.min_words:
+                commit = stable[:punct[-1] + 1]
+            elif (
+                window_end - stable[0][2] >= self.max_latency
+                and len(stable) >= self.min_words
+            ):
+                commit = stable
+
+        if not commit:
+            return None, None
+
+        self.committed_until = commit[-1][2]
+        self.prev_words = [w for w in fresh if w not in commit]
+        self.pending = bool(self.prev_words)
+        return " ".join(text for text, _, _ in commit), self.committed_until
+
+    def reset(self):
+        self.prev_words = []
+        self.pending = False
@@ -1,18 +1,36 @@
-from faster_whisper import WhisperModel
+import time
+
+import ctranslate2
+import numpy as np
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+
+from services.monitoring.metrics import ASR_RTF
+
+
 class StreamingASR:
-    def __init__(self, window_sec=3):
+    def __init__(self, window_sec=3, model_size="large-v3"):
         self.window_samples = window_sec * 16000
+        self.model_size = model_size
+
+        # CPU-only nodes (many workers sharing weights) run int8
+        on_gpu = ctranslate2.get_cuda_device_count() > 0
         self.model = WhisperModel(
-            "large-v3",
-            device="cuda",
-            compute_type="float16"
+            model_size,
+            device="cuda" if on_gpu else "cpu",
+            compute_type="float16" if on_gpu else "int8"
         )
+        self._batched = None
+
+    def warmup(self):
+        noise = np.random.default_rng(0).standard_normal(16000) * 0.01
+        self.transcribe(noise.astype(np.float32))
 
     def transcribe(self, audio_np):
         if audio_np is None or len(audio_np) < 1600:
             return ""
 
         audio_np = audio_np[-self.window_samples:]
+        start = time.perf_counter()
 
         segments, _ = self.model.transcribe(
             audio_np,
@@ -22,8 +40,82 @@ class StreamingASR:
             condition_on_previous_text=False
         )
 
-        return " ".join(
+        # segments is lazy; decoding happens while iterating
+        text = " ".join(
             seg.text.strip()
             for seg in segments
             if seg.avg_logprob > -1.2
         )
+
+        ASR_RTF.observe(
+            (time.perf_counter() - start) / (len(audio_np) / 16000)
+        )
+        return text
+
+    def transcribe_words(self, audio_np):
+        """
+        Like transcribe, but returns [(word, start_sec, end_sec), ...]
+        relative to the start of the decoded window
+        """
+        if audio_np is None or len(audio_np) < 1600:
+            return []
+
+        audio_np = audio_np[-self.window_samples:]
+        start = time.perf_counter()
+
+        segments, _ = self.model.transcribe(
+            audio_np,
+            language="en",
+            beam_size=1,
+            temperature=0.0,
+            condition_on_previous_text=False,
+            word_timestamps=True
+        )
+
+        words = [
+            (word.word.strip(), word.start, word.end)
+            for seg in segments
+            if seg.avg_logprob > -1.2
+            for word in seg.words
+            if word.word.strip()
+        ]
+
+        ASR_RTF.observe(
+            (time.perf_counter() - start) / (len(audio_np) / 16000)
+        )
+        return words
+
+    def transcribe_clips(self, audio_np, clips, batch_size=8):
+        """
+        Offline batched decode of speech clips inside one long array.
+        clips: [{"start": sample, "end": sample}, ...] (each <= 30 s)
+        Returns one text per clip.
+        """
+        if not clips:
+            return []
+
+        if self._batched is None:
+            self._batched = BatchedInferencePipeline(model=self.model)
+
+        segments, _ = self._batched.transcribe(
+            audio_np,
+            language="en",
+            batch_size=batch_size,
+            vad_filter=False,
+            clip_timestamps=[
+                {"start": c["start"] / 16000, "end": c["end"] / 16000}
+                for c in clips
+            ],
+            beam_size=1,
+            temperature=0.0,
+            condition_on_previous_text=False
+        )
+
+        starts = np.array([c["start"] for c in clips]) / 16000
+        texts = [[] for _ in clips]
+        for seg in segments:
+            mid = (seg.start + seg.end) / 2
+            idx = max(0, int(np.searchsorted(starts, mid, side="right")) - 1)
+            texts[idx].append(seg.text.strip())
+
+        return [" ".join(t) for t in texts]
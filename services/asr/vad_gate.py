@@ -1,19 +1,24 @@
 import numpy as np
-import time
 
 
 class VadGate:
     def __init__(self, threshold=0.015, silence_time=0.8):
         self.threshold = threshold
         self.silence_time = silence_time
-        self.last_voice_time = time.time()
+        # Audio (not wall-clock) silence since the last voiced chunk
+        self.silent_samples = 0
 
     def is_speech(self, chunk: np.ndarray):
         rms = np.sqrt(np.mean(chunk ** 2))
         if rms > self.threshold:
-            self.last_voice_time = time.time()
+            self.silent_samples = 0
             return True
+        self.silent_samples += len(chunk)
         return False
 
-    def should_flush(self):
-        return (time.time() - self.last_voice_time) > self.silence_time
+    def pause_seconds(self, sample_rate=16000):
+        return self.silent_samples / sample_rate
+
+    def should_flush(self, sample_rate=16000):
+        # Audio time, so replay speed and processing stalls do not matter
+        return self.pause_seconds(sample_rate) > self.silence_time
@@ -0,0 +1,37 @@
+# ============================================================
+# memory.py — Resident vs shared memory of worker processes
+# ============================================================
+
+# /proc/<pid>/smaps_rollup fields (kB) → report keys
+_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared_clean",
+    "Shared_Dirty": "shared_dirty",
+    "Private_Clean": "private_clean",
+    "Private_Dirty": "private_dirty",
+}
+
+
+def process_memory(pid):
+    """
+    Bytes per category for one process (Linux only; {} elsewhere).
+    shared = pages also mapped by another process, private = only
+    this one; pss splits shared pages evenly between their users.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as f:
+            lines = f.readlines()
+    except OSError:
+        return {}
+
+    usage = {}
+    for line in lines:
+        key, _, rest = line.partition(":")
+        if key in _FIELDS:
+            usage[_FIELDS[key]] = int(rest.split()[0]) * 1024
+
+    if usage:
+        usage["shared"] = usage.get("shared_clean", 0) + usage.get("shared_dirty", 0)
+        usage["private"] = usage.get("private_clean", 0) + usage.get("private_dirty", 0)
+    return usage
@@ -0,0 +1,283 @@
+# ============================================================
+# metrics.py — Prometheus-style metrics registry + endpoint
+# ============================================================
+
+import bisect
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+METRICS_PORT = int(os.environ.get("DUBYOU_METRICS_PORT", "9100"))
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(
+            k,
+            str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for k, v in pairs
+    )
+    return "{" + body + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    """
+    Either set explicitly or read from `fn` at scrape time. A callback
+    gauge is a single unlabelled sample.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), fn=None):
+        if fn is not None and labelnames:
+            raise ValueError(f"{name}: a callback gauge cannot have labels")
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self.fn = fn
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def _samples(self):
+        if self.fn is not None:
+            return [f"{self.name} {float(self.fn())}"]
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count, sum]
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[idx] += 1
+            row[-1] += value
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, list(row)) for key, row in self._values.items()]
+
+        lines = []
+        for key, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), row[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ("le", bound))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {row[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, *args, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=(), fn=None):
+        return self._register(Gauge, name, documentation, labelnames, fn=fn)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(
+            Histogram, name, documentation, labelnames, buckets=buckets
+        )
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(m.render() for m in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# ------------------------------------------------------------
+# Pipeline metrics (shared by all services)
+# ------------------------------------------------------------
+CHUNKS_INGESTED = REGISTRY.counter(
+    "dubyou_audio_chunks_total", "Audio chunks received from clients"
+)
+AUDIO_SECONDS_INGESTED = REGISTRY.counter(
+    "dubyou_audio_seconds_total", "Seconds of audio received from clients"
+)
+ASR_RTF = REGISTRY.histogram(
+    "dubyou_asr_real_time_factor",
+    "ASR decode time divided by audio window duration",
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 4.0),
+)
+PHRASES_COMMITTED = REGISTRY.counter(
+    "dubyou_phrases_committed_total", "Phrases committed for translation"
+)
+TRANSLATIONS = REGISTRY.counter(
+    "dubyou_translations_total", "Completed translations"
+)
+TRANSLATION_SECONDS = REGISTRY.histogram(
+    "dubyou_translation_seconds", "Wall time per translation"
+)
+TTS_AUDIO_SECONDS = REGISTRY.counter(
+    "dubyou_tts_audio_seconds_total", "Seconds of speech synthesized"
+)
+TTS_WALL_SECONDS = REGISTRY.counter(
+    "dubyou_tts_wall_seconds_total", "Wall seconds spent synthesizing speech"
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "dubyou_cache_requests_total",
+    "Cache lookups by cache and result",
+    labelnames=("cache", "result"),
+)
+ERRORS = REGISTRY.counter(
+    "dubyou_errors_total",
+    "Exceptions caught and suppressed, by stage",
+    labelnames=("stage",),
+)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+# ------------------------------------------------------------
+# HTTP endpoint
+# ------------------------------------------------------------
+# path -> fn() returning (status, content_type, body)
+ROUTES = {}
+
+
+def register_route(path, fn):
+    ROUTES[path] = fn
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/metrics":
+            status = 200
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+            body = self.registry.render()
+        elif path in ROUTES:
+            status, content_type, body = ROUTES[path]()
+        else:
+            self.send_error(404)
+            return
+
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=METRICS_PORT, host="0.0.0.0", registry=REGISTRY):
+    """
+    Serve /metrics from a daemon thread; returns the server
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(
+        target=server.serve_forever,
+        name="metrics-http",
+        daemon=True
+    )
+    thread.start()
+    return server
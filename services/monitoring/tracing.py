@@ -0,0 +1,182 @@
+# ============================================================
+# tracing.py — Per-phrase latency tracing
+# ============================================================
+
+import itertools
+import json
+import os
+import time
+
+import numpy as np
+
+
+# Pipeline stages, in the order a phrase passes through them.
+# "audio" is the phrase's first voiced chunk; "vad" and "asr" are
+# re-stamped by every decode, so they end on the decode that commits.
+STAGES = (
+    "audio",
+    "vad",
+    "asr",
+    "commit",
+    "emotion",
+    "translate",
+    "tts_first",
+    "tts_done",
+)
+_STAGE_INDEX = {name: idx for idx, name in enumerate(STAGES)}
+
+TRACING_ENABLED = os.environ.get("DUBYOU_TRACE", "1") != "0"
+TRACE_EXPORT_PATH = os.environ.get("DUBYOU_TRACE_FILE")
+
+_phrase_ids = itertools.count(1)
+
+
+class PhraseTrace:
+    __slots__ = ("phrase_id", "session_id", "stamps")
+
+    def __init__(self, session_id):
+        self.phrase_id = None
+        self.session_id = session_id
+        self.stamps = [None] * len(STAGES)
+
+    def mark(self, stage, at=None):
+        self.stamps[_STAGE_INDEX[stage]] = time.perf_counter() if at is None else at
+
+    def to_dict(self):
+        return {
+            "phrase_id": self.phrase_id,
+            "session_id": self.session_id,
+            "stamps": {
+                name: stamp
+                for name, stamp in zip(STAGES, self.stamps)
+                if stamp is not None
+            },
+        }
+
+
+class _NullTrace:
+    __slots__ = ()
+
+    phrase_id = None
+
+    def mark(self, stage, at=None):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+class Tracer:
+    """
+    Per-session tracer. One trace stays open per phrase, from its first
+    voiced chunk until it is spoken; only traces that commit a phrase are
+    kept, in a fixed-size ring (single writer, no lock).
+    """
+
+    def __init__(self, session_id, capacity=512, enabled=None, export_path=None):
+        self.session_id = session_id
+        self.enabled = TRACING_ENABLED if enabled is None else enabled
+        self.export_path = export_path or TRACE_EXPORT_PATH
+        self.capacity = capacity
+        self._ring = [None] * capacity
+        self._count = 0
+        self._open = None
+
+    def begin(self, at=None):
+        """
+        The open trace of the phrase being heard, opened (stamped
+        "audio" at `at`) if there is none yet
+        """
+        if not self.enabled:
+            return NULL_TRACE
+        if self._open is None:
+            self._open = PhraseTrace(self.session_id)
+            self._open.mark("audio", at)
+        return self._open
+
+    def discard(self):
+        """
+        Drop the open trace (buffer flushed without a commit)
+        """
+        self._open = None
+
+    def commit(self, trace):
+        """
+        Tag the trace with a phrase ID and keep it; the next voiced
+        chunk opens a new trace
+        """
+        if trace is NULL_TRACE:
+            return None
+        if trace is self._open:
+            self._open = None
+        trace.phrase_id = next(_phrase_ids)
+        trace.mark("commit")
+        self._ring[self._count % self.capacity] = trace
+        self._count += 1
+        return trace.phrase_id
+
+    def finish(self, trace):
+        """
+        Called once the phrase has been spoken; appends it to the
+        JSONL export when one is configured
+        """
+        if trace is NULL_TRACE or self.export_path is None:
+            return
+        with open(self.export_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(trace.to_dict()) + "\n")
+
+    def records(self):
+        if self._count <= self.capacity:
+            return self._ring[:self._count]
+        start = self._count % self.capacity
+        return self._ring[start:] + self._ring[:start]
+
+    def stage_latencies(self):
+        """
+        Seconds spent in each stage, measured from the previous stage
+        that was reached. "total" spans the phrase's first voiced chunk
+        to TTS done.
+        """
+        latencies = {name: [] for name in STAGES[1:]}
+        latencies["total"] = []
+
+        for trace in self.records():
+            prev = None
+            for name, stamp in zip(STAGES, trace.stamps):
+                if stamp is None:
+                    continue
+                if prev is not None:
+                    latencies[name].append(stamp - prev)
+                prev = stamp
+
+            first, last = trace.stamps[0], trace.stamps[-1]
+            if first is not None and last is not None:
+                latencies["total"].append(last - first)
+
+        return latencies
+
+    def stats(self):
+        return summarize(self.stage_latencies())
+
+    def export_jsonl(self, path):
+        with open(path, "a", encoding="utf-8") as f:
+            for trace in self.records():
+                f.write(json.dumps(trace.to_dict()) + "\n")
+
+
+def summarize(latencies):
+    """
+    p50 / p95 / p99 in milliseconds per stage
+    """
+    stats = {}
+    for name, values in latencies.items():
+        if not values:
+            continue
+        p50, p95, p99 = np.percentile(np.asarray(values) * 1000, [50, 95, 99])
+        stats[name] = {
+            "count": len(values),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+        }
+    return stats
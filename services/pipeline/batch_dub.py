@@ -0,0 +1,331 @@
+# ============================================================
+# batch_dub.py — Offline dubbing of whole audio files
+# ============================================================
+"""
+    python -m services.pipeline.batch_dub talk.wav talk_hi.wav --user-id ab12cd34
+
+Reads the input in fixed blocks (memory stays flat for any length),
+segments speech with Silero VAD, transcribes / translates segments in
+batches, synthesizes them on a thread pool and writes a time-aligned
+track: each voice is fitted to its segment's slot, so timing never
+drifts. A checkpoint next to the output lets an interrupted run resume.
+"""
+
+import argparse
+import json
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+import numpy as np
+import soundfile as sf
+
+from services.pipeline.startup import LOADER
+from services.translation.languages import SOURCE_LANG, tts_code
+
+
+SAMPLE_RATE = 16000
+
+# Whisper decodes at most 30 s per clip
+MAX_CLIP_SECONDS = 28.0
+
+# A voice longer than its slot (up to the next segment) is sped up by at
+# most this factor, then trimmed, so timing never drifts
+MAX_SPEEDUP = 1.25
+FADE_SECONDS = 0.02
+
+# Speech this close to the end of a block may continue into the next one
+TAIL_MARGIN_SECONDS = 0.5
+
+
+def _resample(audio_np, sr):
+    if sr == SAMPLE_RATE:
+        return audio_np
+
+    import torch
+    import torchaudio
+
+    with torch.no_grad():
+        return torchaudio.functional.resample(
+            torch.from_numpy(audio_np), sr, SAMPLE_RATE
+        ).numpy()
+
+
+def _split_long(segments, max_samples):
+    clips = []
+    for seg in segments:
+        for start in range(seg["start"], seg["end"], max_samples):
+            clips.append({"start": start, "end": min(start + max_samples, seg["end"])})
+    return clips
+
+
+def _time_stretch(audio_np, rate, n_fft=1024, hop=256):
+    """Pitch-preserving speed-up by `rate` (phase vocoder)"""
+    import torch
+    import torchaudio
+
+    window = torch.hann_window(n_fft)
+    with torch.no_grad():
+        spec = torch.stft(
+            torch.from_numpy(audio_np), n_fft, hop, window=window, return_complex=True
+        )
+        phase_advance = torch.linspace(0, math.pi * hop, spec.shape[0])[..., None]
+        spec = torchaudio.functional.phase_vocoder(spec, rate, phase_advance)
+        return torch.istft(
+            spec, n_fft, hop, window=window, length=int(len(audio_np) / rate)
+        ).numpy()
+
+
+def _fit(voice, frames, sample_rate):
+    """
+    Shorten a voice to at most `frames` samples: speed it up by up to
+    MAX_SPEEDUP, then trim the rest with a short fade-out
+    """
+    if frames <= 0:
+        return voice[:0]
+    if len(voice) <= frames:
+        return voice
+
+    rate = min(len(voice) / frames, MAX_SPEEDUP)
+    if rate > 1.01 and len(voice) > 1024:
+        voice = _time_stretch(voice, rate)
+
+    if len(voice) > frames:
+        voice = voice[:frames].copy()
+        fade = min(frames, int(FADE_SECONDS * sample_rate))
+        if fade:
+            voice[-fade:] *= np.linspace(1.0, 0.0, fade, dtype=np.float32)
+    return voice
+
+
+def _write_silence(out, frames, step=240000):
+    while frames > 0:
+        n = min(frames, step)
+        out.write(np.zeros(n, dtype=np.float32))
+        frames -= n
+
+
+def _load_checkpoint(path, input_path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("input") != os.path.abspath(input_path):
+        return None
+    return state
+
+
+def _save_checkpoint(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+class BatchDubber:
+    def __init__(self, user_id, tgt_lang="hin_Deva", batch_size=8, tts_workers=2,
+                 backends=None):
+        """
+        `backends` ({"asr", "emotion", "translator", "tts", "vad"})
+        replaces the shared models, e.g. with stubs in tests; "vad" is a
+        speech_timestamps(audio, sr) function
+        """
+        self.user_id = user_id
+        self.tgt_lang = tgt_lang
+        self.batch_size = batch_size
+        self.tts_workers = tts_workers
+
+        if backends is None:
+            from services.voice_enrollment.vad import speech_timestamps
+
+            backends = {
+                name: LOADER.get(name)
+                for name in ("asr", "emotion", "translator", "tts")
+            }
+            backends["vad"] = speech_timestamps
+
+        self.asr = backends["asr"]
+        self.emotion = backends["emotion"]
+        self.translator = backends["translator"]
+        self.tts = backends["tts"]
+        self.vad = backends["vad"]
+
+        # One shared XTTS instance is not thread-safe: the pool's phrases
+        # take turns, overlapping only with ASR / translation. Engines
+        # that batch phrases themselves (tts.batched) take them all at once
+        self._tts_lock = (
+            nullcontext() if getattr(self.tts, "batched", False) else threading.Lock()
+        )
+
+    def _split_block(self, audio, final, max_carry):
+        """
+        Returns (finished segments, sample where the carried tail starts)
+        """
+        segments = self.vad(audio, SAMPLE_RATE)
+        if final:
+            return segments, len(audio)
+
+        carry_from = len(audio) - int(TAIL_MARGIN_SECONDS * SAMPLE_RATE)
+        if segments and segments[-1]["end"] > carry_from:
+            carry_from = segments[-1]["start"]
+
+        # One very long run of speech: cut it rather than grow the carry
+        if len(audio) - carry_from > max_carry:
+            carry_from = len(audio)
+
+        carry_from = max(carry_from, 0)
+        return [s for s in segments if s["end"] <= carry_from], carry_from
+
+    def _synthesize(self, text):
+        if not text.strip():
+            return np.zeros(0, dtype=np.float32)
+        with self._tts_lock:
+            pieces = list(self.tts.stream(text, self.user_id, language=tts_code(self.tgt_lang)))
+        return np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+
+    def _dub(self, audio, segments, pool):
+        clips = _split_long(segments, int(MAX_CLIP_SECONDS * SAMPLE_RATE))
+        texts = []
+        for i in range(0, len(clips), self.batch_size):
+            texts.extend(self.asr.transcribe_clips(
+                audio, clips[i:i + self.batch_size], batch_size=self.batch_size
+            ))
+
+        spoken = [i for i, text in enumerate(texts) if text.strip()]
+        emotions = ["neutral"] * len(texts)
+        for i, label in zip(spoken, self.emotion.detect_batch([texts[i] for i in spoken])):
+            emotions[i] = label
+
+        translations = []
+        for i in range(0, len(texts), self.batch_size):
+            translations.extend(self.translator.translate_batch(
+                texts[i:i + self.batch_size],
+                SOURCE_LANG,
+                self.tgt_lang,
+                emotions[i:i + self.batch_size]
+            ))
+
+        return clips, pool.map(self._synthesize, translations)
+
+    def run(self, input_path, output_path, block_seconds=60.0, resume=True):
+        info = sf.info(input_path)
+        in_sr = info.samplerate
+        out_sr = self.tts.sample_rate
+        checkpoint_path = output_path + ".ckpt.json"
+
+        state = _load_checkpoint(checkpoint_path, input_path) if resume else None
+        if state and os.path.exists(output_path):
+            print(f"[batch] resuming at {state['input_frame'] / in_sr:.1f}s")
+            out = sf.SoundFile(output_path, mode="r+")
+        else:
+            state = {"input": os.path.abspath(input_path), "input_frame": 0, "output_frames": 0}
+            out = sf.SoundFile(output_path, mode="w", samplerate=out_sr, channels=1, subtype="PCM_16")
+
+        cursor = state["output_frames"]
+        out.seek(cursor)
+        total = int(round(info.frames / in_sr * out_sr))
+
+        # carry: tail of the previous block that may hold unfinished speech,
+        # starting at absolute 16 kHz sample carry_start
+        carry = np.zeros(0, dtype=np.float32)
+        carry_start = int(round(state["input_frame"] * SAMPLE_RATE / in_sr))
+        read_frame = state["input_frame"]
+        block_frames = int(block_seconds * in_sr)
+
+        with out, ThreadPoolExecutor(max_workers=self.tts_workers) as pool:
+            for block in sf.blocks(
+                input_path,
+                blocksize=block_frames,
+                dtype="float32",
+                always_2d=True,
+                start=read_frame
+            ):
+                read_frame += len(block)
+                final = read_frame >= info.frames
+
+                audio = np.concatenate([carry, _resample(block.mean(axis=1), in_sr)])
+                segments, carry_from = self._split_block(
+                    audio, final, max_carry=2 * block_seconds * SAMPLE_RATE
+                )
+
+                clips, voices = self._dub(audio, segments, pool)
+
+                # Each voice plays in [its clip start, the next clip start);
+                # the last one may run up to the audio carried forward
+                starts = [
+                    int(round((carry_start + clip["start"]) / SAMPLE_RATE * out_sr))
+                    for clip in clips
+                ]
+                block_end = int(round((carry_start + carry_from) / SAMPLE_RATE * out_sr))
+                ends = starts[1:] + [total if final else block_end]
+
+                for pos, end, voice in zip(starts, ends, voices):
+                    if pos > cursor:
+                        _write_silence(out, pos - cursor)
+                        cursor = pos
+                    voice = _fit(voice, end - cursor, out_sr)
+                    out.write(voice)
+                    cursor += len(voice)
+
+                carry = audio[carry_from:]
+                carry_start += carry_from
+                out.flush()
+
+                state["input_frame"] = int(round(carry_start * in_sr / SAMPLE_RATE))
+                state["output_frames"] = cursor
+                _save_checkpoint(checkpoint_path, state)
+
+                print(
+                    f"[batch] {read_frame / in_sr:.0f}s / {info.frames / in_sr:.0f}s, "
+                    f"{len(clips)} segments"
+                )
+
+            if cursor < total:
+                _write_silence(out, total - cursor)
+
+        # An empty input has no blocks, so no checkpoint was written
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        return output_path
+
+
+def dub_file(input_path, output_path, user_id, tgt_lang="hin_Deva", **kwargs):
+    run_kwargs = {
+        key: kwargs.pop(key)
+        for key in ("block_seconds", "resume")
+        if key in kwargs
+    }
+    return BatchDubber(user_id, tgt_lang, **kwargs).run(
+        input_path, output_path, **run_kwargs
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dub a recorded audio file")
+    parser.add_argument("input")
+    parser.add_argument("output", help="Output WAV path")
+    parser.add_argument("--user-id", required=True, help="Enrolled voice to speak with")
+    parser.add_argument("--target", default="hin_Deva")
+    parser.add_argument("--block-seconds", type=float, default=60.0)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--tts-workers", type=int, default=2)
+    parser.add_argument("--no-resume", action="store_true")
+    args = parser.parse_args()
+
+    LOADER.start()
+    dub_file(
+        args.input,
+        args.output,
+        args.user_id,
+        args.target,
+        batch_size=args.batch_size,
+        tts_workers=args.tts_workers,
+        block_seconds=args.block_seconds,
+        resume=not args.no_resume,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+# ============================================================
+# checkpoint.py — Session snapshots for reconnects and migration
+# ============================================================
+"""
+A snapshot is one small .npz per session in CHECKPOINT_DIR:
+
+    audio  int16   uncommitted audio still in the AudioBuffer
+    meta   uint8   JSON: buffer offset, CommitPolicy state, VAD pause,
+                   translation context, phrase sequence, outbox and
+                   the voice reference the TTS latents come from
+
+Snapshots are written atomically (tmp + os.replace) every
+CHECKPOINT_INTERVAL seconds of activity, right after each commit and
+again once the phrase has been emitted. Between snapshots each chunk
+is appended to a small int16 journal (.pcm) tagged with its absolute
+start sample; restore replays the records past the snapshot, so no
+audio is lost to the interval.
+
+Emission: a commit is snapshotted together with its translations in
+the outbox before anything is emitted, and the outbox is cleared (and
+snapshotted) once emission finishes. Audio up to committed_until is
+gone from the restored buffer, so a phrase is never re-recognised or
+re-translated. While a phrase streams out, its progress (translation
+text sent, samples delivered per language, languages done) is appended
+to a small .out log after every event; a restored session resumes the
+interrupted phrase from the last record.
+
+Guarantee: recognition, translation and commit happen exactly once per
+phrase; delivery is at-least-once. After a crash the one audio piece
+in flight per phrase may be sent again (and its translation text, if
+the crash came before the first progress record). Exactly-once delivery
+would need acknowledgements from the client.
+
+The journal and progress log are appended through file descriptors
+kept open per session (one write() per chunk or piece, no open, close
+or rename on the streaming path); both are emptied by the next snapshot and closed when the session
+ends.
+
+Snapshots hold the user's speech, so they do not outlive the session:
+they are deleted when the session ends or expires, and gc() removes
+files older than CHECKPOINT_MAX_AGE.
+"""
+
+import io
+import json
+import os
+import re
+import struct
+import threading
+import time
+
+import numpy as np
+
+from services.monitoring.metrics import REGISTRY
+from services.voice_identity.config import VOICE_STORAGE_DIR
+
+
+CHECKPOINTS_ENABLED = os.environ.get("DUBYOU_CHECKPOINTS", "1") != "0"
+CHECKPOINT_DIR = os.environ.get("DUBYOU_CHECKPOINT_DIR", "session_checkpoints")
+CHECKPOINT_INTERVAL = float(os.environ.get("DUBYOU_CHECKPOINT_INTERVAL", "2.0"))
+
+# Older snapshots are ignored (the user has long moved on)
+CHECKPOINT_MAX_AGE = float(os.environ.get("DUBYOU_CHECKPOINT_MAX_AGE", "600"))
+
+VERSION = 1
+
+# Journal record header: absolute start sample, sample count
+_RECORD = struct.Struct("<qI")
+
+CHECKPOINT_WRITES = REGISTRY.counter(
+    "dubyou_checkpoint_writes_total",
+    "Session snapshots written",
+    labelnames=("reason",)
+)
+CHECKPOINT_RESTORES = REGISTRY.counter(
+    "dubyou_checkpoint_restores_total", "Sessions restored from a snapshot"
+)
+CHECKPOINT_SECONDS = REGISTRY.histogram(
+    "dubyou_checkpoint_seconds",
+    "Time to write or restore a session snapshot",
+    labelnames=("op",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+
+
+def snapshot(session):
+    """
+    Returns (int16 audio, meta dict) for a SessionState
+    """
+    audio = np.clip(session.buffer.buffer, -1.0, 1.0)
+    audio = (audio * 32767).astype(np.int16)
+
+    committer = session.committer
+    meta = {
+        "version": VERSION,
+        "user_id": session.user_id,
+        "saved_at": time.time(),
+        "sample_rate": session.buffer.sample_rate,
+        "start_sample": session.buffer.start_sample,
+        "committer": {
+            "committed_until": committer.committed_until,
+            "prev_words": [list(word) for word in committer.prev_words],
+            "pending": committer.pending,
+        },
+        "silent_samples": session.vad.silent_samples,
+        "target_langs": session.target_langs,
+        "last_live_asr": session.last_live_asr,
+        "last_translation": session.last_translation,
+        "last_translations": session.last_translations,
+        "phrase_seq": session.phrase_seq,
+        "outbox": session.outbox,
+        "voice_reference": os.path.join(
+            VOICE_STORAGE_DIR, f"{session.user_id}_reference.wav"
+        ),
+    }
+    return audio, meta
+
+
+def apply(session, audio, meta):
+    """
+    Load a snapshot into a fresh SessionState
+    """
+    session.buffer.buffer = audio.astype(np.float32) / 32767
+    session.buffer.start_sample = meta["start_sample"]
+
+    committer = session.committer
+    committer.committed_until = meta["committer"]["committed_until"]
+    committer.prev_words = [tuple(word) for word in meta["committer"]["prev_words"]]
+    committer.pending = meta["committer"]["pending"]
+
+    session.vad.silent_samples = meta["silent_samples"]
+    session.set_target_langs(meta["target_langs"])
+    session.last_live_asr = meta["last_live_asr"]
+    session.last_translation = meta["last_translation"]
+    session.last_translations = meta["last_translations"]
+    session.phrase_seq = meta["phrase_seq"]
+    session.outbox = meta["outbox"]
+
+
+class CheckpointStore:
+    def __init__(self, directory=CHECKPOINT_DIR, interval=CHECKPOINT_INTERVAL,
+                 max_age=CHECKPOINT_MAX_AGE):
+        self.directory = directory
+        self.interval = interval
+        self.max_age = max_age
+        # path -> O_APPEND descriptor of a live session's journal / log
+        self._files = {}
+        self._files_lock = threading.Lock()
+
+    def path(self, user_id, suffix=".npz"):
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", user_id)
+        return os.path.join(self.directory, safe + suffix)
+
+    def _append(self, path, data):
+        with self._files_lock:
+            fd = self._files.get(path)
+            if fd is None:
+                os.makedirs(self.directory, exist_ok=True)
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+                self._files[path] = fd
+        os.write(fd, data)
+
+    def _truncate(self, path):
+        """Empty a journal / log, keeping a live session's descriptor"""
+        with self._files_lock:
+            fd = self._files.get(path)
+            if fd is not None:
+                os.ftruncate(fd, 0)
+                return
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _reset(self, path):
+        """Close a journal / log and remove it"""
+        with self._files_lock:
+            fd = self._files.pop(path, None)
+        if fd is not None:
+            os.close(fd)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def close(self, user_id):
+        """Close a session's journal and log, leaving them on disk"""
+        with self._files_lock:
+            fds = [
+                self._files.pop(self.path(user_id, suffix), None)
+                for suffix in (".pcm", ".out")
+            ]
+        for fd in fds:
+            if fd is not None:
+                os.close(fd)
+
+    def append(self, session, chunk, start_sample):
+        """
+        Journal one chunk (already added to the buffer at start_sample)
+        """
+        pcm = (np.clip(chunk, -1.0, 1.0) * 32767).astype(np.int16)
+        self._append(
+            self.path(session.user_id, ".pcm"),
+            _RECORD.pack(start_sample, len(pcm)) + pcm.tobytes()
+        )
+
+    def _journal(self, user_id):
+        try:
+            with open(self.path(user_id, ".pcm"), "rb") as f:
+                data = f.read()
+        except OSError:
+            return
+
+        pos = 0
+        while pos + _RECORD.size <= len(data):
+            start, n = _RECORD.unpack_from(data, pos)
+            pos += _RECORD.size
+            if pos + 2 * n > len(data):
+                break  # torn final write
+            yield start, np.frombuffer(data, dtype=np.int16, count=n, offset=pos)
+            pos += 2 * n
+
+    def _write(self, path, data):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def save_progress(self, session):
+        """Append the outbox's emission progress to the .out log"""
+        outbox = session.outbox
+        record = {key: outbox.get(key) for key in ("seq", "texted", "emitted", "done")}
+        self._append(
+            self.path(session.user_id, ".out"),
+            (json.dumps(record) + "\n").encode("utf-8")
+        )
+
+    def _progress(self, user_id):
+        """Last complete progress record, or None"""
+        try:
+            with open(self.path(user_id, ".out"), "rb") as f:
+                lines = f.read().split(b"\n")[:-1]  # drop a torn last line
+        except OSError:
+            return None
+        for line in reversed(lines):
+            try:
+                return json.loads(line)
+            except ValueError:
+                continue
+        return None
+
+    def save(self, session, reason="interval"):
+        start = time.perf_counter()
+        audio, meta = snapshot(session)
+
+        data = io.BytesIO()
+        np.savez(
+            data,
+            audio=audio,
+            meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8)
+        )
+
+        self._write(self.path(session.user_id), data.getbuffer())
+
+        # Everything journaled so far (and the outbox) is in the snapshot now
+        self._truncate(self.path(session.user_id, ".pcm"))
+        self._truncate(self.path(session.user_id, ".out"))
+
+        session.checkpointed_at = time.monotonic()
+        CHECKPOINT_WRITES.inc(reason=reason)
+        CHECKPOINT_SECONDS.observe(time.perf_counter() - start, op="save")
+
+    def maybe_save(self, session):
+        if time.monotonic() - session.checkpointed_at >= self.interval:
+            self.save(session)
+
+    def load(self, user_id):
+        """
+        (audio, meta) or None when there is no usable snapshot
+        """
+        path = self.path(user_id)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                audio = data["audio"]
+                meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+        except (OSError, ValueError, KeyError):
+            return None
+
+        if (
+            meta.get("version") != VERSION
+            or meta.get("user_id") != user_id
+            or time.time() - meta["saved_at"] > self.max_age
+        ):
+            self.delete(user_id)
+            return None
+        return audio, meta
+
+    def restore(self, session):
+        """
+        Returns True if the session was restored from a snapshot
+        """
+        start = time.perf_counter()
+        loaded = self.load(session.user_id)
+        if loaded is None:
+            return False
+
+        audio, meta = loaded
+        apply(session, audio, meta)
+
+        # Emission progress made after the snapshot
+        progress = self._progress(session.user_id)
+        if (
+            session.outbox is not None
+            and progress is not None
+            and progress.get("seq") == session.outbox["seq"]
+        ):
+            session.outbox.update(progress)
+
+        # Chunks that arrived after the snapshot
+        sr = session.buffer.sample_rate
+        replayed = False
+        for record_start, pcm in self._journal(session.user_id):
+            skip = session.buffer.end_sample - record_start
+            if skip >= len(pcm):
+                continue
+            chunk = pcm[max(skip, 0):].astype(np.float32) / 32767
+            session.buffer.add(chunk, sr)
+            session.vad.is_speech(chunk)
+            replayed = True
+
+        # The committer's hypothesis for that audio was not saved: keep
+        # the audio from being flushed until it has been decoded again
+        if replayed:
+            committer = session.committer
+            committer.pending = session.buffer.end_sample > committer.committed_until
+        session.checkpointed_at = time.monotonic()
+
+        # Warm the voice (XTTS latents / x-vector) off the request path
+        prepare = getattr(session.tts, "prepare_voice", None)
+        if prepare is not None:
+            threading.Thread(
+                target=prepare, args=(session.user_id,), daemon=True
+            ).start()
+
+        CHECKPOINT_RESTORES.inc()
+        CHECKPOINT_SECONDS.observe(time.perf_counter() - start, op="restore")
+        print(
+            f"[checkpoint] restored {session.user_id} at phrase {session.phrase_seq}"
+            + (" (resuming interrupted phrase)" if session.outbox else "")
+        )
+        return True
+
+    def exists(self, user_id):
+        """A snapshot recent enough to restore (see load)"""
+        try:
+            age = time.time() - os.path.getmtime(self.path(user_id))
+        except OSError:
+            return False
+        return age <= self.max_age
+
+    def delete(self, user_id):
+        for suffix in (".npz", ".pcm", ".out"):
+            self._reset(self.path(user_id, suffix))
+
+    def gc(self):
+        """
+        Remove snapshot, journal, progress and stray tmp files older than
+        max_age (sessions that never came back). Returns files removed.
+        """
+        cutoff = time.time() - self.max_age
+        removed = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+
+        for name in names:
+            if not name.endswith((".npz", ".pcm", ".out", ".tmp")):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+STORE = CheckpointStore() if CHECKPOINTS_ENABLED else None
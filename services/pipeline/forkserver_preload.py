@@ -0,0 +1,14 @@
+# ============================================================
+# forkserver_preload.py — Models for the worker fork server
+# ============================================================
+"""
+Imported by the multiprocessing fork server when WorkerPool runs with
+fork_after_load. The fork server is a fresh, single-threaded process:
+the pipeline models are loaded here once, and every worker (including
+crash restarts) is forked from it and shares them copy-on-write,
+instead of being forked from the multithreaded front process.
+"""
+
+from services.pipeline.sharding import _load_before_fork
+
+_load_before_fork()
@@ -0,0 +1,302 @@
+# ============================================================
+# overload.py — Load-adaptive quality tiers and load shedding
+# ============================================================
+"""
+The controller watches how far behind real time the pipeline runs
+(wall seconds spent per second of audio ingested) and how many calls
+are queued on each model stage. Under sustained overload every
+adaptive session steps down one tier at a time; once even the lowest
+tier cannot keep up, new sessions are refused until load drops.
+Tiers step back up after a longer calm period (hysteresis).
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from services.monitoring.metrics import REGISTRY, register_route
+from services.pipeline.startup import FAILED, LOADER
+from services.tts.piper_tts import PIPER_LANG
+
+
+SHED_MESSAGE = "🚦 Server is at capacity, please try again in a minute."
+
+STAGES = ("asr", "emotion", "translate", "tts")
+
+
+class QualityTier:
+    """
+    Which loader models a session uses at one quality level.
+    emotion=None skips emotion detection (phrases are "neutral").
+    tts speaks the languages in tts_langs (None = all); the others are
+    spoken by tts_fallback, so stepping down never drops speech for a
+    language in use (tts_fallback=None: translation text only).
+    """
+
+    def __init__(self, name, asr, tts, emotion="emotion", num_beams=1, max_length=128,
+                 tts_langs=None, tts_fallback="tts"):
+        self.name = name
+        self.asr = asr
+        self.tts = tts
+        self.tts_langs = tts_langs
+        self.tts_fallback = tts_fallback if tts_langs is not None else None
+        self.emotion = emotion
+        self.num_beams = num_beams
+        self.max_length = max_length
+
+    def tts_model(self, lang):
+        """Loader model speaking `lang` on this tier, or None"""
+        if self.tts_langs is None or lang in self.tts_langs:
+            return self.tts
+        return self.tts_fallback
+
+    def models(self):
+        return [
+            m for m in (self.asr, "translator", self.emotion, self.tts, self.tts_fallback)
+            if m
+        ]
+
+    def translate_options(self):
+        return {"num_beams": self.num_beams, "max_length": self.max_length}
+
+
+# Best first
+TIERS = (
+    QualityTier("full", asr="asr", tts="tts", num_beams=2),
+    QualityTier("reduced", asr="asr_small", tts="tts"),
+    # SpeechT5 is English-only and Piper has one fixed voice and
+    # language; other languages stay on XTTS
+    QualityTier(
+        "low", asr="asr_small", tts="tts_speecht5", emotion=None,
+        tts_langs=("eng_Latn",)
+    ),
+    QualityTier(
+        "minimal", asr="asr_tiny", tts="tts_piper", emotion=None, max_length=64,
+        tts_langs=(PIPER_LANG,)
+    ),
+)
+
+QUALITY_TIER = REGISTRY.gauge(
+    "dubyou_quality_tier", "Current quality tier (0 = full quality)"
+)
+TIER_CHANGES = REGISTRY.counter(
+    "dubyou_quality_tier_changes_total",
+    "Quality tier changes by direction",
+    labelnames=("direction",)
+)
+SESSIONS_SHED = REGISTRY.counter(
+    "dubyou_sessions_shed_total", "New sessions refused while overloaded"
+)
+STAGE_QUEUE_DEPTH = REGISTRY.gauge(
+    "dubyou_stage_queue_depth",
+    "Calls in flight or waiting per pipeline stage",
+    labelnames=("stage",)
+)
+
+
+class SessionRejected(RuntimeError):
+    pass
+
+
+class OverloadController:
+    """
+    rtf > high_rtf or a stage queue deeper than max_queue for
+    `down_after` seconds → one tier down (or start shedding at the
+    last tier). rtf < low_rtf with shallow queues for `up_after`
+    seconds → one tier up. Shedding stops after `down_after` seconds
+    without overload.
+    """
+
+    def __init__(
+        self,
+        tiers=TIERS,
+        high_rtf=0.9,
+        low_rtf=0.5,
+        max_queue=3,
+        down_after=2.0,
+        up_after=15.0,
+        smoothing=0.1,
+        loader=LOADER
+    ):
+        self.tiers = tiers
+        self.high_rtf = high_rtf
+        self.low_rtf = low_rtf
+        self.max_queue = max_queue
+        self.down_after = down_after
+        self.up_after = up_after
+        self.smoothing = smoothing
+        self.loader = loader
+
+        self.level = 0
+        self.shedding = False
+        self.queue_depth = {stage: 0 for stage in STAGES}
+        self.events = deque(maxlen=200)
+        self.listeners = []
+
+        # Decayed sums; their ratio is the recent real-time factor
+        self._wall = 0.0
+        self._audio = 0.0
+        self._over_since = None
+        self._calm_since = None
+        self._lock = threading.Lock()
+
+    @property
+    def tier(self):
+        return self.tiers[self.level]
+
+    @property
+    def rtf(self):
+        return self._wall / self._audio if self._audio else 0.0
+
+    def subscribe(self, fn):
+        """fn(event_dict) is called on every tier change / shed toggle"""
+        self.listeners.append(fn)
+
+    def backends(self, level=None):
+        tier = self.tier if level is None else self.tiers[level]
+        return {
+            "asr": self.loader.get(tier.asr),
+            "emotion": self.loader.get(tier.emotion) if tier.emotion else None,
+            "translator": self.loader.get("translator"),
+            "tts": self.loader.get(tier.tts),
+            "tts_fallback": self.loader.get(tier.tts_fallback) if tier.tts_fallback else None,
+        }
+
+    @contextmanager
+    def stage(self, name):
+        with self._lock:
+            self.queue_depth[name] += 1
+            STAGE_QUEUE_DEPTH.set(self.queue_depth[name], stage=name)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.queue_depth[name] -= 1
+                STAGE_QUEUE_DEPTH.set(self.queue_depth[name], stage=name)
+
+    def admit(self, known=False):
+        """Existing sessions are always served; new ones only when not shedding"""
+        if known or not self.shedding:
+            return True
+        SESSIONS_SHED.inc()
+        return False
+
+    def observe(self, wall_seconds, audio_seconds):
+        with self._lock:
+            keep = 1.0 - self.smoothing
+            self._wall = self._wall * keep + wall_seconds
+            self._audio = self._audio * keep + audio_seconds
+            self._evaluate(time.monotonic())
+
+    def _evaluate(self, now):
+        rtf = self.rtf
+        depth = max(self.queue_depth.values())
+        overloaded = rtf > self.high_rtf or depth > self.max_queue
+
+        if overloaded:
+            self._calm_since = None
+            can_step = self._can_step_down()
+            if self._over_since is None:
+                self._over_since = now
+                # Get the next tier's models warm before we need them
+                if can_step:
+                    for name in self.tiers[self.level + 1].models():
+                        self.loader.prefetch(name)
+            elif now - self._over_since >= self.down_after:
+                self._over_since = now
+                if can_step:
+                    self._step_down(rtf, depth)
+                elif not self.shedding:
+                    self.shedding = True
+                    self._emit("shed_start", rtf, depth)
+            return
+
+        self._over_since = None
+        if self._calm_since is None:
+            self._calm_since = now
+            return
+        calm_for = now - self._calm_since
+
+        if self.shedding and calm_for >= self.down_after:
+            self.shedding = False
+            self._emit("shed_stop", rtf, depth)
+
+        relaxed = rtf < self.low_rtf and depth <= 1
+        if relaxed and self.level > 0 and calm_for >= self.up_after:
+            self._calm_since = now
+            self._set_level(self.level - 1, "up", rtf, depth)
+
+    def _can_step_down(self):
+        """False at the last tier or when a lower tier's model failed to load"""
+        if self.level + 1 >= len(self.tiers):
+            return False
+        return all(
+            self.loader.states.get(name) != FAILED
+            for name in self.tiers[self.level + 1].models()
+        )
+
+    def _step_down(self, rtf, depth):
+        target = self.tiers[self.level + 1]
+        if not self.loader.is_ready(target.models()):
+            # Keep serving at this tier while the smaller models load
+            for name in target.models():
+                self.loader.prefetch(name)
+            return
+        self._set_level(self.level + 1, "down", rtf, depth)
+
+    def _set_level(self, level, direction, rtf, depth):
+        self.level = level
+        QUALITY_TIER.set(level)
+        TIER_CHANGES.inc(direction=direction)
+        self._emit(f"tier_{direction}", rtf, depth)
+
+    def _emit(self, kind, rtf, depth):
+        event = {
+            "time": time.time(),
+            "event": kind,
+            "tier": self.tier.name,
+            "level": self.level,
+            "rtf": round(rtf, 3),
+            "max_queue_depth": depth,
+            "shedding": self.shedding,
+        }
+        self.events.append(event)
+        print(
+            f"[overload] {kind}: tier {self.tier.name} "
+            f"(rtf {rtf:.2f}, queue {depth})"
+        )
+        for fn in self.listeners:
+            try:
+                fn(event)
+            except Exception as e:
+                print(f"[overload] listener failed: {e}")
+
+    def status(self):
+        return {
+            "tier": self.tier.name,
+            "level": self.level,
+            "shedding": self.shedding,
+            "rtf": round(self.rtf, 3),
+            "queue_depth": dict(self.queue_depth),
+            "events": list(self.events),
+        }
+
+
+# One controller per process: all sessions here share the same models
+CONTROLLER = OverloadController()
+QUALITY_TIER.set(0)
+
+REGISTRY.gauge(
+    "dubyou_pipeline_rtf",
+    "Recent wall seconds spent per second of audio ingested",
+    fn=lambda: CONTROLLER.rtf
+)
+
+
+def _overload_route():
+    return 200, "application/json", json.dumps(CONTROLLER.status())
+
+
+register_route("/overload", _overload_route)
@@ -0,0 +1,297 @@
+# ============================================================
+# scheduler.py — Earliest-deadline-first dispatch of model calls
+# ============================================================
+"""
+Every model call from every session goes through one shared pool of
+executor threads. Each call gets a deadline from its stage budget and
+the wall time its audio arrived; the executor always runs the queued
+call with the earliest deadline, so a short ASR update is not stuck
+behind another user's long synthesis. Streaming TTS is scheduled one
+chunk at a time, which gives natural preemption points.
+
+Starvation: no call waits longer than `max_wait` once queued.
+Fairness: a tenant's deadlines are pushed back in proportion to the
+executor time it used recently, and a tenant holds at most
+`tenant_limit` executor threads at once.
+"""
+
+import heapq
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from services.monitoring.metrics import REGISTRY, register_route
+
+
+SCHED_ENABLED = os.environ.get("DUBYOU_SCHEDULER", "1") != "0"
+SCHED_WORKERS = int(os.environ.get("DUBYOU_SCHED_WORKERS", "2"))
+
+# Decayed usage below this no longer changes a deadline noticeably:
+# idle tenants at or under it are forgotten
+USAGE_FLOOR = 0.001
+
+# Seconds from audio arrival until the stage's result is due.
+# None = best effort (only the starvation limit applies).
+STAGE_BUDGETS = {
+    "asr": 0.25,
+    "emotion": 0.4,
+    "translate": 0.7,
+    "tts": 1.2,
+    "speculative": None,
+}
+
+SCHED_JOBS = REGISTRY.counter(
+    "dubyou_sched_jobs_total", "Model calls dispatched", labelnames=("stage",)
+)
+DEADLINE_MISSES = REGISTRY.counter(
+    "dubyou_sched_deadline_misses_total",
+    "Model calls that finished after their deadline",
+    labelnames=("stage",)
+)
+SCHED_WAIT = REGISTRY.histogram(
+    "dubyou_sched_wait_seconds",
+    "Time a model call spent queued before it ran",
+    labelnames=("stage",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+
+class _Job:
+    __slots__ = (
+        "key", "seq", "stage", "tenant", "fn", "args", "kwargs",
+        "deadline", "submitted", "future"
+    )
+
+    def __lt__(self, other):
+        return (self.key, self.seq) < (other.key, other.seq)
+
+
+class DeadlineScheduler:
+    def __init__(
+        self,
+        workers=SCHED_WORKERS,
+        max_wait=5.0,
+        fairness=0.5,
+        usage_half_life=10.0,
+        tenant_limit=1,
+        enabled=None
+    ):
+        self.workers = workers
+        self.max_wait = max_wait
+        self.fairness = fairness
+        self.usage_decay = math.log(2) / usage_half_life
+        self.usage_half_life = usage_half_life
+        self.tenant_limit = tenant_limit
+        self.enabled = SCHED_ENABLED if enabled is None else enabled
+
+        self._queues = {}     # tenant -> heap of _Job
+        self._running = {}    # tenant -> calls on the executor
+        self._usage = {}      # tenant -> (decayed busy seconds, stamp)
+        self._next_prune = 0.0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._local = threading.local()
+
+        # Executor threads do not survive fork (WorkerPool fork_after_load)
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        self._queues = {}
+        self._running = {}
+        self._cond = threading.Condition()
+        self._threads = []
+
+    # --------------------------------------------------------
+    # Submitting work
+    # --------------------------------------------------------
+    def deadline_for(self, stage, arrival=None):
+        budget = STAGE_BUDGETS.get(stage)
+        if budget is None:
+            return math.inf
+        return (time.monotonic() if arrival is None else arrival) + budget
+
+    def submit(self, stage, tenant, fn, *args, deadline=None, arrival=None, **kwargs):
+        """
+        Queue fn(*args, **kwargs); returns a concurrent.futures.Future.
+        `arrival` is the time.monotonic() at which the audio behind this
+        call arrived; `deadline` overrides the stage budget.
+        """
+        future = Future()
+        if not self.enabled or getattr(self._local, "worker", False):
+            # Disabled, or called from inside a scheduled call: run inline
+            SCHED_JOBS.inc(stage=stage)
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            return future
+
+        now = time.monotonic()
+        job = _Job()
+        job.stage = stage
+        job.tenant = tenant
+        job.fn = fn
+        job.args = args
+        job.kwargs = kwargs
+        job.deadline = self.deadline_for(stage, arrival) if deadline is None else deadline
+        job.submitted = now
+        job.future = future
+        job.seq = next(self._seq)
+
+        with self._cond:
+            self._ensure_started()
+            penalty = self.fairness * self._tenant_usage(tenant, now)
+            job.key = min(job.deadline + penalty, now + self.max_wait)
+            heapq.heappush(self._queues.setdefault(tenant, []), job)
+            self._cond.notify()
+        return future
+
+    def run(self, stage, tenant, fn, *args, **kwargs):
+        """submit() and wait for the result"""
+        return self.submit(stage, tenant, fn, *args, **kwargs).result()
+
+    def iterate(self, stage, tenant, iterable, deadline=None, seconds_of=None):
+        """
+        Pull items from a (slow) iterator one scheduled call at a time.
+        The first item is due at `deadline`; with seconds_of(item), each
+        later item is due when the audio already produced finishes
+        playing.
+        """
+        iterator = iter(iterable)
+        done = object()
+        first_at = None
+        produced = 0.0
+
+        while True:
+            due = deadline if first_at is None else first_at + produced
+            item = self.run(stage, tenant, next, iterator, done, deadline=due)
+            if item is done:
+                return
+            if first_at is None:
+                first_at = time.monotonic()
+            if seconds_of is not None:
+                produced += seconds_of(item)
+            yield item
+
+    # --------------------------------------------------------
+    # Executor
+    # --------------------------------------------------------
+    def _ensure_started(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"sched-{len(self._threads)}",
+                daemon=True
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def _tenant_usage(self, tenant, now):
+        used, stamp = self._usage.get(tenant, (0.0, now))
+        return used * math.exp(-self.usage_decay * (now - stamp))
+
+    def _prune_usage(self, now):
+        """
+        Forget tenants with nothing in flight whose usage has decayed
+        away, so _usage does not grow with every user ID ever seen.
+        Runs at most once per half-life (called with the lock held).
+        """
+        self._next_prune = now + self.usage_half_life
+        idle = [
+            tenant for tenant in self._usage
+            if tenant not in self._running
+            and tenant not in self._queues
+            and self._tenant_usage(tenant, now) < USAGE_FLOOR
+        ]
+        for tenant in idle:
+            del self._usage[tenant]
+
+    def _pick(self):
+        """Earliest key among tenants below their concurrency limit"""
+        best = None
+        for tenant, queue in self._queues.items():
+            if self._running.get(tenant, 0) >= self.tenant_limit:
+                continue
+            if best is None or queue[0] < best[0]:
+                best = queue
+        if best is None:
+            return None
+
+        job = heapq.heappop(best)
+        if not best:
+            del self._queues[job.tenant]
+        return job
+
+    def _worker(self):
+        self._local.worker = True
+        while True:
+            with self._cond:
+                job = self._pick()
+                while job is None:
+                    self._cond.wait()
+                    job = self._pick()
+                self._running[job.tenant] = self._running.get(job.tenant, 0) + 1
+
+            start = time.monotonic()
+            SCHED_WAIT.observe(start - job.submitted, stage=job.stage)
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    job.future.set_result(job.fn(*job.args, **job.kwargs))
+                except BaseException as e:
+                    job.future.set_exception(e)
+            end = time.monotonic()
+
+            SCHED_JOBS.inc(stage=job.stage)
+            if end > job.deadline:
+                DEADLINE_MISSES.inc(stage=job.stage)
+
+            with self._cond:
+                self._usage[job.tenant] = (
+                    self._tenant_usage(job.tenant, end) + (end - start), end
+                )
+                self._running[job.tenant] -= 1
+                if not self._running[job.tenant]:
+                    del self._running[job.tenant]
+                    if end >= self._next_prune:
+                        self._prune_usage(end)
+                self._cond.notify()
+
+    # --------------------------------------------------------
+    # Reporting
+    # --------------------------------------------------------
+    def queued(self):
+        with self._cond:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def stats(self):
+        result = {}
+        for stage in STAGE_BUDGETS:
+            jobs = SCHED_JOBS.value(stage=stage)
+            misses = DEADLINE_MISSES.value(stage=stage)
+            result[stage] = {
+                "jobs": int(jobs),
+                "deadline_misses": int(misses),
+                "miss_rate": round(misses / jobs, 4) if jobs else 0.0,
+            }
+        return result
+
+
+SCHEDULER = DeadlineScheduler()
+
+REGISTRY.gauge(
+    "dubyou_sched_queued",
+    "Model calls waiting for an executor thread",
+    fn=SCHEDULER.queued
+)
+
+
+def _scheduler_route():
+    return 200, "application/json", json.dumps(SCHEDULER.stats())
+
+
+register_route("/scheduler", _scheduler_route)
@@ -1,39 +1,477 @@
+# ============================================================
+# session.py — Per-user streaming session + pipeline step
+# ============================================================
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from services.asr.audio_buffer import AudioBuffer
+from services.asr.vad_gate import VadGate
+from services.asr.commit_policy import CommitPolicy
+from services.monitoring.tracing import NULL_TRACE, Tracer
+from services.monitoring.metrics import (
+    REGISTRY,
+    AUDIO_SECONDS_INGESTED,
+    CHUNKS_INGESTED,
+    ERRORS,
+    PHRASES_COMMITTED,
+)
+from services.pipeline.checkpoint import STORE
+from services.pipeline.overload import CONTROLLER, SHED_MESSAGE, SessionRejected
+from services.pipeline.scheduler import SCHEDULER
+from services.pipeline.startup import LOADER, PIPELINE_MODELS
+from services.tts.audio_postprocess import StreamingNormalizer
+from services.translation.languages import (
+    DEFAULT_TARGET_LANGS,
+    SOURCE_LANG,
+    label,
+    tts_code,
+)
+
+
+def default_backends():
+    """
+    Real model backends (Whisper, emotion classifier, M2M100, XTTS),
+    shared by all sessions and loaded once by the startup loader
+    """
+    return {name: LOADER.get(name) for name in PIPELINE_MODELS}
+
+
+COMMIT_DELAY = REGISTRY.histogram(
+    "dubyou_commit_delay_seconds",
+    "Audio heard after a phrase's last word before it was committed",
+    buckets=(0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0),
+)
+
+
+# Called for every new session; swap it to run the pipeline on other backends
+BACKEND_FACTORY = default_backends
+
+# Sessions without audio for this long end (and their snapshots go)
+SESSION_IDLE_SECONDS = float(os.environ.get("DUBYOU_SESSION_IDLE", "600"))
+EXPIRE_INTERVAL = 30.0
+
+
 class SessionState:
-    def __init__(self, user_id):
+    """Container for user session state."""
+
+    def __init__(self, user_id, backends=None):
+        # Only sessions on the shared loader models follow quality tiers
+        self.adaptive = backends is None and BACKEND_FACTORY is default_backends
+        self.tier_level = None
+        self.translate_options = {}
+        # Languages the current TTS can speak (None = all); the others
+        # go to tts_fallback, or are text only without one
+        self.tier_tts_langs = None
+        self.tts_fallback = None
+        if backends is None:
+            backends = BACKEND_FACTORY()
+
+        self.user_id = user_id
+        # A session is not thread-safe: one chunk at a time, whichever
+        # connection (stream server, Gradio, worker pipe) it came from
+        self.lock = threading.Lock()
         self.buffer = AudioBuffer(max_seconds=5)
         self.vad = VadGate()
-        self.asr = StreamingASR()
-        self.committer = PhraseCommitter(min_words=4)
+        self.committer = CommitPolicy()
+        self.tracer = Tracer(user_id)
 
-        self.emotion = EmotionDetector()
-        self.translator = EmotionAwareTranslator()
-        self.tts = StreamingXTTS(user_id)
+        self.asr = backends["asr"]
+        self.emotion = backends["emotion"]
+        self.translator = backends["translator"]
+        self.tts = backends["tts"]
 
-    def process_audio(self, chunk):
-        speaking = self.vad.is_speech(chunk)
-        self.buffer.add(chunk, 16000)
+        # Listeners may want several languages; ASR and commit run once
+        self.target_langs = list(DEFAULT_TARGET_LANGS)
 
-        if not speaking:
-            return None
+        # Streaming state
+        self.last_live_asr = ""
+        self.last_translation = ""
+        self.last_translations = {}
 
-        text = self.asr.transcribe(
-            self.buffer.get_recent(3)
-        )
+        # One loudness normalizer per output language, kept across
+        # phrases so the level does not restart at unity gain each time
+        self.normalizers = {}
 
-        phrase = self.committer.process(text)
-        if not phrase:
-            return None
+        # Committed phrases so far; the outbox holds the latest one
+        # until it has been fully emitted (see checkpoint.py)
+        self.phrase_seq = 0
+        self.outbox = None
 
-        emotion = self.emotion.detect(phrase)
+        # Set by get_session; sessions built directly are not persisted
+        self.checkpoints = None
+        self.checkpointed_at = 0.0
+        self.last_active = time.monotonic()
 
-        hindi_text = self.translator.translate(
-            phrase,
-            src_lang="eng_Latn",
-            tgt_lang="hin_Deva",
-            emotion=emotion
-        )
+    def use_tier(self, level, tier, backends):
+        """Swap to another quality tier's models between chunks"""
+        self.tier_level = level
+        self.asr = backends["asr"]
+        self.emotion = backends["emotion"]
+        self.translator = backends["translator"]
+        self.tts = backends["tts"]
+        self.tts_fallback = backends.get("tts_fallback")
+        self.translate_options = tier.translate_options()
+        self.tier_tts_langs = tier.tts_langs
 
-        return self.tts.stream(
-            hindi_text,
-            emotion=emotion
+    def tts_for(self, lang):
+        """TTS engine speaking `lang` on the current tier, or None"""
+        if self.tier_tts_langs is None or lang in self.tier_tts_langs:
+            return self.tts
+        return self.tts_fallback
+
+    def normalizer(self, lang, sample_rate):
+        normalizer = self.normalizers.get(lang)
+        if normalizer is None or normalizer.sample_rate != sample_rate:
+            # New language, or a tier switch changed the TTS sample rate
+            normalizer = StreamingNormalizer(sample_rate=sample_rate)
+            self.normalizers[lang] = normalizer
+        return normalizer
+
+    def set_target_langs(self, langs):
+        if langs:
+            self.target_langs = list(dict.fromkeys(langs))
+
+    def _format_translations(self):
+        if len(self.target_langs) == 1:
+            return self.last_translations.get(self.target_langs[0], "")
+        return "\n".join(
+            f"{label(lang)}: {self.last_translations[lang]}"
+            for lang in self.target_langs
+            if lang in self.last_translations
         )
+
+
+# SESSION STORE (per user)
+SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+_next_expiry = 0.0
+
+REGISTRY.gauge(
+    "dubyou_active_sessions",
+    "Sessions currently held in SESSIONS",
+    fn=lambda: len(SESSIONS)
+)
+
+
+def get_session(user_id):
+    """
+    Get or create a session for the given user ID, resuming from its
+    checkpoint when there is one (reconnect, worker restart/migration).
+    Raises SessionRejected for new users while the box is shedding load.
+    """
+    global _next_expiry
+    now = time.monotonic()
+    if now >= _next_expiry:
+        _next_expiry = now + EXPIRE_INTERVAL
+        expire_sessions()
+
+    session = SESSIONS.get(user_id)
+    if session is not None:
+        return session
+
+    # Two first chunks at once must not build (and restore) two sessions
+    with _SESSIONS_LOCK:
+        if user_id not in SESSIONS:
+            known = STORE is not None and STORE.exists(user_id)
+            if not CONTROLLER.admit(known=known):
+                raise SessionRejected(SHED_MESSAGE)
+
+            session = SessionState(user_id)
+            if STORE is not None:
+                session.checkpoints = STORE
+                STORE.restore(session)
+            SESSIONS[user_id] = session
+        return SESSIONS[user_id]
+
+
+def end_session(user_id):
+    """
+    Drop a session and delete its snapshot (the user's speech).
+    Returns True if there was a session.
+    """
+    with _SESSIONS_LOCK:
+        session = SESSIONS.pop(user_id, None)
+    if session is not None:
+        # Let a chunk in flight finish, and keep it from saving again
+        with session.lock:
+            session.checkpoints = None
+    if STORE is not None:
+        STORE.delete(user_id)
+    return session is not None
+
+
+def expire_sessions(idle_seconds=None):
+    """
+    End sessions idle for idle_seconds and remove snapshots left
+    behind by sessions that never came back. Returns sessions ended.
+    """
+    idle_seconds = SESSION_IDLE_SECONDS if idle_seconds is None else idle_seconds
+    cutoff = time.monotonic() - idle_seconds
+    idle = [uid for uid, s in list(SESSIONS.items()) if s.last_active < cutoff]
+    for user_id in idle:
+        end_session(user_id)
+    if STORE is not None:
+        STORE.gc()
+    return len(idle)
+
+
+def stream_chunk(session, chunk, sr, tts_langs=None, incremental=True):
+    """
+    Run one microphone chunk through VAD → ASR → commit → emotion →
+    translation → TTS, yielding results as soon as each is produced:
+
+        ("asr", live_text)
+        ("translation", (tgt_lang, translated_text))
+        ("audio", (tgt_lang, sample_rate, float32_chunk))
+
+    The phrase is translated into every session target language in one
+    batched decode, then spoken per language (only those in `tts_langs`,
+    when given; the rest are text only). Model calls are queued
+    on the shared deadline scheduler, due relative to when this chunk
+    arrived. Time spent per chunk is reported to the overload controller.
+    Chunks for one session run one at a time (session.lock).
+
+    incremental=True: each event reaches the client as it is yielded,
+    so emission progress is checkpointed per audio piece. Callers that
+    deliver a chunk's events all at once (process_chunk) pass False.
+    """
+    arrival = time.monotonic()
+    with session.lock:
+        session.last_active = arrival
+        level = CONTROLLER.level
+        if session.adaptive and session.tier_level != level:
+            session.use_tier(level, CONTROLLER.tiers[level], CONTROLLER.backends(level))
+
+        start = time.perf_counter()
+        try:
+            yield from _run_chunk(session, chunk, sr, arrival, tts_langs, incremental)
+            if session.checkpoints is not None:
+                session.checkpoints.maybe_save(session)
+        finally:
+            CONTROLLER.observe(time.perf_counter() - start, len(chunk) / sr)
+
+
+def _run_chunk(session, chunk, sr, arrival, tts_langs=None, incremental=True):
+    uid = session.user_id
+    received = time.perf_counter()
+    CHUNKS_INGESTED.inc()
+    AUDIO_SECONDS_INGESTED.inc(len(chunk) / sr)
+
+    # Resumed mid-emission: finish the interrupted phrase first
+    if session.outbox is not None:
+        try:
+            yield from _emit_phrase(session, NULL_TRACE, arrival, tts_langs, incremental)
+        except Exception as e:
+            ERRORS.inc(stage="pipeline")
+            print(f"Error re-emitting phrase {session.outbox['seq']}: {e}")
+            session.outbox = None
+
+    # 1️⃣ Always buffer audio
+    start_sample = session.buffer.end_sample
+    session.buffer.add(chunk, sr)
+    if session.checkpoints is not None:
+        session.checkpoints.append(session, chunk, start_sample)
+
+    # 2️⃣ Voice activity detection
+    speaking = session.vad.is_speech(chunk)
+    pause = session.vad.pause_seconds(sr)
+
+    # One more decode once a pause starts, so the tail commits now
+    # rather than waiting for more speech
+    final_pass = (
+        not speaking
+        and session.committer.has_pending()
+        and pause >= session.committer.pause_sec
+    )
+
+    if speaking or final_pass:
+        # One trace per phrase, opened by its first voiced chunk
+        trace = session.tracer.begin(at=received)
+        trace.mark("vad")
+        try:
+            # Sliding window ASR (last 3 seconds, uncommitted audio only)
+            window = session.buffer.get_recent(3)
+            window_start = session.buffer.end_sample - len(window)
+            with CONTROLLER.stage("asr"):
+                words = SCHEDULER.run(
+                    "asr", uid, session.asr.transcribe_words, window,
+                    arrival=arrival
+                )
+            trace.mark("asr")
+
+            live_text = " ".join(text for text, _, _ in words)
+            session.last_live_asr = live_text
+            yield "asr", live_text
+
+            # Commit at the earliest stable boundary
+            phrase, commit_sample = session.committer.update(
+                [
+                    (text, window_start + int(start * sr), window_start + int(end * sr))
+                    for text, start, end in words
+                ],
+                window_end=session.buffer.end_sample,
+                pause_seconds=pause
+            )
+
+            if phrase:
+                PHRASES_COMMITTED.inc()
+                COMMIT_DELAY.observe(
+                    (session.buffer.end_sample - commit_sample) / sr
+                )
+                session.buffer.trim_before(commit_sample)
+                session.tracer.commit(trace)
+                session.phrase_seq += 1
+
+                # Emotion detection (skipped on degraded tiers)
+                emotion = "neutral"
+                if session.emotion is not None:
+                    with CONTROLLER.stage("emotion"):
+                        emotion = SCHEDULER.run(
+                            "emotion", uid, session.emotion.detect, phrase,
+                            arrival=arrival
+                        )
+                trace.mark("emotion")
+
+                # Emotion-aware translation (EN → targets, one encode)
+                with CONTROLLER.stage("translate"):
+                    translations = SCHEDULER.run(
+                        "translate", uid, session.translator.translate_many,
+                        phrase,
+                        src_lang=SOURCE_LANG,
+                        tgt_langs=session.target_langs,
+                        emotion=emotion,
+                        arrival=arrival,
+                        **session.translate_options
+                    )
+                trace.mark("translate")
+
+                # Commit + translations reach the store before any output
+                session.outbox = {"seq": session.phrase_seq, "translations": translations}
+                if session.checkpoints is not None:
+                    session.checkpoints.save(session, reason="commit")
+
+                yield from _emit_phrase(session, trace, arrival, tts_langs, incremental)
+                return
+        except Exception as e:
+            ERRORS.inc(stage="pipeline")
+            print(f"Error in pipeline processing: {e}")
+            session.outbox = None
+            session.tracer.discard()
+            return
+
+    # 3️⃣ Handle silence → flush buffer
+    if session.vad.should_flush(sr) and not session.committer.has_pending():
+        session.buffer.reset()
+        session.committer.reset()
+        session.tracer.discard()
+
+
+def _emit_phrase(session, trace, arrival, tts_langs=None, incremental=True):
+    """
+    Yield the outbox phrase's translations and speech, then clear it.
+    Output already delivered before a restart (outbox "texted" flag,
+    "emitted" samples and "done" languages) is skipped; see
+    checkpoint.py for the delivery guarantee.
+    """
+    uid = session.user_id
+    outbox = session.outbox
+    translations = outbox["translations"]
+    emitted = outbox.setdefault("emitted", {})
+    done = outbox.setdefault("done", [])
+    record = incremental and session.checkpoints is not None
+
+    session.last_translations.update(translations)
+    session.last_translation = session._format_translations()
+    if not outbox.get("texted"):
+        for lang, text in translations.items():
+            yield "translation", (lang, text)
+        outbox["texted"] = True
+        if record:
+            session.checkpoints.save_progress(session)
+
+    # Streaming TTS (each language spoken in YOUR voice)
+    # Scheduled chunk by chunk; later chunks are due as the
+    # audio already produced finishes playing. Engines that batch
+    # phrases across sessions themselves (tts.batched) are not: a
+    # phrase waiting for its batch must not hold an executor thread.
+    first = True
+    with CONTROLLER.stage("tts"):
+        for lang, text in translations.items():
+            if tts_langs is not None and lang not in tts_langs:
+                continue
+            tts = session.tts_for(lang)
+            if tts is None:
+                continue  # text only on this tier
+            if lang in done:
+                continue
+            sr_out = tts.sample_rate
+            pieces = tts.stream(
+                text,
+                uid,
+                language=tts_code(lang),
+                normalizer=session.normalizer(lang, sr_out)
+            )
+            if not getattr(tts, "batched", False):
+                pieces = SCHEDULER.iterate(
+                    "tts",
+                    uid,
+                    pieces,
+                    deadline=SCHEDULER.deadline_for("tts", arrival),
+                    seconds_of=lambda p, sr_out=sr_out: len(p) / sr_out
+                )
+            sent = emitted.get(lang, 0)
+            position = 0
+            for piece in pieces:
+                start, position = position, position + len(piece)
+                if position <= sent:
+                    continue
+                piece = piece[max(sent - start, 0):]
+                if first:
+                    trace.mark("tts_first")
+                    first = False
+                yield "audio", (lang, sr_out, piece)
+
+                emitted[lang] = position
+                if record:
+                    session.checkpoints.save_progress(session)
+
+            done.append(lang)
+            if record:
+                session.checkpoints.save_progress(session)
+    trace.mark("tts_done")
+    session.tracer.finish(trace)
+
+    session.outbox = None
+    if session.checkpoints is not None:
+        session.checkpoints.save(session, reason="emitted")
+
+
+def process_chunk(session, chunk, sr):
+    """
+    stream_chunk collected into one UI update. Only the first target
+    language is synthesized (the UI has a single player).
+
+    Returns (live_asr_text, translated_text, audio_output)
+    """
+    sr_out = None
+    pieces = []
+    played = session.target_langs[0]
+    events = stream_chunk(session, chunk, sr, tts_langs=(played,), incremental=False)
+    for kind, value in events:
+        if kind == "audio":
+            _, sr_out, piece = value
+            pieces.append(piece)
+
+    audio_chunk = None
+    if pieces:
+        audio_chunk = (sr_out, np.concatenate(pieces))
+
+    return (
+        session.last_live_asr,
+        session.last_translation,
+        audio_chunk
+    )
@@ -0,0 +1,504 @@
+# ============================================================
+# sharding.py — Multi-process workers with sticky session routing
+# ============================================================
+
+import bisect
+import gc
+import hashlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from services.monitoring.memory import process_memory
+from services.monitoring.metrics import (
+    ERRORS,
+    METRICS_PORT,
+    REGISTRY,
+    register_route,
+    start_metrics_server,
+)
+from services.pipeline.session import SESSION_IDLE_SECONDS
+
+
+NUM_WORKERS = int(os.environ.get("DUBYOU_WORKERS", "0"))
+
+# Load models once in a fork server and fork workers from it, so weights
+# are shared copy-on-write (CPU-only hosts; CUDA cannot fork)
+FORK_AFTER_LOAD = os.environ.get("DUBYOU_FORK_AFTER_LOAD", "0") == "1"
+
+# Worker N serves its own /metrics, /overload and /scheduler on
+# WORKER_METRICS_PORT + N (0 = off); the front process serves /ready
+# for the whole pool
+WORKER_METRICS_PORT = int(
+    os.environ.get("DUBYOU_WORKER_METRICS_PORT", str(METRICS_PORT + 1))
+)
+
+# Largest chunk (in and out) that fits in a worker's shared-memory slot
+SLOT_SAMPLES = 48000 * 30
+
+WORKER_RESTARTS = REGISTRY.counter(
+    "dubyou_worker_restarts_total", "Worker processes restarted after a crash"
+)
+SESSION_MIGRATIONS = REGISTRY.counter(
+    "dubyou_session_migrations_total", "Sessions moved to another worker"
+)
+WORKER_MEMORY = REGISTRY.gauge(
+    "dubyou_worker_memory_bytes",
+    "Worker memory from smaps_rollup (shared = mapped by other processes too)",
+    labelnames=("worker", "kind")
+)
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent hashing with virtual nodes; adding or removing a worker
+    only moves the sessions that hashed to it
+    """
+
+    def __init__(self, vnodes=64):
+        self.vnodes = vnodes
+        self._keys = []
+        self._nodes = []
+
+    def add(self, node):
+        for i in range(self.vnodes):
+            key = _hash(f"{node}#{i}")
+            idx = bisect.bisect(self._keys, key)
+            self._keys.insert(idx, key)
+            self._nodes.insert(idx, node)
+
+    def remove(self, node):
+        keep = [(k, n) for k, n in zip(self._keys, self._nodes) if n != node]
+        self._keys = [k for k, _ in keep]
+        self._nodes = [n for _, n in keep]
+
+    def lookup(self, key):
+        if not self._keys:
+            raise LookupError("No workers in the ring")
+        idx = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._nodes[idx]
+
+    def __len__(self):
+        return len(set(self._nodes))
+
+
+# ------------------------------------------------------------
+# Worker process
+# ------------------------------------------------------------
+def _worker_main(conn, in_name, out_name, metrics_port=0, model_specs=None):
+    from services.pipeline import session as pipeline
+    from services.pipeline.overload import SessionRejected
+    from services.pipeline.session import (
+        SESSIONS,
+        end_session,
+        get_session,
+        process_chunk,
+    )
+    from services.pipeline.startup import LOADER, PIPELINE_MODELS, ModelLoader
+
+    loader = LOADER
+    if model_specs is not None:
+        # Injected models (tests, benchmarks) replace the default ones
+        loader = ModelLoader(model_specs)
+        pipeline.BACKEND_FACTORY = lambda: {
+            name: loader.get(name) for name in PIPELINE_MODELS
+        }
+
+    loader.start()
+    if metrics_port:
+        try:
+            start_metrics_server(metrics_port)
+        except OSError as e:
+            print(f"[sharding] metrics port {metrics_port} unavailable: {e}")
+
+    shm_in = shared_memory.SharedMemory(name=in_name)
+    shm_out = shared_memory.SharedMemory(name=out_name)
+    audio_in = np.ndarray((SLOT_SAMPLES,), dtype=np.float32, buffer=shm_in.buf)
+    audio_out = np.ndarray((SLOT_SAMPLES,), dtype=np.float32, buffer=shm_out.buf)
+
+    try:
+        while True:
+            msg = conn.recv()
+            op = msg["op"]
+
+            if op == "stop":
+                break
+
+            if op == "ready":
+                conn.send({
+                    "ready": loader.is_ready(PIPELINE_MODELS),
+                    "unavailable": loader.unavailable(PIPELINE_MODELS),
+                    "models": loader.report(),
+                })
+                continue
+
+            if op == "end":
+                conn.send({"ok": end_session(msg["user_id"])})
+                continue
+
+            if op == "drop":
+                # Snapshot first so the new owner resumes where we stopped
+                session = SESSIONS.pop(msg["user_id"], None)
+                if session is not None and session.checkpoints is not None:
+                    session.checkpoints.save(session, reason="migrate")
+                    session.checkpoints.close(session.user_id)
+                conn.send({"ok": True})
+                continue
+
+            # op == "chunk"
+            unavailable = loader.unavailable(PIPELINE_MODELS)
+            if unavailable:
+                conn.send({"live": unavailable, "translation": "", "n_out": 0})
+                continue
+
+            chunk = audio_in[:msg["n"]].copy()
+            try:
+                session = get_session(msg["user_id"])
+            except SessionRejected as e:
+                conn.send({"live": str(e), "translation": "", "n_out": 0})
+                continue
+
+            session.set_target_langs(msg.get("target_langs"))
+            live, translation, audio = process_chunk(session, chunk, msg["sr"])
+
+            reply = {
+                "live": live,
+                "translation": translation,
+                "translations": session.last_translations,
+                "n_out": 0,
+            }
+            if audio is not None:
+                sr_out, samples = audio
+                n_out = min(len(samples), SLOT_SAMPLES)
+                audio_out[:n_out] = samples[:n_out]
+                reply["sr_out"] = sr_out
+                reply["n_out"] = n_out
+            conn.send(reply)
+    finally:
+        del audio_in, audio_out
+        shm_in.close()
+        shm_out.close()
+
+
+def _load_before_fork():
+    from services.pipeline.startup import LOADER, PIPELINE_MODELS
+
+    LOADER.start().wait()
+    for name in PIPELINE_MODELS:
+        try:
+            LOADER.get(name)
+        except Exception as e:
+            # Workers inherit the FAILED state and report it on /ready
+            print(f"[sharding] {name} failed to load before fork: {e}")
+
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_initialized():
+        raise RuntimeError(
+            "fork_after_load needs CPU models: CUDA is already initialised"
+        )
+
+    # Move everything loaded so far out of the GC's reach, so collections
+    # in the workers don't write to (and un-share) those objects' pages
+    gc.collect()
+    gc.freeze()
+
+
+class _Worker:
+    def __init__(self, worker_id, ctx, metrics_port=0, model_specs=None):
+        self.worker_id = worker_id
+        self.metrics_port = metrics_port
+        self.model_specs = model_specs
+        nbytes = SLOT_SAMPLES * np.dtype(np.float32).itemsize
+        self.shm_in = shared_memory.SharedMemory(create=True, size=nbytes)
+        self.shm_out = shared_memory.SharedMemory(create=True, size=nbytes)
+        self.audio_in = np.ndarray((SLOT_SAMPLES,), dtype=np.float32, buffer=self.shm_in.buf)
+        self.audio_out = np.ndarray((SLOT_SAMPLES,), dtype=np.float32, buffer=self.shm_out.buf)
+
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.shm_in.name, self.shm_out.name, metrics_port, model_specs),
+            name=f"dubyou-worker-{worker_id}",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+        # One request in flight per worker; the slot is reused. Sessions
+        # on the same worker therefore take turns: a worker runs one
+        # chunk at a time, so add workers (not threads) for concurrency
+        self.lock = threading.Lock()
+
+    def request(self, msg, timeout=-1):
+        """
+        Send one op and wait for the reply; None if the worker stayed
+        busy with another request for `timeout` seconds
+        """
+        if not self.lock.acquire(timeout=timeout):
+            return None
+        try:
+            self.conn.send(msg)
+            return self.conn.recv()
+        finally:
+            self.lock.release()
+
+    def close(self, timeout=5.0):
+        if self.process.is_alive():
+            try:
+                with self.lock:
+                    self.conn.send({"op": "stop"})
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+        self.conn.close()
+        del self.audio_in, self.audio_out
+        for shm in (self.shm_in, self.shm_out):
+            shm.close()
+            shm.unlink()
+
+
+class WorkerPool:
+    """
+    Front-process router: each user ID sticks to one worker process
+    chosen by consistent hashing. Audio crosses the process boundary
+    through per-worker shared memory; only small headers are pickled.
+
+    Each worker serves one request at a time over its pipe, so the
+    sessions it owns are processed one chunk after another; throughput
+    scales with the number of workers.
+
+    `model_specs` (ModelSpec list) replaces the default models in the
+    workers, e.g. stubs in tests; not used with fork_after_load.
+    """
+
+    def __init__(self, num_workers=NUM_WORKERS or 2, start_method="spawn",
+                 monitor_interval=1.0, fork_after_load=FORK_AFTER_LOAD,
+                 idle_seconds=SESSION_IDLE_SECONDS, metrics_port=WORKER_METRICS_PORT,
+                 model_specs=None):
+        if fork_after_load:
+            # Never fork the front process itself: by the time a worker
+            # is restarted it runs the UI, servers and scheduler threads
+            start_method = "forkserver"
+
+        self.ctx = mp.get_context(start_method)
+        if fork_after_load:
+            self.ctx.set_forkserver_preload(["services.pipeline.forkserver_preload"])
+        self.ring = HashRing()
+        self.workers = {}
+        self.owners = {}
+        self.idle_seconds = idle_seconds
+        self._last_seen = {}
+        self._translations = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.metrics_port = metrics_port
+        self.model_specs = model_specs
+
+        for _ in range(num_workers):
+            self.add_worker()
+
+        REGISTRY.gauge(
+            "dubyou_workers", "Live worker processes",
+            fn=lambda: len(self.workers)
+        )
+        register_route("/memory", self._memory_route)
+        # Models load in the workers, not here
+        register_route("/ready", self._ready_route)
+
+        self._stopped = threading.Event()
+        self._monitor = threading.Thread(
+            target=self._monitor_loop,
+            args=(monitor_interval,),
+            name="worker-monitor",
+            daemon=True
+        )
+        self._monitor.start()
+
+    def add_worker(self):
+        index = next(self._ids)
+        worker_id = f"w{index}"
+        worker = _Worker(
+            worker_id, self.ctx, self._metrics_port(index), self.model_specs
+        )
+        with self._lock:
+            self.workers[worker_id] = worker
+            self.ring.add(worker_id)
+        return worker_id
+
+    def remove_worker(self, worker_id):
+        with self._lock:
+            self.ring.remove(worker_id)
+            worker = self.workers.pop(worker_id)
+        worker.close()
+
+    def _monitor_loop(self, interval):
+        while not self._stopped.wait(interval):
+            for worker_id, worker in list(self.workers.items()):
+                if not worker.process.is_alive():
+                    self._replace(worker_id, worker)
+            self._evict_idle()
+            self._update_memory()
+
+    def _metrics_port(self, index):
+        return self.metrics_port + index if self.metrics_port else 0
+
+    def readiness(self, timeout=1.0):
+        """
+        {worker_id: {"ready", "unavailable", "models", "metrics_port"}}.
+        A worker busy with a chunk for `timeout` is reported ready: it
+        only runs chunks once its models are loaded.
+        """
+        report = {}
+        for worker_id, worker in list(self.workers.items()):
+            try:
+                status = worker.request({"op": "ready"}, timeout=timeout)
+            except (EOFError, BrokenPipeError, OSError) as e:
+                status = {"ready": False, "unavailable": f"worker down: {e}"}
+            if status is None:
+                status = {"ready": True, "busy": True}
+            status["metrics_port"] = worker.metrics_port or None
+            report[worker_id] = status
+        return report
+
+    def _ready_route(self):
+        report = self.readiness()
+        ready = bool(report) and all(status["ready"] for status in report.values())
+        return 200 if ready else 503, "application/json", json.dumps(report)
+
+    def _evict_idle(self):
+        """Forget users that have not sent audio for idle_seconds"""
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            idle = [uid for uid, seen in self._last_seen.items() if seen < cutoff]
+            for user_id in idle:
+                del self._last_seen[user_id]
+                self.owners.pop(user_id, None)
+                self._translations.pop(user_id, None)
+
+    def memory_report(self):
+        """
+        {worker_id: {"rss", "pss", "shared", "private", ...}} in bytes,
+        plus the front process as "front"
+        """
+        report = {"front": process_memory(os.getpid())}
+        for worker_id, worker in list(self.workers.items()):
+            if worker.process.pid is not None:
+                report[worker_id] = process_memory(worker.process.pid)
+        return report
+
+    def _update_memory(self):
+        report = self.memory_report()
+        WORKER_MEMORY.clear()
+        for worker_id, usage in report.items():
+            for kind in ("rss", "pss", "shared", "private"):
+                if kind in usage:
+                    WORKER_MEMORY.set(usage[kind], worker=worker_id, kind=kind)
+
+    def _memory_route(self):
+        return 200, "application/json", json.dumps(self.memory_report())
+
+    def _replace(self, worker_id, worker):
+        """
+        Restart a crashed worker under the same ID: the ring does not
+        change, so no session moves, and the crashed worker's sessions
+        resume from their checkpoints in the new process
+        """
+        with self._lock:
+            if self.workers.get(worker_id) is not worker:
+                return  # already replaced or removed
+
+            print(f"[sharding] worker {worker_id} died (exit {worker.process.exitcode}), restarting")
+            WORKER_RESTARTS.inc()
+            worker.close()
+            self.workers[worker_id] = _Worker(
+                worker_id, self.ctx, worker.metrics_port, worker.model_specs
+            )
+
+    def end_session(self, user_id):
+        """The user is done: drop the session and its snapshot"""
+        with self._lock:
+            worker_id = self.owners.pop(user_id, None) or self.ring.lookup(user_id)
+            self._last_seen.pop(user_id, None)
+            self._translations.pop(user_id, None)
+            worker = self.workers.get(worker_id)
+        if worker is None:
+            return
+        try:
+            worker.request({"op": "end", "user_id": user_id})
+        except (EOFError, BrokenPipeError, OSError):
+            pass
+
+    def _route(self, user_id):
+        with self._lock:
+            worker_id = self.ring.lookup(user_id)
+            previous = self.owners.get(user_id)
+            self.owners[user_id] = worker_id
+            self._last_seen[user_id] = time.monotonic()
+            old = self.workers.get(previous) if previous != worker_id else None
+            return self.workers[worker_id], old
+
+    def last_translations(self, user_id):
+        return self._translations.get(user_id, {})
+
+    def submit(self, user_id, chunk, sr, target_langs=None):
+        """
+        Returns (live_asr_text, translated_text, audio_output), same as
+        process_chunk in a single process
+        """
+        worker, old = self._route(user_id)
+
+        if old is not None:
+            # The ring changed since this user's last chunk
+            SESSION_MIGRATIONS.inc()
+            try:
+                old.request({"op": "drop", "user_id": user_id})
+            except (EOFError, BrokenPipeError, OSError):
+                pass
+
+        chunk = np.asarray(chunk, dtype=np.float32)[:SLOT_SAMPLES]
+
+        try:
+            with worker.lock:
+                worker.audio_in[:len(chunk)] = chunk
+                worker.conn.send({
+                    "op": "chunk",
+                    "user_id": user_id,
+                    "sr": sr,
+                    "n": len(chunk),
+                    "target_langs": target_langs,
+                })
+                reply = worker.conn.recv()
+
+                audio = None
+                if reply["n_out"]:
+                    audio = (reply["sr_out"], worker.audio_out[:reply["n_out"]].copy())
+        except (EOFError, BrokenPipeError, OSError) as e:
+            ERRORS.inc(stage="worker")
+            print(f"Error talking to worker {worker.worker_id}: {e}")
+            self._replace(worker.worker_id, worker)
+            return "", "", None
+
+        if "translations" in reply:
+            self._translations[user_id] = reply["translations"]
+        return reply["live"], reply["translation"], audio
+
+    def close(self):
+        self._stopped.set()
+        for worker_id in list(self.workers):
+            self.remove_worker(worker_id)
+
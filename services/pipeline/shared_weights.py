@@ -0,0 +1,136 @@
+# ============================================================
+# shared_weights.py — Memory-mapped model weights shared by workers
+# ============================================================
+"""
+After a model is built, each CPU torch module in it is written once to
+WEIGHTS_DIR and reloaded with torch.load(mmap=True) /
+load_state_dict(assign=True). Parameters then live in the page cache
+backed by that file, so N worker processes on a host map the same
+physical pages instead of holding N private copies. Weights are only
+read at inference time, so the pages stay clean and shared.
+
+Files are named <model>.<index>.<fingerprint>.pt, the fingerprint
+hashing the module class, its config (model id, revision) and tensor
+shapes, so an upgraded model never loads another version's weights.
+
+GPU-resident modules are left alone (their weights are not in host
+RAM). Whisper runs on CTranslate2, not torch; use fork-after-load
+(WorkerPool(fork_after_load=True), workers forked from a fork server
+that loaded the models) to share it copy-on-write.
+"""
+
+import glob
+import hashlib
+import os
+import threading
+
+import torch
+
+
+WEIGHTS_DIR = os.environ.get("DUBYOU_WEIGHTS_DIR", "weights_cache")
+
+
+def _find_modules(obj, depth=3, seen=None):
+    """
+    torch modules reachable through attributes of a model wrapper
+    (e.g. translator.model, emotion.model.model, cloner.model)
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return []
+    seen.add(id(obj))
+
+    if isinstance(obj, torch.nn.Module):
+        return [obj]
+    if depth == 0 or not hasattr(obj, "__dict__"):
+        return []
+
+    found = []
+    for value in vars(obj).values():
+        found.extend(_find_modules(value, depth - 1, seen))
+    return found
+
+
+def _outermost(modules):
+    """Drop modules that are submodules of another one in the list"""
+    inner = set()
+    for module in modules:
+        for child in module.modules():
+            if child is not module:
+                inner.add(id(child))
+    return [m for m in modules if id(m) not in inner]
+
+
+def _on_cpu(module):
+    return all(not t.is_cuda for t in module.state_dict().values())
+
+
+def fingerprint(module):
+    """Short hash of what the weights belong to"""
+    parts = [type(module).__module__ + "." + type(module).__qualname__]
+
+    config = getattr(module, "config", None)
+    if config is not None:
+        parts.append(str(getattr(config, "_name_or_path", "")))
+        parts.append(str(getattr(config, "_commit_hash", "")))
+        to_json = getattr(config, "to_json_string", None)
+        parts.append(to_json() if callable(to_json) else repr(config))
+
+    for key, tensor in module.state_dict().items():
+        parts.append(f"{key}:{tuple(tensor.shape)}:{tensor.dtype}")
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def mmap_module(module, path, rewrite=True):
+    """
+    Back a module's parameters and buffers with a read-only mapping of
+    `path`, writing the checkpoint first if it does not exist
+    """
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Per-writer tmp name: workers starting together may all write it
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            torch.save(module.state_dict(), tmp)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    state = torch.load(path, mmap=True, weights_only=True, map_location="cpu")
+    try:
+        module.load_state_dict(state, assign=True)
+    except RuntimeError:
+        if not rewrite:
+            raise
+        # Checkpoint from another model version: rewrite it
+        os.remove(path)
+        return mmap_module(module, path, rewrite=False)
+    return module
+
+
+def share_weights(model, name, weights_dir=WEIGHTS_DIR):
+    """
+    mmap every CPU torch module of a loaded model. Returns the number
+    of modules now backed by a shared mapping.
+    """
+    shared = 0
+    for i, module in enumerate(_outermost(_find_modules(model))):
+        if not _on_cpu(module):
+            continue
+        path = os.path.join(weights_dir, f"{name}.{i}.{fingerprint(module)}.pt")
+        mmap_module(module, path)
+        _remove_stale(weights_dir, f"{name}.{i}.", path)
+        shared += 1
+    return shared
+
+
+def _remove_stale(weights_dir, prefix, keep):
+    """Drop other versions' files for the same module slot"""
+    for path in glob.glob(os.path.join(weights_dir, glob.escape(prefix) + "*.pt")):
+        if path == keep:
+            continue
+        try:
+            os.remove(path)  # processes still mapping it keep their pages
+        except OSError:
+            pass
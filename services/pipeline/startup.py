@@ -0,0 +1,299 @@
+# ============================================================
+# startup.py — Deferred model loading, warm-up and readiness
+# ============================================================
+
+import importlib
+import json
+import os
+import threading
+import time
+
+from services.monitoring.metrics import REGISTRY, register_route
+
+
+STARTUP_REPORT_PATH = os.environ.get("DUBYOU_STARTUP_REPORT")
+
+# mmap CPU weights from WEIGHTS_DIR so worker processes share pages
+SHARED_WEIGHTS = os.environ.get("DUBYOU_SHARED_WEIGHTS", "0") == "1"
+
+# A failed load (download, network) is retried after a backoff that
+# doubles per failure up to LOAD_RETRY_MAX; the preload thread gives up
+# on a model after LOAD_RETRIES retries, get() keeps retrying
+LOAD_RETRY_SECONDS = float(os.environ.get("DUBYOU_LOAD_RETRY", "5"))
+LOAD_RETRY_MAX = 300.0
+LOAD_RETRIES = int(os.environ.get("DUBYOU_LOAD_RETRIES", "5"))
+
+MODEL_READY = REGISTRY.gauge(
+    "dubyou_model_ready",
+    "1 once the model is loaded and warmed up",
+    labelnames=("model",)
+)
+MODEL_STARTUP_SECONDS = REGISTRY.gauge(
+    "dubyou_model_startup_seconds",
+    "Seconds spent importing, loading and warming up each model",
+    labelnames=("model", "phase")
+)
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class ModelSpec:
+    """
+    `target` is "package.module:Factory"; the module is only imported
+    when the model is loaded. preload=False models load on first use
+    or when prefetched.
+    """
+
+    def __init__(self, name, target, *args, warmup=True, preload=True, **kwargs):
+        self.name = name
+        self.module, self.attr = target.split(":")
+        self.args = args
+        self.kwargs = kwargs
+        self.warmup = warmup
+        self.preload = preload
+
+
+# Load order: the live path first (VAD, ASR), TTS last
+DEFAULT_SPECS = [
+    ModelSpec("vad", "services.voice_enrollment.vad:_load_vad", warmup=False),
+    ModelSpec("asr", "services.asr.streaming_asr:StreamingASR"),
+    ModelSpec("emotion", "services.translation.emotion:EmotionDetector"),
+    ModelSpec("translator", "services.translation.translator:EmotionAwareTranslator"),
+    ModelSpec("tts", "services.tts.voice_cloner:VoiceCloner"),
+    ModelSpec(
+        "speaker_encoder",
+        "services.voice_identity.speaker_encoder.encoder:SpeakerEncoder",
+        warmup=False
+    ),
+
+    # Degraded quality tiers (services/pipeline/overload.py), loaded
+    # only once the overload controller heads towards them
+    ModelSpec(
+        "asr_small",
+        "services.asr.streaming_asr:StreamingASR",
+        model_size="small",
+        preload=False
+    ),
+    ModelSpec(
+        "asr_tiny",
+        "services.asr.streaming_asr:StreamingASR",
+        model_size="tiny",
+        preload=False
+    ),
+    ModelSpec("tts_speecht5", "services.tts.speecht5_tts:SpeechT5TTS", preload=False),
+    ModelSpec("tts_piper", "services.tts.piper_tts:PiperTTS", preload=False),
+]
+
+# Models the streaming pipeline needs before it can serve a chunk
+PIPELINE_MODELS = ("asr", "emotion", "translator", "tts")
+
+
+class ModelLoader:
+    """
+    Loads shared model instances on a background thread in priority
+    order. `get` blocks until a model is ready, loading it inline if
+    the preload thread has not reached it yet. Failed models are
+    retried with backoff.
+    """
+
+    def __init__(self, specs=None):
+        self.specs = {spec.name: spec for spec in (specs or DEFAULT_SPECS)}
+        self.models = {}
+        self.states = {name: PENDING for name in self.specs}
+        self.errors = {}
+        self.timings = {name: {} for name in self.specs}
+        self.attempts = {name: 0 for name in self.specs}
+        self.failed_at = {}
+
+        self._locks = {name: threading.Lock() for name in self.specs}
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._preload,
+                    name="model-preload",
+                    daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def _preload(self):
+        names = [name for name, spec in self.specs.items() if spec.preload]
+        for name in names:
+            self._try_load(name)
+
+        if STARTUP_REPORT_PATH:
+            self.write_report(STARTUP_REPORT_PATH)
+
+        while True:
+            failed = [
+                name for name in names
+                if self.states[name] == FAILED and self.attempts[name] <= LOAD_RETRIES
+            ]
+            if not failed:
+                break
+            time.sleep(max(0.0, min(self.retry_in(name) for name in failed)))
+            for name in failed:
+                if self.retry_in(name) <= 0:
+                    self._try_load(name)
+
+    def _try_load(self, name):
+        try:
+            self._load(name)
+        except Exception as e:
+            print(f"[startup] {name} failed: {e}")
+
+    def retry_in(self, name):
+        """Seconds until a failed model may be loaded again"""
+        backoff = min(
+            LOAD_RETRY_MAX, LOAD_RETRY_SECONDS * 2 ** (self.attempts[name] - 1)
+        )
+        return self.failed_at[name] + backoff - time.monotonic()
+
+    def _failed(self, name):
+        return RuntimeError(f"Model '{name}' failed to load: {self.errors[name]}")
+
+    def _load(self, name):
+        with self._locks[name]:
+            if self.states[name] == READY:
+                return self.models[name]
+            # Another caller failed while this one waited for the lock
+            if self.states[name] == FAILED and self.retry_in(name) > 0:
+                raise self._failed(name)
+
+            spec = self.specs[name]
+            timings = self.timings[name]
+            self.states[name] = LOADING
+
+            try:
+                t0 = time.perf_counter()
+                module = importlib.import_module(spec.module)
+                factory = getattr(module, spec.attr)
+                timings["import"] = time.perf_counter() - t0
+
+                t0 = time.perf_counter()
+                model = factory(*spec.args, **spec.kwargs)
+                timings["load"] = time.perf_counter() - t0
+
+                if SHARED_WEIGHTS:
+                    from services.pipeline.shared_weights import share_weights
+
+                    t0 = time.perf_counter()
+                    share_weights(model, name)
+                    timings["mmap"] = time.perf_counter() - t0
+
+                if spec.warmup and hasattr(model, "warmup"):
+                    t0 = time.perf_counter()
+                    model.warmup()
+                    timings["warmup"] = time.perf_counter() - t0
+            except Exception as e:
+                self.states[name] = FAILED
+                self.errors[name] = repr(e)
+                self.attempts[name] += 1
+                self.failed_at[name] = time.monotonic()
+                raise
+
+            self.models[name] = model
+            self.states[name] = READY
+            self.errors.pop(name, None)
+
+        MODEL_READY.set(1, model=name)
+        for phase, seconds in timings.items():
+            MODEL_STARTUP_SECONDS.set(seconds, model=name, phase=phase)
+        print(
+            f"[startup] {name} ready ("
+            + ", ".join(f"{k} {v:.2f}s" for k, v in timings.items())
+            + ")"
+        )
+        return model
+
+    def prefetch(self, name):
+        """
+        Load a model in the background without waiting for it; a
+        failed model is retried once its backoff has passed
+        """
+        state = self.states[name]
+        if state != PENDING and not (state == FAILED and self.retry_in(name) <= 0):
+            return
+
+        threading.Thread(
+            target=self._try_load, args=(name,), name=f"prefetch-{name}", daemon=True
+        ).start()
+
+    def wait(self):
+        """Block until the background preload has finished"""
+        if self._thread is not None:
+            self._thread.join()
+
+    def get(self, name):
+        if self.states[name] == READY:
+            return self.models[name]
+        if self.states[name] == FAILED and self.retry_in(name) > 0:
+            raise self._failed(name)
+
+        # Waits on the lock if the preload thread is loading it right now
+        return self._load(name)
+
+    def is_ready(self, names=None):
+        names = self.specs if names is None else names
+        return all(self.states[name] == READY for name in names)
+
+    def failures(self, names=None):
+        """name -> error for models that failed to load"""
+        names = self.specs if names is None else names
+        return {
+            name: self.errors.get(name, "")
+            for name in names
+            if self.states[name] == FAILED
+        }
+
+    def unavailable(self, names=None):
+        """
+        None once `names` are ready, else a message for the user. A
+        failed model is reported as such, not as still loading, and
+        reloaded in the background once its backoff has passed.
+        """
+        failed = self.failures(names)
+        for name in failed:
+            self.prefetch(name)
+        if failed:
+            return "❌ Model failed to load: " + "; ".join(
+                f"{name} ({error})" for name, error in failed.items()
+            )
+        if not self.is_ready(names):
+            return "⏳ Models are still loading, please wait…"
+        return None
+
+    def readiness(self):
+        return dict(self.states)
+
+    def report(self):
+        return {
+            name: {
+                "state": self.states[name],
+                **{f"{k}_s": round(v, 3) for k, v in self.timings[name].items()},
+                **({"error": self.errors[name]} if name in self.errors else {}),
+            }
+            for name in self.specs
+        }
+
+    def write_report(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+
+LOADER = ModelLoader()
+
+
+def _ready_route():
+    status = 200 if LOADER.is_ready(PIPELINE_MODELS) else 503
+    return status, "application/json", json.dumps(LOADER.report())
+
+
+register_route("/ready", _ready_route)
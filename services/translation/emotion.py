@@ -9,6 +9,13 @@ class EmotionDetector:
             top_k=1
         )
 
+    def warmup(self):
+        self.detect("Hello, how are you today?")
+
     def detect(self, text: str) -> str:
         result = self.model(text)[0]
         return result["label"]
+
+    def detect_batch(self, texts, batch_size=16):
+        results = self.model(list(texts), batch_size=batch_size)
+        return [result[0]["label"] for result in results]
@@ -0,0 +1,37 @@
+# Target languages the pipeline can dub into.
+# Keys are the FLORES-style codes used across the pipeline;
+# "m2m" is the M2M100 tokenizer code, "tts" the XTTS-v2 language.
+LANGUAGES = {
+    "eng_Latn": {"label": "English", "m2m": "en", "tts": "en"},
+    "hin_Deva": {"label": "Hindi", "m2m": "hi", "tts": "hi"},
+    "spa_Latn": {"label": "Spanish", "m2m": "es", "tts": "es"},
+    "fra_Latn": {"label": "French", "m2m": "fr", "tts": "fr"},
+    "deu_Latn": {"label": "German", "m2m": "de", "tts": "de"},
+    "ita_Latn": {"label": "Italian", "m2m": "it", "tts": "it"},
+    "por_Latn": {"label": "Portuguese", "m2m": "pt", "tts": "pt"},
+    "pol_Latn": {"label": "Polish", "m2m": "pl", "tts": "pl"},
+    "tur_Latn": {"label": "Turkish", "m2m": "tr", "tts": "tr"},
+    "rus_Cyrl": {"label": "Russian", "m2m": "ru", "tts": "ru"},
+    "nld_Latn": {"label": "Dutch", "m2m": "nl", "tts": "nl"},
+    "ces_Latn": {"label": "Czech", "m2m": "cs", "tts": "cs"},
+    "arb_Arab": {"label": "Arabic", "m2m": "ar", "tts": "ar"},
+    "zho_Hans": {"label": "Chinese", "m2m": "zh", "tts": "zh-cn"},
+    "jpn_Jpan": {"label": "Japanese", "m2m": "ja", "tts": "ja"},
+    "hun_Latn": {"label": "Hungarian", "m2m": "hu", "tts": "hu"},
+    "kor_Hang": {"label": "Korean", "m2m": "ko", "tts": "ko"},
+}
+
+SOURCE_LANG = "eng_Latn"
+DEFAULT_TARGET_LANGS = ("hin_Deva",)
+
+
+def m2m_code(lang):
+    return LANGUAGES.get(lang, {}).get("m2m", lang)
+
+
+def tts_code(lang):
+    return LANGUAGES.get(lang, {}).get("tts", lang)
+
+
+def label(lang):
+    return LANGUAGES.get(lang, {}).get("label", lang)
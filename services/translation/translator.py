@@ -1,6 +1,28 @@
+import time
+
 import torch
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 
+from services.monitoring.metrics import TRANSLATIONS, TRANSLATION_SECONDS
+from services.translation.languages import m2m_code
+
+
+# Emotion-preserving prefix per target language (VERY IMPORTANT)
+EMOTION_PREFIXES = {
+    "hin_Deva": {
+        "joy": "खुशी के साथ: ",
+        "anger": "गुस्से में: ",
+        "sadness": "उदासी के साथ: ",
+        "fear": "डर के साथ: ",
+        "surprise": "हैरानी से: ",
+        "neutral": ""
+    },
+}
+
+
+def emotion_prefix(tgt_lang: str, emotion: str) -> str:
+    return EMOTION_PREFIXES.get(tgt_lang, {}).get(emotion, "")
+
 
 class EmotionAwareTranslator:
     def __init__(self, model_name="facebook/m2m100_418M"):
@@ -10,41 +32,155 @@ class EmotionAwareTranslator:
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.model = self.model.to(self.device)
 
-    def translate(self, text: str, src_lang: str, tgt_lang: str, emotion: str) -> str:
+    def warmup(self):
+        self.translate("Hello, how are you today?", "eng_Latn", "hin_Deva", "neutral")
+
+    def _encode(self, text: str, src_lang: str):
+        self.tokenizer.src_lang = m2m_code(src_lang)
+
+        return self.tokenizer(
+            text,
+            return_tensors="pt",
+            truncation=True,
+            max_length=128
+        ).to(self.device)
+
+    def translate(
+        self,
+        text: str,
+        src_lang: str,
+        tgt_lang: str,
+        emotion: str,
+        num_beams: int = 1,
+        max_length: int = 128
+    ) -> str:
         if not text.strip():
             return ""
 
-        # Emotion-preserving prefix (VERY IMPORTANT)
-        emotion_prefix = {
-            "joy": "खुशी के साथ: ",
-            "anger": "गुस्से में: ",
-            "sadness": "उदासी के साथ: ",
-            "fear": "डर के साथ: ",
-            "surprise": "हैरानी से: ",
-            "neutral": ""
-        }.get(emotion, "")
+        start = time.perf_counter()
+        inputs = self._encode(text, src_lang)
+
+        tgt_id = self.tokenizer.get_lang_id(m2m_code(tgt_lang))
+
+        with torch.no_grad():
+            output = self.model.generate(
+                **inputs,
+                forced_bos_token_id=tgt_id,
+                max_length=max_length,
+                num_beams=num_beams
+            )
+
+        translated = self.tokenizer.decode(
+            output[0],
+            skip_special_tokens=True
+        )
+
+        TRANSLATIONS.inc()
+        TRANSLATION_SECONDS.observe(time.perf_counter() - start)
+        return emotion_prefix(tgt_lang, emotion) + translated
 
-        self.tokenizer.src_lang = src_lang
+    def translate_batch(self, texts, src_lang: str, tgt_lang: str, emotions=None) -> list:
+        """
+        Many phrases into one language with a single padded generate
+        """
+        texts = list(texts)
+        emotions = emotions or ["neutral"] * len(texts)
+        keep = [i for i, text in enumerate(texts) if text.strip()]
+        results = [""] * len(texts)
+        if not keep:
+            return results
 
+        start = time.perf_counter()
+        self.tokenizer.src_lang = m2m_code(src_lang)
         inputs = self.tokenizer(
-            text,
+            [texts[i] for i in keep],
             return_tensors="pt",
+            padding=True,
             truncation=True,
             max_length=128
         ).to(self.device)
 
-        tgt_id = self.tokenizer.get_lang_id(tgt_lang)
-
         with torch.no_grad():
             output = self.model.generate(
                 **inputs,
-                forced_bos_token_id=tgt_id,
+                forced_bos_token_id=self.tokenizer.get_lang_id(m2m_code(tgt_lang)),
                 max_length=128,
                 num_beams=1
             )
 
-        translated = self.tokenizer.decode(
-            output[0],
+        translated = self.tokenizer.batch_decode(
+            output,
+            skip_special_tokens=True
+        )
+        for i, text_out in zip(keep, translated):
+            results[i] = emotion_prefix(tgt_lang, emotions[i]) + text_out
+
+        TRANSLATIONS.inc(len(keep))
+        TRANSLATION_SECONDS.observe(time.perf_counter() - start)
+        return results
+
+    def translate_many(
+        self,
+        text: str,
+        src_lang: str,
+        tgt_langs,
+        emotion: str,
+        num_beams: int = 1,
+        max_length: int = 128
+    ) -> dict:
+        """
+        One phrase into several languages: the encoder runs once and
+        all targets decode together in a single batched generate.
+        Returns {tgt_lang: text}.
+        """
+        tgt_langs = list(tgt_langs)
+        if not text.strip():
+            return {lang: "" for lang in tgt_langs}
+        if len(tgt_langs) == 1:
+            lang = tgt_langs[0]
+            return {
+                lang: self.translate(text, src_lang, lang, emotion, num_beams, max_length)
+            }
+
+        start = time.perf_counter()
+        inputs = self._encode(text, src_lang)
+        n = len(tgt_langs)
+
+        # Each row starts with the decoder start token, then its own
+        # target language token (what forced_bos_token_id does for one)
+        decoder_input_ids = torch.tensor(
+            [
+                [
+                    self.model.config.decoder_start_token_id,
+                    self.tokenizer.get_lang_id(m2m_code(lang))
+                ]
+                for lang in tgt_langs
+            ],
+            device=self.device
+        )
+
+        with torch.no_grad():
+            encoder_outputs = self.model.get_encoder()(**inputs)
+            encoder_outputs.last_hidden_state = (
+                encoder_outputs.last_hidden_state.repeat(n, 1, 1)
+            )
+
+            output = self.model.generate(
+                encoder_outputs=encoder_outputs,
+                attention_mask=inputs["attention_mask"].repeat(n, 1),
+                decoder_input_ids=decoder_input_ids,
+                max_length=max_length,
+                num_beams=num_beams
+            )
+
+        translated = self.tokenizer.batch_decode(
+            output,
             skip_special_tokens=True
         )
-        return emotion_prefix + translated
+
+        TRANSLATIONS.inc(n)
+        TRANSLATION_SECONDS.observe(time.perf_counter() - start)
+        return {
+            lang: emotion_prefix(lang, emotion) + text_out
+            for lang, text_out in zip(tgt_langs, translated)
+        }
@@ -0,0 +1,188 @@
+# ============================================================
+# client.py — Loopback client / load generator for the stream
+# ============================================================
+"""
+    python -m services.transport.client --user-id ab12cd34 --wav speech.wav
+    python -m services.transport.client --connections 16 --seconds 30
+"""
+
+import argparse
+import queue
+import socket
+import threading
+import time
+
+import numpy as np
+
+from services.transport.protocol import (
+    ASR_TEXT,
+    AUDIO_IN,
+    AUDIO_OUT,
+    ERROR,
+    FLAG_REPLACE,
+    HEADER,
+    SET_TARGETS,
+    TRANSLATION,
+    decode_header,
+    encode_frame,
+    float_to_pcm16,
+    pcm16_to_float,
+    unpack_lang,
+)
+
+
+class StreamClient:
+    def __init__(self, host="127.0.0.1", port=7861, session_id="loopback"):
+        self.session_id = session_id
+        self.sock = socket.create_connection((host, port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.frames = queue.Queue()
+        # ASR_TEXT -> text, (TRANSLATION, lang) -> text
+        self.text = {ASR_TEXT: ""}
+        self.sent_at = {}
+        self.first_reply = {}
+        self.seq = 0
+
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def _recv_exactly(self, n):
+        data = bytearray()
+        while len(data) < n:
+            part = self.sock.recv(n - len(data))
+            if not part:
+                raise ConnectionError("Server closed the stream")
+            data.extend(part)
+        return bytes(data)
+
+    def _read_loop(self):
+        try:
+            while True:
+                frame_type, flags, _, seq, sr, length = decode_header(
+                    self._recv_exactly(HEADER.size)
+                )
+                payload = self._recv_exactly(length)
+                self.first_reply.setdefault(seq, time.perf_counter())
+
+                if frame_type in (ASR_TEXT, TRANSLATION):
+                    key = frame_type
+                    if frame_type == TRANSLATION:
+                        lang, payload = unpack_lang(payload)
+                        key = (frame_type, lang)
+                    text = payload.decode("utf-8")
+                    if flags & FLAG_REPLACE:
+                        self.text[key] = text
+                    else:
+                        self.text[key] = self.text.get(key, "") + text
+                    self.frames.put((frame_type, seq, key, self.text[key]))
+                elif frame_type == AUDIO_OUT:
+                    lang, payload = unpack_lang(payload)
+                    self.frames.put((frame_type, seq, lang, (sr, pcm16_to_float(payload))))
+                elif frame_type == ERROR:
+                    self.frames.put((frame_type, seq, None, payload.decode("utf-8")))
+        except (ConnectionError, OSError):
+            self.frames.put(None)
+
+    def set_targets(self, langs):
+        self.sock.sendall(encode_frame(
+            SET_TARGETS, self.session_id, self.seq, ",".join(langs).encode("ascii")
+        ))
+
+    def send_audio(self, audio, sample_rate=16000):
+        seq = self.seq
+        self.seq += 1
+        self.sent_at[seq] = time.perf_counter()
+        self.sock.sendall(encode_frame(
+            AUDIO_IN, self.session_id, seq,
+            float_to_pcm16(audio), sample_rate=sample_rate
+        ))
+        return seq
+
+    def stream(self, audio, sample_rate=16000, chunk_ms=100, speed=1.0):
+        """
+        Send `audio` in chunks at real time (speed=1) or faster
+        """
+        step = int(sample_rate * chunk_ms / 1000)
+        start = time.perf_counter()
+        for idx, pos in enumerate(range(0, len(audio), step)):
+            if speed > 0:
+                due = start + idx * chunk_ms / 1000 / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            self.send_audio(audio[pos:pos + step], sample_rate)
+
+    def reply_latencies(self):
+        return [
+            self.first_reply[seq] - sent
+            for seq, sent in self.sent_at.items()
+            if seq in self.first_reply
+        ]
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+        self._reader.join(timeout=30)
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DubYou binary stream loopback client")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7861)
+    parser.add_argument("--user-id", default="loopback")
+    parser.add_argument("--wav", help="16 kHz mono WAV (default: synthetic tone bursts)")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--connections", type=int, default=1)
+    parser.add_argument("--chunk-ms", type=int, default=100)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--targets", nargs="+", help="Target language codes, e.g. hin_Deva spa_Latn")
+    args = parser.parse_args()
+
+    if args.wav:
+        from benchmarks.replay import load_wav
+        audio = load_wav(args.wav)
+    else:
+        from benchmarks.replay import synthetic_speech
+        audio = synthetic_speech(args.seconds)
+
+    clients = [
+        StreamClient(
+            args.host, args.port,
+            args.user_id if args.connections == 1 else f"{args.user_id}-{i}"
+        )
+        for i in range(args.connections)
+    ]
+    if args.targets:
+        for c in clients:
+            c.set_targets(args.targets)
+    threads = [
+        threading.Thread(target=c.stream, args=(audio, 16000, args.chunk_ms, args.speed))
+        for c in clients
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for c in clients:
+        c.close()
+
+    if args.connections == 1:
+        print("ASR:", clients[0].text[ASR_TEXT])
+        for key, text in clients[0].text.items():
+            if key != ASR_TEXT:
+                print(f"Translation [{key[1]}]:", text)
+
+    latencies = [lat for c in clients for lat in c.reply_latencies()]
+    if latencies:
+        p50, p95, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99])
+        print(
+            f"{len(latencies)} replies  first-frame latency "
+            f"p50 {p50:.1f}ms  p95 {p95:.1f}ms  p99 {p99:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
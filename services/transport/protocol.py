@@ -0,0 +1,103 @@
+# ============================================================
+# protocol.py — Binary framing for the low-overhead stream
+# ============================================================
+"""
+Every frame is a fixed 32-byte header followed by `length` payload bytes.
+
+    magic       2s   b"DY"
+    type        B    frame type (below)
+    flags       B    FLAG_REPLACE on text frames that replace, not append
+    session     16s  user ID, UTF-8, NUL padded
+    seq         I    client chunk sequence number the frame belongs to
+    sample_rate I    Hz for audio frames, 0 otherwise
+    length      I    payload bytes
+
+Audio payloads are mono int16 little-endian PCM; text payloads are UTF-8.
+AUDIO_IN frames must carry a sample rate and an even payload length.
+TRANSLATION and AUDIO_OUT payloads start with the target language code
+(1 length byte + ASCII), since one session may be dubbed into several.
+SET_TARGETS carries comma-separated target language codes.
+"""
+
+import struct
+
+import numpy as np
+
+
+HEADER = struct.Struct("!2sBB16sIII")
+MAGIC = b"DY"
+
+# client → server
+AUDIO_IN = 1
+SET_TARGETS = 6
+# server → client
+ASR_TEXT = 2
+TRANSLATION = 3
+AUDIO_OUT = 4
+ERROR = 5
+
+FLAG_REPLACE = 1
+
+MAX_PAYLOAD = 16 * 1024 * 1024
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def encode_frame(frame_type, session_id, seq, payload=b"", sample_rate=0, flags=0):
+    session = session_id.encode("utf-8")
+    if len(session) > 16:
+        raise ProtocolError(f"Session ID longer than 16 bytes: {session_id!r}")
+    return HEADER.pack(
+        MAGIC, frame_type, flags, session, seq, sample_rate, len(payload)
+    ) + payload
+
+
+def decode_header(data):
+    magic, frame_type, flags, session, seq, sample_rate, length = HEADER.unpack(data)
+    if magic != MAGIC:
+        raise ProtocolError(f"Bad magic {magic!r}")
+    if length > MAX_PAYLOAD:
+        raise ProtocolError(f"Payload too large: {length}")
+    if frame_type == AUDIO_IN:
+        if sample_rate <= 0:
+            raise ProtocolError("Audio frame without a sample rate")
+        if length % 2:
+            raise ProtocolError(f"Audio payload of {length} bytes is not int16 PCM")
+    try:
+        session_id = session.rstrip(b"\0").decode("utf-8")
+    except UnicodeDecodeError:
+        raise ProtocolError(f"Session ID is not UTF-8: {session!r}")
+    return frame_type, flags, session_id, seq, sample_rate, length
+
+
+def pack_lang(lang, data):
+    code = lang.encode("ascii")
+    return bytes([len(code)]) + code + data
+
+
+def unpack_lang(payload):
+    n = payload[0]
+    return payload[1:1 + n].decode("ascii"), payload[1 + n:]
+
+
+def pcm16_to_float(payload):
+    return np.frombuffer(payload, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def float_to_pcm16(audio):
+    audio = np.clip(np.asarray(audio, dtype=np.float32), -1.0, 1.0)
+    return (audio * 32767.0).astype("<i2").tobytes()
+
+
+def text_update(previous, current):
+    """
+    Smallest text frame turning `previous` into `current`:
+    (payload, flags) or None when nothing changed
+    """
+    if current == previous:
+        return None
+    if previous and current.startswith(previous):
+        return current[len(previous):].encode("utf-8"), 0
+    return current.encode("utf-8"), FLAG_REPLACE
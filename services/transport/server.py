@@ -0,0 +1,241 @@
+# ============================================================
+# server.py — Raw TCP streaming endpoint next to the Gradio app
+# ============================================================
+
+import asyncio
+import os
+import threading
+
+from services.monitoring.metrics import ERRORS, REGISTRY
+from services.translation.languages import DEFAULT_TARGET_LANGS
+from services.transport.protocol import (
+    ASR_TEXT,
+    AUDIO_IN,
+    AUDIO_OUT,
+    ERROR,
+    HEADER,
+    SET_TARGETS,
+    TRANSLATION,
+    ProtocolError,
+    decode_header,
+    encode_frame,
+    float_to_pcm16,
+    pack_lang,
+    pcm16_to_float,
+    text_update,
+)
+
+
+STREAM_PORT = int(os.environ.get("DUBYOU_STREAM_PORT", "7861"))
+
+# Audio chunks buffered per connection. A full queue stops reading the
+# socket, so a client sending faster than the pipeline drains is slowed
+# by TCP backpressure instead of growing server memory
+STREAM_QUEUE = int(os.environ.get("DUBYOU_STREAM_QUEUE", "32"))
+
+CONNECTIONS = REGISTRY.gauge(
+    "dubyou_stream_connections", "Open binary stream connections"
+)
+
+
+def local_events(user_id, chunk, sr, target_langs=None):
+    """
+    Run a chunk in this process; yields pipeline events
+    """
+    from services.pipeline.overload import SessionRejected
+    from services.pipeline.session import get_session, stream_chunk
+    from services.pipeline.startup import LOADER, PIPELINE_MODELS
+
+    unavailable = LOADER.start().unavailable(PIPELINE_MODELS)
+    if unavailable:
+        yield "error", unavailable
+        return
+
+    try:
+        session = get_session(user_id)
+    except SessionRejected as e:
+        yield "error", str(e)
+        return
+
+    session.set_target_langs(target_langs)
+    yield from stream_chunk(session, chunk, sr)
+
+
+def pool_events(pool):
+    """
+    Route chunks through a WorkerPool; results arrive per chunk and
+    only the first target language has audio
+    """
+    def events(user_id, chunk, sr, target_langs=None):
+        live, _, audio = pool.submit(user_id, chunk, sr, target_langs)
+        yield "asr", live
+        for lang, text in pool.last_translations(user_id).items():
+            yield "translation", (lang, text)
+        if audio is not None:
+            lang = (target_langs or DEFAULT_TARGET_LANGS)[0]
+            yield "audio", (lang, *audio)
+    return events
+
+
+class _Connection:
+    def __init__(self, reader, writer, events, loop, queue_size=STREAM_QUEUE):
+        self.reader = reader
+        self.writer = writer
+        self.events = events
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        # A connection carries one session, fixed by its first frame
+        self.session_id = None
+        # (kind, lang) -> last text sent
+        self.sent_text = {}
+        # Target languages requested with SET_TARGETS
+        self.targets = None
+
+    def _send(self, data):
+        # Called from the pipeline thread
+        self.loop.call_soon_threadsafe(self.writer.write, data)
+
+    def _send_text(self, frame_type, session_id, seq, text, lang=None):
+        key = (frame_type, lang)
+        update = text_update(self.sent_text.get(key, ""), text)
+        if update is None:
+            return
+        payload, flags = update
+        self.sent_text[key] = text
+        if lang is not None:
+            payload = pack_lang(lang, payload)
+        self._send(encode_frame(frame_type, session_id, seq, payload, flags=flags))
+
+    def _run_chunk(self, session_id, seq, chunk, sr):
+        events = self.events(session_id, chunk, sr, self.targets)
+        for kind, value in events:
+            if kind == "audio":
+                lang, sr_out, audio = value
+                self._send(encode_frame(
+                    AUDIO_OUT, session_id, seq,
+                    pack_lang(lang, float_to_pcm16(audio)), sample_rate=sr_out
+                ))
+            elif kind == "translation":
+                lang, text = value
+                self._send_text(TRANSLATION, session_id, seq, text, lang)
+            elif kind == "asr":
+                self._send_text(ASR_TEXT, session_id, seq, value)
+            elif kind == "error":
+                self._send(encode_frame(ERROR, session_id, seq, value.encode("utf-8")))
+
+    async def read_loop(self):
+        try:
+            while True:
+                header = await self.reader.readexactly(HEADER.size)
+                frame_type, _, session_id, seq, sr, length = decode_header(header)
+                payload = await self.reader.readexactly(length)
+                if self.session_id is None:
+                    self.session_id = session_id
+                elif session_id != self.session_id:
+                    raise ProtocolError(
+                        f"Connection is bound to session {self.session_id!r}, "
+                        f"got a frame for {session_id!r}"
+                    )
+
+                if frame_type == SET_TARGETS:
+                    try:
+                        langs = payload.decode("ascii").split(",")
+                    except UnicodeDecodeError:
+                        raise ProtocolError("Target languages are not ASCII")
+                    self.targets = [lang for lang in langs if lang]
+                    continue
+                if frame_type != AUDIO_IN:
+                    raise ProtocolError(f"Unexpected frame type {frame_type}")
+                # Waits while the queue is full: reading pauses
+                await self.queue.put((session_id, seq, pcm16_to_float(payload), sr))
+        except asyncio.IncompleteReadError:
+            pass
+        # Client done: process what is queued, then stop
+        await self.queue.put(None)
+
+    async def process_loop(self):
+        # Chunks are processed in order; a session is not thread-safe
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                break
+            try:
+                await self.loop.run_in_executor(None, self._run_chunk, *item)
+            except Exception as e:
+                ERRORS.inc(stage="transport")
+                print(f"Error in stream processing: {e}")
+                session_id, seq = item[:2]
+                self._send(encode_frame(ERROR, session_id, seq, str(e).encode("utf-8")))
+            await self.writer.drain()
+
+    async def send_error(self, message):
+        """Best effort: the client may already be gone"""
+        try:
+            self.writer.write(encode_frame(
+                ERROR, self.session_id or "", 0, message.encode("utf-8")
+            ))
+            await self.writer.drain()
+        except (ConnectionError, OSError):
+            pass
+
+
+class StreamServer:
+    def __init__(self, events=local_events, host="0.0.0.0", port=STREAM_PORT,
+                 queue_size=STREAM_QUEUE):
+        self.events = events
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.loop = None
+        self._server = None
+        self._started = threading.Event()
+
+    async def _handle(self, reader, writer):
+        CONNECTIONS.inc()
+        conn = _Connection(reader, writer, self.events, self.loop, self.queue_size)
+        tasks = [
+            asyncio.ensure_future(conn.read_loop()),
+            asyncio.ensure_future(conn.process_loop()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except ProtocolError as e:
+            ERRORS.inc(stage="transport")
+            print(f"Stream protocol error: {e}")
+            await conn.send_error(f"Protocol error: {e}")
+        except Exception as e:
+            ERRORS.inc(stage="transport")
+            print(f"Stream connection error: {e!r}")
+            await conn.send_error(f"Server error: {e}")
+        finally:
+            # The other loop may still be waiting on the socket or queue
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            CONNECTIONS.dec()
+            writer.close()
+
+    def _serve(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._server = self.loop.run_until_complete(
+            asyncio.start_server(self._handle, self.host, self.port)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        self.loop.run_forever()
+
+    def start(self):
+        """
+        Serve from a daemon thread; returns once the socket is bound
+        """
+        thread = threading.Thread(target=self._serve, name="stream-server", daemon=True)
+        thread.start()
+        self._started.wait()
+        return self
+
+    def stop(self):
+        def _close():
+            self._server.close()
+            self.loop.stop()
+        self.loop.call_soon_threadsafe(_close)
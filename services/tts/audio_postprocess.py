@@ -40,6 +40,174 @@ def normalize_audio(
     return audio_np
 
 
+class StreamingNormalizer:
+    """
+    Stateful chunk-by-chunk loudness normalizer for live TTS output
+
+    - gated short-term loudness (EMA over 10 ms blocks, quiet blocks ignored)
+    - gain ramped across each chunk toward the target, no per-phrase jumps
+    - look-ahead peak limiter; output is delayed by `lookahead_ms`.
+      Gain reduction ramps in across the look-ahead and releases with
+      a `release_ms` one-pole, so transients do not click
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 24000,
+        target_dbfs: float = -14.0,
+        peak_limit: float = 0.99,
+        window_sec: float = 0.4,
+        gate_dbfs: float = -50.0,
+        max_gain_db: float = 20.0,
+        gain_smoothing: float = 0.5,
+        lookahead_ms: float = 5.0,
+        release_ms: float = 50.0
+    ):
+        self.sample_rate = sample_rate
+        self.target_dbfs = target_dbfs
+        self.peak_limit = peak_limit
+        self.gate_power = 10 ** (gate_dbfs / 10)
+        self.max_gain = 10 ** (max_gain_db / 20)
+        self.gain_smoothing = gain_smoothing
+
+        self.block = max(1, int(0.01 * sample_rate))
+        # Per-block EMA coefficient giving a ~window_sec time constant
+        self.alpha = 1.0 - np.exp(-self.block / (window_sec * sample_rate))
+        self.lookahead = max(1, int(lookahead_ms * sample_rate / 1000))
+        # Per-sample decay of the limiter's gain reduction
+        self.release = np.exp(-1000.0 / (release_ms * sample_rate))
+
+        self.reset()
+
+    def reset(self):
+        self.power = None
+        self.gain = 1.0
+        self.delay = np.zeros(self.lookahead, dtype=np.float32)
+        self.remainder = np.zeros(0, dtype=np.float32)
+        # Limiter state: last look-ahead of required gains, current
+        # gain reduction (natural log)
+        self.required = np.ones(self.lookahead)
+        self.reduction = 0.0
+
+    def _update_loudness(self, chunk: np.ndarray):
+        audio = np.concatenate([self.remainder, chunk])
+        n_blocks = len(audio) // self.block
+        self.remainder = audio[n_blocks * self.block:]
+
+        if n_blocks == 0:
+            return
+
+        blocks = audio[:n_blocks * self.block].reshape(n_blocks, self.block)
+        powers = np.mean(blocks ** 2, axis=1)
+
+        # Absolute gate: silence and breaths do not pull the estimate down
+        powers = powers[powers > self.gate_power]
+        if len(powers) == 0:
+            return
+
+        if self.power is None:
+            self.power = float(np.mean(powers))
+            return
+
+        # Closed form of k sequential EMA updates
+        decay = (1.0 - self.alpha) ** np.arange(len(powers) - 1, -1, -1)
+        self.power = float(
+            (1.0 - self.alpha) ** len(powers) * self.power
+            + self.alpha * np.sum(decay * powers)
+        )
+
+    def _limit(self, audio: np.ndarray, n_out: int) -> np.ndarray:
+        window = np.lib.stride_tricks.sliding_window_view(
+            np.abs(audio), self.lookahead + 1
+        )[:n_out]
+        peaks = window.max(axis=1)
+        required = np.minimum(
+            1.0, self.peak_limit / np.maximum(peaks, 1e-9)
+        )
+
+        # Attack: average the required gain over the look-ahead. Every
+        # window averaged at sample n covers n, so the peak stays limited
+        history = np.concatenate([self.required, required])
+        total = np.concatenate([[0.0], np.cumsum(history)])
+        span = self.lookahead + 1
+        attack = (total[span:] - total[:-span]) / span
+        self.required = history[-self.lookahead:]
+
+        # Release: the reduction decays by `self.release` per sample,
+        # d[n] = max(want[n], release * d[n-1]), computed as a running
+        # max in blocks short enough for release ** -k to stay finite
+        want = -np.log(np.maximum(attack, 1e-9))
+        reduction = np.empty_like(want)
+        for start in range(0, n_out, 2048):
+            block = want[start:start + 2048]
+            decay = self.release ** np.arange(len(block))
+            held = np.maximum.accumulate(block / decay)
+            reduction[start:start + 2048] = decay * np.maximum(
+                held, self.reduction * self.release
+            )
+            self.reduction = reduction[start + len(block) - 1]
+
+        return audio[:n_out] * np.exp(-reduction)
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Normalize one chunk; returns the same number of samples,
+        delayed by the look-ahead
+        """
+        chunk = np.asarray(chunk, dtype=np.float32).reshape(-1)
+        if len(chunk) == 0:
+            return chunk
+
+        self._update_loudness(chunk)
+
+        target_gain = self.gain
+        if self.power is not None:
+            current_dbfs = 10 * np.log10(self.power)
+            target_gain = 10 ** ((self.target_dbfs - current_dbfs) / 20)
+            target_gain = min(target_gain, self.max_gain)
+            target_gain = self.gain + self.gain_smoothing * (
+                target_gain - self.gain
+            )
+
+        ramp = np.linspace(
+            self.gain, target_gain, len(chunk), dtype=np.float32
+        )
+        self.gain = target_gain
+
+        audio = np.concatenate([self.delay, chunk * ramp])
+        out = self._limit(audio, len(chunk))
+        self.delay = audio[len(chunk):]
+
+        return out.astype(np.float32)
+
+    def flush(self) -> np.ndarray:
+        """
+        Drain the look-ahead buffer at the end of an utterance
+        """
+        audio = np.concatenate([
+            self.delay,
+            np.zeros(self.lookahead, dtype=np.float32)
+        ])
+        out = self._limit(audio, self.lookahead)
+        self.delay = np.zeros(self.lookahead, dtype=np.float32)
+        return out.astype(np.float32)
+
+
+def normalize_stream(chunks, sample_rate: int = 24000, normalizer=None, **kwargs):
+    """
+    Normalize a TTS chunk iterator without waiting for the full utterance
+    """
+    if normalizer is None:
+        normalizer = StreamingNormalizer(sample_rate=sample_rate, **kwargs)
+
+    for chunk in chunks:
+        out = normalizer.process(chunk)
+        if len(out):
+            yield out
+
+    yield normalizer.flush()
+
+
 def trim_silence(
     audio_np: np.ndarray,
     threshold: float = 0.01
@@ -1,12 +1,39 @@
+import json
+import time
+import shutil
 import subprocess
 import tempfile
 import os
 
+import soundfile as sf
+
+from services.tts.audio_postprocess import normalize_stream
+from services.monitoring.metrics import TTS_AUDIO_SECONDS, TTS_WALL_SECONDS
+
+
+PIPER_MODEL = os.environ.get("DUBYOU_PIPER_MODEL", "voices/hi_IN-pratham-medium.onnx")
+# Pipeline language code the Piper voice speaks
+PIPER_LANG = os.environ.get("DUBYOU_PIPER_LANG", "hin_Deva")
+
 
 class PiperTTS:
-    def __init__(self, model_path):
+    def __init__(self, model_path=PIPER_MODEL):
         self.model_path = model_path
 
+        # Piper keeps the voice's sample rate in <model>.json
+        self.sample_rate = 22050
+        config_path = model_path + ".json"
+        if os.path.exists(config_path):
+            with open(config_path, encoding="utf-8") as f:
+                self.sample_rate = json.load(f)["audio"]["sample_rate"]
+
+    def warmup(self):
+        """Fail at load time, not mid-phrase, if piper or the voice is missing"""
+        if shutil.which("piper") is None:
+            raise RuntimeError("piper executable not found on PATH")
+        if not os.path.exists(self.model_path):
+            raise RuntimeError(f"Piper voice not found: {self.model_path}")
+
     def speak(self, text: str) -> str:
         fd, out_path = tempfile.mkstemp(suffix=".wav")
         os.close(fd)
@@ -30,3 +57,28 @@ class PiperTTS:
         p.wait()
 
         return out_path
+
+    def stream(self, text, user_id=None, language=None, normalizer=None):
+        """
+        Same interface as VoiceCloner.stream. Piper speaks in its own
+        fixed voice and language; `user_id` and `language` are ignored.
+        """
+        if not text.strip():
+            return
+
+        start = time.perf_counter()
+        path = self.speak(text)
+        try:
+            speech, _ = sf.read(path, dtype="float32")
+        finally:
+            os.remove(path)
+
+        for chunk in normalize_stream(
+            [speech],
+            sample_rate=self.sample_rate,
+            normalizer=normalizer
+        ):
+            TTS_AUDIO_SECONDS.inc(len(chunk) / self.sample_rate)
+            yield chunk
+
+        TTS_WALL_SECONDS.inc(time.perf_counter() - start)
@@ -0,0 +1,54 @@
+# ============================================================
+# speaker_cache.py — Bounded Per-Speaker Conditioning Cache
+# ============================================================
+
+import os
+import threading
+from collections import OrderedDict
+
+from services.monitoring.metrics import record_cache
+
+
+# Speakers kept per TTS model; each XTTS entry holds GPU tensors
+SPEAKER_CACHE_SIZE = int(os.environ.get("DUBYOU_SPEAKER_CACHE", "64"))
+
+
+class SpeakerCache:
+    """
+    LRU of per-speaker conditioning (XTTS latents, SpeechT5 x-vectors).
+    The least recently used speaker is dropped past `max_size`.
+    """
+
+    def __init__(self, name: str, max_size: int = SPEAKER_CACHE_SIZE):
+        self.name = name
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, load):
+        """
+        Cached value for `key`, calling `load()` on a miss. Loading runs
+        outside the lock; two concurrent misses both load, last one wins.
+        """
+        with self._lock:
+            hit = key in self._items
+            if hit:
+                self._items.move_to_end(key)
+                value = self._items[key]
+        record_cache(self.name, hit)
+        if hit:
+            return value
+
+        value = load()
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return value
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
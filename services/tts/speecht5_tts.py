@@ -1,4 +1,10 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
 import torch
+import numpy as np
 import soundfile as sf
 import tempfile
 import os
@@ -8,40 +14,186 @@ from transformers import (
     SpeechT5HifiGan
 )
 
+from services.tts.audio_postprocess import normalize_stream
+from services.tts.speaker_cache import SpeakerCache
+from services.voice_identity.storage.load_embedding import load_embedding
+from services.monitoring.metrics import TTS_AUDIO_SECONDS, TTS_WALL_SECONDS
+
+
 class SpeechT5TTS:
-    def __init__(self):
+    # Batches phrases across sessions on its own thread; the pipeline
+    # calls stream() directly instead of through the scheduler
+    batched = True
+
+    def __init__(self, max_batch=8, max_wait_ms=15):
+        """
+        SpeechT5 + HiFi-GAN, speaking with the enrolled x-vector.
+        Phrases submitted within `max_wait_ms` of each other are
+        synthesized together (up to `max_batch`).
+        """
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.sample_rate = 16000
 
         self.processor = SpeechT5Processor.from_pretrained(
             "microsoft/speecht5_tts"
         )
         self.model = SpeechT5ForTextToSpeech.from_pretrained(
             "microsoft/speecht5_tts"
-        ).to(self.device)
+        ).to(self.device).eval()
 
         self.vocoder = SpeechT5HifiGan.from_pretrained(
             "microsoft/speecht5_hifigan"
-        ).to(self.device)
+        ).to(self.device).eval()
 
-    def speak(self, text, speaker_embedding_np):
-        speaker_embedding = torch.tensor(
-            speaker_embedding_np
-        ).unsqueeze(0).to(self.device)
+        # Waveform samples per spectrogram frame
+        self.hop = int(np.prod(self.vocoder.config.upsample_rates))
+
+        # user_id -> (1, 512) speaker tensor on self.device
+        self._embeddings = SpeakerCache("speecht5_speaker")
+
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def warmup(self):
+        silent = torch.zeros(1, 512, device=self.device)
+        self.synthesize_batch(["Hello.", "How are you today?"], [silent, silent])
 
+    def speaker_embedding(self, user_id):
+        return self._embeddings.get(
+            user_id,
+            lambda: torch.tensor(
+                load_embedding(user_id), dtype=torch.float32
+            ).unsqueeze(0).to(self.device)
+        )
+
+    def prepare_voice(self, user_id):
+        """Load the user's speaker tensor ahead of use"""
+        self.speaker_embedding(user_id)
+
+    def synthesize_batch(self, texts, speaker_embeddings):
+        """
+        texts: list of str, speaker_embeddings: matching (1, 512) tensors.
+        One padded spectrogram pass and one vocoder pass for the whole
+        batch. Returns a float32 array per text at self.sample_rate.
+        """
         inputs = self.processor(
-            text=text,
+            text=list(texts),
+            padding=True,
             return_tensors="pt"
         ).to(self.device)
 
         with torch.no_grad():
-            speech = self.model.generate_speech(
+            spectrograms, lengths = self.model.generate_speech(
                 inputs["input_ids"],
-                speaker_embedding,
-                vocoder=self.vocoder
+                torch.cat(speaker_embeddings),
+                attention_mask=inputs["attention_mask"],
+                return_output_lengths=True
             )
+            if spectrograms.dim() == 2:
+                spectrograms = spectrograms.unsqueeze(0)
+            waveforms = self.vocoder(spectrograms)
+            if waveforms.dim() == 1:
+                waveforms = waveforms.unsqueeze(0)
+
+        waveforms = waveforms.cpu().numpy().astype(np.float32)
+        lengths = torch.as_tensor(lengths).reshape(-1).tolist()
+        return [
+            wave[:int(n) * self.hop]
+            for wave, n in zip(waveforms, lengths)
+        ]
+
+    def synthesize(self, text, speaker_embedding_np):
+        """
+        Returns float32 audio at self.sample_rate
+        """
+        speaker_embedding = torch.tensor(
+            speaker_embedding_np, dtype=torch.float32
+        ).unsqueeze(0).to(self.device)
+        return self.synthesize_batch([text], [speaker_embedding])[0]
+
+    def speak(self, text, speaker_embedding_np):
+        speech = self.synthesize(text, speaker_embedding_np)
 
         fd, out_path = tempfile.mkstemp(suffix=".wav")
         os.close(fd)
-        sf.write(out_path, speech.cpu().numpy(), 16000)
+        sf.write(out_path, speech, self.sample_rate)
 
         return out_path
+
+    # --------------------------------------------------------
+    # Micro-batching
+    # --------------------------------------------------------
+    def submit(self, text, user_id):
+        """
+        Queue a phrase; returns a Future with its float32 audio
+        """
+        future = Future()
+        self._queue.put((text, user_id, future))
+
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._batch_loop,
+                    name="speecht5-batcher",
+                    daemon=True
+                )
+                self._worker.start()
+        return future
+
+    def _batch_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            # A missing voice fails only its own phrase
+            ready, speakers = [], []
+            for text, uid, future in batch:
+                try:
+                    speakers.append(self.speaker_embedding(uid))
+                    ready.append((text, future))
+                except Exception as e:
+                    future.set_exception(e)
+            if not ready:
+                continue
+
+            try:
+                waves = self.synthesize_batch([text for text, _ in ready], speakers)
+            except Exception as e:
+                for _, future in ready:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), wave in zip(ready, waves):
+                future.set_result(wave)
+
+    def stream(self, text, user_id, language=None, normalizer=None):
+        """
+        Same interface as VoiceCloner.stream, in the user's enrolled
+        x-vector. SpeechT5 speaks English only; `language` is ignored.
+        """
+        if not text.strip():
+            return
+
+        start = time.perf_counter()
+        speech = self.submit(text, user_id).result()
+
+        for chunk in normalize_stream(
+            [speech],
+            sample_rate=self.sample_rate,
+            normalizer=normalizer
+        ):
+            TTS_AUDIO_SECONDS.inc(len(chunk) / self.sample_rate)
+            yield chunk
+
+        TTS_WALL_SECONDS.inc(time.perf_counter() - start)
@@ -2,6 +2,8 @@
 # voice_cloner.py — Phase 3 Voice Cloning TTS
 # ============================================================
 
+import time
+
 import torch
 import soundfile as sf
 import tempfile
@@ -9,6 +11,11 @@ import os
 
 from TTS.api import TTS
 
+from services.tts.audio_postprocess import StreamingNormalizer, normalize_stream
+from services.tts.speaker_cache import SpeakerCache
+from services.voice_identity.config import VOICE_STORAGE_DIR
+from services.monitoring.metrics import TTS_AUDIO_SECONDS, TTS_WALL_SECONDS
+
 
 class VoiceCloner:
     def __init__(self):
@@ -23,6 +30,12 @@ class VoiceCloner:
             gpu=torch.cuda.is_available()
         )
 
+        self.model = self.tts.synthesizer.tts_model
+        self.sample_rate = self.model.config.audio.output_sample_rate
+
+        # reference_wav -> (gpt_cond_latent, speaker_embedding)
+        self._latents = SpeakerCache("xtts_latents")
+
     def synthesize(
         self,
         text: str,
@@ -49,3 +62,65 @@ class VoiceCloner:
         )
 
         return tmp_path
+
+    def warmup(self):
+        """
+        One short synthesis with a built-in XTTS speaker (no enrolled
+        reference exists at startup)
+        """
+        self.tts.tts(
+            text="नमस्ते",
+            speaker=self.tts.speakers[0],
+            language="hi"
+        )
+
+    def reference_path(self, user_id: str) -> str:
+        return os.path.join(VOICE_STORAGE_DIR, f"{user_id}_reference.wav")
+
+    def prepare_voice(self, user_id: str):
+        """Compute and cache the user's conditioning latents ahead of use"""
+        self._get_latents(self.reference_path(user_id))
+
+    def _get_latents(self, reference_wav: str):
+        return self._latents.get(
+            reference_wav,
+            lambda: self.model.get_conditioning_latents(audio_path=[reference_wav])
+        )
+
+    def stream(
+        self,
+        text: str,
+        user_id: str,
+        language: str = "hi",
+        normalizer: StreamingNormalizer = None
+    ):
+        """
+        Yield loudness-normalized float32 chunks as XTTS produces them
+        """
+        if not text.strip():
+            return
+
+        start = time.perf_counter()
+        gpt_cond_latent, speaker_embedding = self._get_latents(
+            self.reference_path(user_id)
+        )
+
+        chunks = (
+            chunk.squeeze().cpu().numpy()
+            for chunk in self.model.inference_stream(
+                text,
+                language,
+                gpt_cond_latent,
+                speaker_embedding
+            )
+        )
+
+        for chunk in normalize_stream(
+            chunks,
+            sample_rate=self.sample_rate,
+            normalizer=normalizer
+        ):
+            TTS_AUDIO_SECONDS.inc(len(chunk) / self.sample_rate)
+            yield chunk
+
+        TTS_WALL_SECONDS.inc(time.perf_counter() - start)
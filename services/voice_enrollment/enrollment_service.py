@@ -8,10 +8,20 @@ import torch
 import torchaudio
 
 from .vad import trim_silence
-from .speaker_encoder import SpeakerEncoder
 from .storage import save_profile
 
-_encoder = SpeakerEncoder()
+_encoder = None
+
+
+def _get_encoder():
+    """
+    ECAPA encoder is built on first enrollment, not at import
+    """
+    global _encoder
+    if _encoder is None:
+        from .speaker_encoder import SpeakerEncoder
+        _encoder = SpeakerEncoder()
+    return _encoder
 
 
 def _resample_if_needed(audio_np: np.ndarray, sr: int, target_sr: int = 16000):
@@ -53,7 +63,7 @@ def enroll_user(audio_np: np.ndarray, sr: int):
     # --------------------------------------------------------
     # 3. Speaker embedding (Voice Identity)
     # --------------------------------------------------------
-    embedding = _encoder.encode(clean_audio)
+    embedding = _get_encoder().encode(clean_audio)
 
     # --------------------------------------------------------
     # 4. Persist profile
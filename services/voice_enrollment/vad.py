@@ -15,7 +15,10 @@ def _load_vad():
     return _vad_model, _vad_utils
 
 
-def trim_silence(audio_np, sr=16000):
+def speech_timestamps(audio_np, sr=16000):
+    """
+    [{"start": sample, "end": sample}, ...] for each speech region
+    """
     if sr not in (8000, 16000):
         raise ValueError(
             f"Silero VAD requires 8k or 16k audio, got {sr}"
@@ -24,13 +27,17 @@ def trim_silence(audio_np, sr=16000):
     model, utils = _load_vad()
     (get_speech_timestamps, _, _, _, _) = utils
 
-    audio_tensor = torch.from_numpy(audio_np)
-    timestamps = get_speech_timestamps(
-        audio_tensor,
+    return get_speech_timestamps(
+        torch.from_numpy(audio_np),
         model,
         sampling_rate=sr
     )
 
+
+def trim_silence(audio_np, sr=16000):
+    timestamps = speech_timestamps(audio_np, sr)
+    audio_tensor = torch.from_numpy(audio_np)
+
     if not timestamps:
         return audio_np
 
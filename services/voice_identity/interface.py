@@ -1,15 +1,20 @@
 from services.voice_identity.capture.quality_checks import validate_audio
 from services.voice_identity.speaker_encoder.normalize import normalize_audio
-from services.voice_identity.speaker_encoder.encoder import SpeakerEncoder
 from services.voice_identity.storage.save_embedding import save_voice_identity
+from services.voice_identity.speaker_encoder.encoder import SpeakerEncoder
 
 
-def enroll_voice(audio_np, sr, user_id):
+def enroll_voice(audio_np, sr, user_id, encoder=None):
+    """
+    `encoder` is a shared SpeakerEncoder (the app passes the preloaded
+    one); a new one is built when omitted
+    """
     validate_audio(audio_np, sr)
 
     audio_np = normalize_audio(audio_np)
 
-    encoder = SpeakerEncoder()
+    if encoder is None:
+        encoder = SpeakerEncoder()
     embedding = encoder.encode(audio_np, sr)
 
     save_voice_identity(user_id, audio_np, embedding)
@@ -0,0 +1,21 @@
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.replay import stub_backends
+from services.pipeline.scheduler import SCHEDULER
+
+
+@pytest.fixture
+def backends():
+    """Factory of zero-latency stub backends (a BACKEND_FACTORY)"""
+    def factory():
+        args = SimpleNamespace(asr_latency=0.0, mt_latency=0.0, tts_latency=0.0)
+        return stub_backends(args)
+    return factory
+
+
+@pytest.fixture
+def inline_scheduler(monkeypatch):
+    """Run pipeline stages on the calling thread"""
+    monkeypatch.setattr(SCHEDULER, "enabled", False)
@@ -0,0 +1,71 @@
+import numpy as np
+
+from services.tts.audio_postprocess import StreamingNormalizer, normalize_stream
+
+
+SR = 24000
+
+
+def tone(seconds, amplitude, sr=SR):
+    t = np.arange(int(seconds * sr)) / sr
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def dbfs(audio):
+    return 20 * np.log10(np.sqrt(np.mean(audio ** 2)))
+
+
+def test_process_keeps_length_and_delays_by_lookahead():
+    normalizer = StreamingNormalizer(sample_rate=SR)
+    chunk = tone(0.1, 0.1)
+    out = normalizer.process(chunk)
+    assert len(out) == len(chunk)
+    assert np.all(out[:normalizer.lookahead] == 0)
+    assert len(normalizer.flush()) == normalizer.lookahead
+
+
+def test_converges_to_target_and_limits_peaks():
+    normalizer = StreamingNormalizer(sample_rate=SR, target_dbfs=-14.0)
+    out = [normalizer.process(c) for c in np.split(tone(4.0, 0.05), 40)]
+    tail = np.concatenate(out[-10:])
+    assert abs(dbfs(tail) - -14.0) < 1.5
+    assert np.max(np.abs(np.concatenate(out))) <= normalizer.peak_limit + 1e-6
+
+
+def test_silence_does_not_pull_gain_up():
+    normalizer = StreamingNormalizer(sample_rate=SR)
+    for c in np.split(tone(2.0, 0.1), 20):
+        normalizer.process(c)
+    gain = normalizer.gain
+    for _ in range(20):
+        normalizer.process(np.zeros(SR // 10, dtype=np.float32))
+    assert abs(normalizer.gain - gain) < 1e-3
+
+
+def test_shared_normalizer_carries_level_across_phrases():
+    normalizer = StreamingNormalizer(sample_rate=SR)
+    first = list(normalize_stream(np.split(tone(2.0, 0.05), 20), SR, normalizer))
+    second = list(normalize_stream(np.split(tone(0.5, 0.05), 5), SR, normalizer))
+
+    # A fresh normalizer would start the next phrase at unity gain
+    fresh = list(normalize_stream(np.split(tone(0.5, 0.05), 5), SR))
+    assert abs(dbfs(second[0]) - dbfs(first[-2])) < 1.0
+    assert dbfs(fresh[0]) < dbfs(second[0]) - 6.0
+
+
+def test_limiter_ramps_gain_instead_of_clipping():
+    # gain_smoothing=0 holds the loudness gain at 1: only the limiter acts
+    normalizer = StreamingNormalizer(sample_rate=SR, gain_smoothing=0.0)
+    audio = np.concatenate([
+        np.full(2400, 0.3), np.full(2400, 1.5), np.full(4800, 0.3)
+    ]).astype(np.float32)
+    out = np.concatenate(
+        [normalizer.process(c) for c in np.split(audio, 20)] + [normalizer.flush()]
+    )
+    delayed = np.concatenate([np.zeros(normalizer.lookahead), audio])
+    gain = out[normalizer.lookahead:] / delayed[normalizer.lookahead:]
+
+    assert np.max(np.abs(out)) <= normalizer.peak_limit + 1e-6
+    assert np.max(np.abs(np.diff(gain))) < 0.01
+    # Released again well after the transient
+    assert gain[-1] > 0.95
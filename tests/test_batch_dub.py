@@ -0,0 +1,145 @@
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from services.pipeline.batch_dub import FADE_SECONDS, SAMPLE_RATE, BatchDubber, _fit
+
+
+def energy_vad(audio, sr):
+    """Runs of loud 100 ms frames"""
+    frame = sr // 10
+    n = len(audio) // frame
+    loud = np.abs(audio[:n * frame]).reshape(n, frame).max(axis=1) > 0.05
+    segments, start = [], None
+    for i, on in enumerate(list(loud) + [False]):
+        if on and start is None:
+            start = i
+        elif not on and start is not None:
+            segments.append({"start": start * frame, "end": i * frame})
+            start = None
+    return segments
+
+
+class StubASR:
+    def transcribe_clips(self, audio, clips, batch_size=8):
+        return [f"clip {clip['start']}" for clip in clips]
+
+
+class StubEmotion:
+    def detect_batch(self, texts):
+        return ["neutral"] * len(texts)
+
+
+class StubTranslator:
+    def __init__(self, fail_after=None):
+        self.calls = 0
+        self.fail_after = fail_after
+
+    def translate_batch(self, texts, src_lang, tgt_lang, emotions=None):
+        self.calls += 1
+        if self.fail_after is not None and self.calls > self.fail_after:
+            raise KeyboardInterrupt
+        return list(texts)
+
+
+class StubTTS:
+    sample_rate = SAMPLE_RATE
+
+    def stream(self, text, user_id, language="hi", normalizer=None):
+        # 0.6 s of speech per phrase, in two pieces
+        for _ in range(2):
+            yield np.full(int(0.3 * SAMPLE_RATE), 0.5, dtype=np.float32)
+
+
+def dubber(translator=None):
+    return BatchDubber("user", backends={
+        "asr": StubASR(),
+        "emotion": StubEmotion(),
+        "translator": translator or StubTranslator(),
+        "tts": StubTTS(),
+        "vad": energy_vad,
+    })
+
+
+def bursts(seconds):
+    """1 s of speech, 1 s of silence, repeated"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    audio = 0.2 * np.sin(2 * np.pi * 200 * t)
+    audio[(t % 2.0) >= 1.0] = 0.0
+    return audio.astype(np.float32)
+
+
+def write(path, audio):
+    sf.write(str(path), audio, SAMPLE_RATE, subtype="PCM_16")
+    return str(path)
+
+
+def test_split_block_carries_unfinished_speech():
+    audio = np.concatenate([bursts(2.0), np.full(SAMPLE_RATE // 2, 0.2, dtype=np.float32)])
+    segments, carry_from = dubber()._split_block(audio, final=False, max_carry=10 * SAMPLE_RATE)
+
+    # The burst running into the block end is carried, the first is done
+    assert carry_from == 2 * SAMPLE_RATE
+    assert segments == [{"start": 0, "end": SAMPLE_RATE}]
+
+    segments, carry_from = dubber()._split_block(audio, final=True, max_carry=10 * SAMPLE_RATE)
+    assert carry_from == len(audio) and len(segments) == 2
+
+    # Speech longer than max_carry is cut instead of carried
+    _, carry_from = dubber()._split_block(audio, final=False, max_carry=SAMPLE_RATE // 4)
+    assert carry_from == len(audio)
+
+
+def test_fit_keeps_short_voices_and_trims_long_ones():
+    voice = np.ones(800, dtype=np.float32)
+    assert _fit(voice, 1000, SAMPLE_RATE) is voice
+    assert len(_fit(voice, 0, SAMPLE_RATE)) == 0
+
+    # Too short to time-stretch: trimmed with a fade-out
+    fitted = _fit(voice, 600, SAMPLE_RATE)
+    assert len(fitted) == 600
+    assert fitted[-1] == 0.0 and fitted[0] == 1.0
+    assert np.all(fitted[:600 - int(FADE_SECONDS * SAMPLE_RATE)] == 1.0)
+
+
+def test_fit_speeds_up_before_trimming():
+    pytest.importorskip("torchaudio")
+    voice = np.sin(np.arange(16000) / 10).astype(np.float32)
+    fitted = _fit(voice, 14000, SAMPLE_RATE)
+    assert len(fitted) == 14000
+    assert abs(fitted[-1]) < 0.1
+
+
+def test_output_keeps_the_input_timing(tmp_path):
+    audio = bursts(6.0)
+    out = dubber().run(write(tmp_path / "in.wav", audio), str(tmp_path / "out.wav"), block_seconds=2.5)
+
+    dubbed, sr = sf.read(out, dtype="float32")
+    assert sr == SAMPLE_RATE and len(dubbed) == len(audio)
+    # Each voice starts with its segment, silence fills the rest of its slot
+    for start in (0, 2, 4):
+        assert dubbed[start * SAMPLE_RATE + 100] > 0.4
+        assert dubbed[start * SAMPLE_RATE + SAMPLE_RATE] == 0.0
+    assert not os.path.exists(out + ".ckpt.json")
+
+
+def test_interrupted_run_resumes_from_its_checkpoint(tmp_path):
+    src = write(tmp_path / "in.wav", bursts(8.0))
+    expected, _ = sf.read(dubber().run(src, str(tmp_path / "ref.wav"), block_seconds=2.5))
+
+    out = str(tmp_path / "out.wav")
+    with pytest.raises(KeyboardInterrupt):
+        dubber(StubTranslator(fail_after=1)).run(src, out, block_seconds=2.5)
+    assert os.path.exists(out + ".ckpt.json")
+
+    dubber().run(src, out, block_seconds=2.5)
+    resumed, _ = sf.read(out)
+    assert np.allclose(resumed, expected, atol=1e-4)
+
+
+def test_empty_input(tmp_path):
+    out = dubber().run(write(tmp_path / "empty.wav", np.zeros(0, dtype=np.float32)), str(tmp_path / "out.wav"))
+    assert sf.info(out).frames == 0
+    assert not os.path.exists(out + ".ckpt.json")
@@ -0,0 +1,151 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from benchmarks.replay import SAMPLE_RATE, synthetic_speech
+from services.pipeline import session as pipeline
+from services.pipeline.checkpoint import CheckpointStore
+
+
+CHUNK = 1600
+AUDIO = synthetic_speech(20)
+CHUNKS = [AUDIO[i:i + CHUNK] for i in range(0, len(AUDIO), CHUNK)]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch, backends, inline_scheduler):
+    store = CheckpointStore(directory=str(tmp_path), interval=0.0)
+    monkeypatch.setattr(pipeline, "STORE", store)
+    monkeypatch.setattr(pipeline, "SESSIONS", {})
+    monkeypatch.setattr(pipeline, "BACKEND_FACTORY", backends)
+    return store
+
+
+def crash(user_id):
+    """Lose the in-memory session without any cleanup"""
+    pipeline.SESSIONS.pop(user_id)
+
+
+def replay(user_id, kill_before=(), kill_after_audio=None):
+    """
+    Feed CHUNKS; kill the session before the chunk indices in
+    kill_before, or after the given number of audio pieces of a phrase
+    (mid-emission). Returns (translations, audio samples per language).
+    """
+    translations = []
+    audio = {}
+    pieces = 0
+    for i, chunk in enumerate(CHUNKS):
+        if i in kill_before:
+            crash(user_id)
+        session = pipeline.get_session(user_id)
+        for kind, value in pipeline.stream_chunk(session, chunk, SAMPLE_RATE):
+            if kind == "translation":
+                translations.append(value)
+            elif kind == "audio":
+                lang, _, piece = value
+                audio[lang] = audio.get(lang, 0) + len(piece)
+                pieces += 1
+                if pieces == kill_after_audio:
+                    crash(user_id)
+                    break
+    return translations, audio
+
+
+def test_snapshot_round_trip(store, backends):
+    session = pipeline.get_session("round-trip")
+    session.set_target_langs(["hin_Deva", "spa_Latn"])
+    for chunk in CHUNKS[:25]:
+        list(pipeline.stream_chunk(session, chunk, SAMPLE_RATE))
+    store.save(session)
+
+    restored = pipeline.SessionState("round-trip", backends=backends())
+    assert store.restore(restored)
+    assert restored.phrase_seq == session.phrase_seq
+    assert restored.target_langs == session.target_langs
+    assert restored.last_translations == session.last_translations
+    assert restored.buffer.start_sample == session.buffer.start_sample
+    assert np.allclose(restored.buffer.buffer, session.buffer.buffer, atol=1e-4)
+    assert restored.committer.committed_until == session.committer.committed_until
+    assert restored.committer.prev_words == session.committer.prev_words
+
+
+@pytest.mark.parametrize("kill_before", [(5,), (13, 14), (20, 31, 47, 60), (40, 80, 120, 160)])
+def test_kill_between_chunks_loses_and_repeats_nothing(store, kill_before):
+    baseline = replay("baseline")
+    assert baseline[0]
+    assert replay(f"killed-{kill_before}", kill_before=set(kill_before)) == baseline
+
+
+@pytest.mark.parametrize("kill_after_audio", [1, 2, 5])
+def test_kill_mid_emission_resumes_the_phrase(store, kill_after_audio):
+    base_text, base_audio = replay("baseline")
+    text, audio = replay(f"mid-{kill_after_audio}", kill_after_audio=kill_after_audio)
+
+    # The phrase is finished after the restart, not re-recognised, and
+    # its translation text (recorded as sent) is not repeated
+    assert text == base_text
+
+    # At-least-once: only the piece in flight at the kill is repeated
+    piece = int(0.25 * 24000)
+    for lang, samples in base_audio.items():
+        assert samples <= audio[lang] <= samples + piece
+
+
+def test_exists_honours_max_age(store):
+    session = pipeline.get_session("aged")
+    store.save(session)
+    assert store.exists("aged")
+
+    old = time.time() - store.max_age - 1
+    os.utime(store.path("aged"), (old, old))
+    assert not store.exists("aged")
+
+
+def test_gc_removes_only_old_files(store, backends):
+    for user_id in ("old", "new"):
+        session = pipeline.SessionState(user_id, backends=backends())
+        store.append(session, CHUNKS[0], 0)
+        store.save(session)
+
+    old = time.time() - store.max_age - 1
+    for suffix in (".npz", ".pcm"):
+        os.utime(store.path("old", suffix), (old, old))
+
+    assert store.gc() == 2
+    assert not os.path.exists(store.path("old"))
+    assert store.exists("new")
+
+
+def test_ended_and_expired_sessions_lose_their_snapshots(store):
+    for user_id in ("ended", "idle", "active"):
+        session = pipeline.get_session(user_id)
+        list(pipeline.stream_chunk(session, CHUNKS[0], SAMPLE_RATE))
+        store.save(session)
+
+    assert pipeline.end_session("ended")
+    assert "ended" not in pipeline.SESSIONS
+    assert not os.path.exists(store.path("ended"))
+
+    pipeline.SESSIONS["idle"].last_active -= 60
+    assert pipeline.expire_sessions(idle_seconds=30) == 1
+    assert not store.exists("idle")
+    assert store.exists("active")
+
+
+def test_progress_resumes_from_the_last_complete_record(store):
+    session = pipeline.get_session("torn")
+    session.outbox = {"seq": 1, "translations": {"hin_Deva": "x"}}
+    store.save(session)
+    session.outbox.update(texted=True, emitted={"hin_Deva": 100}, done=[])
+    store.save_progress(session)
+    with open(store.path("torn", ".out"), "ab") as f:
+        f.write(b'{"seq": 1, "emitted": {"hin_Deva": 2')  # torn by the crash
+    store.close("torn")
+
+    restored = pipeline.SessionState("torn", backends=pipeline.BACKEND_FACTORY())
+    assert store.restore(restored)
+    assert restored.outbox["translations"] == {"hin_Deva": "x"}
+    assert restored.outbox["texted"] and restored.outbox["emitted"] == {"hin_Deva": 100}
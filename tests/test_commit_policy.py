@@ -0,0 +1,66 @@
+from services.asr.commit_policy import CommitPolicy
+
+
+SR = 16000
+
+
+def word(text, start, end):
+    return (text, int(start * SR), int(end * SR))
+
+
+WORDS = [
+    word("hello", 0.0, 0.4),
+    word("there", 0.5, 0.9),
+    word("friend.", 1.0, 1.4),
+    word("how", 1.6, 1.9),
+    word("are", 2.0, 2.2),
+]
+
+
+def test_nothing_commits_before_words_are_stable():
+    policy = CommitPolicy()
+    # First hypothesis: nothing to agree with yet
+    assert policy.update(WORDS[:3], window_end=int(2.0 * SR)) == (None, None)
+    assert policy.has_pending()
+
+
+def test_punctuation_commits_once_the_hypothesis_repeats():
+    policy = CommitPolicy()
+    policy.update(WORDS[:3], window_end=int(2.0 * SR))
+    phrase, until = policy.update(WORDS, window_end=int(2.4 * SR))
+    assert phrase == "hello there friend."
+    assert until == WORDS[2][2]
+    # The rest stays pending and is not emitted twice
+    assert policy.has_pending()
+    assert policy.update(WORDS, window_end=int(2.4 * SR)) == (None, None)
+
+
+def test_words_near_the_window_end_are_unstable():
+    policy = CommitPolicy()
+    policy.update(WORDS[:3], window_end=int(1.5 * SR))
+    # friend. ends within the stability margin of the window end
+    assert policy.update(WORDS[:3], window_end=int(1.5 * SR)) == (None, None)
+
+
+def test_pause_commits_everything_heard():
+    policy = CommitPolicy()
+    phrase, until = policy.update(WORDS[3:], window_end=int(2.3 * SR), pause_seconds=0.5)
+    assert phrase == "how are"
+    assert until == WORDS[4][2]
+    assert not policy.has_pending()
+
+
+def test_max_latency_commits_stable_words_without_punctuation():
+    words = [word(f"w{i}", 0.5 * i, 0.5 * i + 0.4) for i in range(6)]
+    policy = CommitPolicy(max_latency=2.0)
+    policy.update(words, window_end=int(3.0 * SR))
+    phrase, _ = policy.update(words, window_end=int(3.0 * SR))
+    assert phrase == "w0 w1 w2 w3 w4"
+
+
+def test_reset_keeps_the_commit_point():
+    policy = CommitPolicy()
+    policy.update(WORDS[:3], window_end=int(2.0 * SR), pause_seconds=1.0)
+    policy.reset()
+    assert not policy.has_pending()
+    assert policy.update(WORDS[:3], window_end=int(2.0 * SR), pause_seconds=1.0) == (None, None)
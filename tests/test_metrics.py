@@ -0,0 +1,53 @@
+import pytest
+
+from services.monitoring.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_counter_and_gauge_render():
+    counter = Counter("c_total", "Things counted", labelnames=("stage",))
+    counter.inc(stage="asr")
+    counter.inc(2, stage="asr")
+    assert counter.render().splitlines() == [
+        "# HELP c_total Things counted",
+        "# TYPE c_total counter",
+        'c_total{stage="asr"} 3.0',
+    ]
+
+    gauge = Gauge("g", "A level")
+    gauge.set(5)
+    gauge.dec(2)
+    assert gauge.render().splitlines()[1:] == ["# TYPE g gauge", "g 3.0"]
+
+    assert Gauge("cb", "Read at scrape", fn=lambda: 7).render().endswith("cb 7.0")
+
+
+def test_callback_gauge_rejects_labels():
+    with pytest.raises(ValueError):
+        Gauge("cb", "Read at scrape", labelnames=("worker",), fn=lambda: 1)
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("h_seconds", "Durations", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    assert histogram.render().splitlines()[2:] == [
+        'h_seconds_bucket{le="0.1"} 2',
+        'h_seconds_bucket{le="1.0"} 3',
+        'h_seconds_bucket{le="+Inf"} 4',
+        "h_seconds_sum 3.65",
+        "h_seconds_count 4",
+    ]
+
+
+def test_label_values_are_escaped():
+    counter = Counter("e_total", "Escaping", labelnames=("path",))
+    counter.inc(path='C:\\dir "x"\n')
+    assert counter.render().splitlines()[-1] == 'e_total{path="C:\\\\dir \\"x\\"\\n"} 1.0'
+
+
+def test_registry_returns_the_registered_metric():
+    registry = Registry()
+    first = registry.counter("r_total", "Once")
+    assert registry.counter("r_total", "Twice") is first
+    first.inc()
+    assert registry.render() == "# HELP r_total Once\n# TYPE r_total counter\nr_total 1.0\n"
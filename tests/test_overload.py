@@ -0,0 +1,19 @@
+from services.pipeline.overload import TIERS
+from services.translation.languages import LANGUAGES
+from services.tts.piper_tts import PIPER_LANG
+
+
+def test_every_tier_speaks_every_language():
+    for tier in TIERS:
+        for lang in LANGUAGES:
+            assert tier.tts_model(lang), (tier.name, lang)
+            assert tier.tts_model(lang) in tier.models()
+
+
+def test_cheaper_engines_only_for_their_languages():
+    low, minimal = TIERS[2], TIERS[3]
+    assert low.tts_model("eng_Latn") == "tts_speecht5"
+    assert low.tts_model("hin_Deva") == "tts"
+    assert minimal.tts_model(PIPER_LANG) == "tts_piper"
+    other = next(lang for lang in LANGUAGES if lang != PIPER_LANG)
+    assert minimal.tts_model(other) == "tts"
@@ -0,0 +1,18 @@
+import pytest
+
+from services.tts.piper_tts import PiperTTS
+
+
+def test_warmup_fails_without_piper_or_voice(tmp_path, monkeypatch):
+    voice = tmp_path / "voice.onnx"
+
+    monkeypatch.setattr("shutil.which", lambda name: None)
+    with pytest.raises(RuntimeError, match="piper executable"):
+        PiperTTS(str(voice)).warmup()
+
+    monkeypatch.setattr("shutil.which", lambda name: "/usr/bin/piper")
+    with pytest.raises(RuntimeError, match="voice not found"):
+        PiperTTS(str(voice)).warmup()
+
+    voice.write_bytes(b"")
+    PiperTTS(str(voice)).warmup()
@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from services.pipeline.scheduler import DeadlineScheduler
+
+
+def blocked(scheduler, tenant="blocker"):
+    """Occupy the single executor thread until the returned event is set"""
+    release = threading.Event()
+    started = threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+
+    future = scheduler.submit("speculative", tenant, hold)
+    started.wait(5)
+    return release, future
+
+
+def test_earliest_deadline_runs_first():
+    scheduler = DeadlineScheduler(workers=1, fairness=0.0, enabled=True)
+    release, _ = blocked(scheduler)
+
+    order = []
+    now = time.monotonic()
+    futures = [
+        scheduler.submit("tts", f"t{i}", order.append, i, deadline=now + due)
+        for i, due in enumerate((3.0, 1.0, 2.0))
+    ]
+    release.set()
+    for future in futures:
+        future.result(5)
+    assert order == [1, 2, 0]
+
+
+def test_no_call_waits_past_max_wait():
+    scheduler = DeadlineScheduler(workers=1, max_wait=0.0, fairness=0.0, enabled=True)
+    release, _ = blocked(scheduler)
+
+    order = []
+    first = scheduler.submit("speculative", "a", order.append, "best-effort")
+    second = scheduler.submit("asr", "b", order.append, "urgent")
+    release.set()
+    first.result(5)
+    second.result(5)
+    # Both capped at submission time + max_wait: FIFO, not starved
+    assert order == ["best-effort", "urgent"]
+
+
+def test_tenant_limit_and_fairness():
+    scheduler = DeadlineScheduler(workers=2, tenant_limit=1, fairness=0.0, enabled=True)
+    running = {"a": 0}
+    peak = {"a": 0}
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            running["a"] += 1
+            peak["a"] = max(peak["a"], running["a"])
+        time.sleep(0.01)
+        with lock:
+            running["a"] -= 1
+
+    futures = [scheduler.submit("asr", "a", work) for _ in range(5)]
+    for future in futures:
+        future.result(5)
+    assert peak["a"] == 1
+
+    # Recent executor time pushes a tenant's deadlines back
+    fair = DeadlineScheduler(workers=1, fairness=1.0, enabled=True)
+    fair.run("asr", "busy", time.sleep, 0.05)
+    assert fair._tenant_usage("busy", time.monotonic()) > 0.04
+    assert fair._tenant_usage("idle", time.monotonic()) == 0.0
+
+
+def test_nested_calls_and_disabled_scheduler_run_inline():
+    scheduler = DeadlineScheduler(workers=1, enabled=True)
+
+    def outer():
+        # Would deadlock on the single executor thread if queued
+        return scheduler.run("translate", "a", lambda: "inner")
+
+    assert scheduler.run("asr", "a", outer) == "inner"
+
+    disabled = DeadlineScheduler(workers=1, enabled=False)
+    assert disabled.run("asr", "a", threading.current_thread) is threading.current_thread()
+    assert not disabled._threads
+
+
+def test_exceptions_reach_the_caller():
+    scheduler = DeadlineScheduler(workers=1, enabled=True)
+    future = scheduler.submit("asr", "a", lambda: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        future.result(5)
+
+
+def test_iterate_pulls_one_item_per_call():
+    scheduler = DeadlineScheduler(workers=1, enabled=True)
+    threads = set()
+
+    def produce():
+        for i in range(4):
+            threads.add(threading.current_thread().name)
+            yield i
+
+    items = list(scheduler.iterate("tts", "a", produce(), seconds_of=lambda item: 0.1))
+    assert items == [0, 1, 2, 3]
+    assert threads == {"sched-0"}
+
+
+def test_idle_tenants_usage_is_forgotten():
+    scheduler = DeadlineScheduler(workers=1, usage_half_life=0.01, enabled=True)
+    for i in range(20):
+        scheduler.run("asr", f"user-{i}", time.sleep, 0.001)
+    assert len(scheduler._usage) < 20
+
+    # Long idle: the next completion drops every decayed tenant
+    time.sleep(0.2)
+    scheduler.run("asr", "last", lambda: None)
+    assert set(scheduler._usage) <= {"last"}
@@ -0,0 +1,150 @@
+import threading
+import time
+
+import pytest
+
+from benchmarks.replay import SAMPLE_RATE, synthetic_speech
+from services.pipeline import session as pipeline
+from services.pipeline.scheduler import SCHEDULER
+from services.pipeline.session import SessionState, process_chunk, stream_chunk
+
+
+CHUNK = 1600
+
+
+pytestmark = pytest.mark.usefixtures("inline_scheduler")
+
+
+class OverlapASR:
+    """Records whether two decodes ever ran at once"""
+
+    def __init__(self, asr):
+        self.asr = asr
+        self.active = 0
+        self.overlapped = False
+        self.lock = threading.Lock()
+
+    def transcribe_words(self, audio):
+        with self.lock:
+            self.active += 1
+            self.overlapped |= self.active > 1
+        time.sleep(0.005)
+        try:
+            return self.asr.transcribe_words(audio)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def test_chunks_of_one_session_never_run_concurrently(backends):
+    session = SessionState("locked", backends=backends())
+    session.asr = asr = OverlapASR(session.asr)
+    audio = synthetic_speech(4)
+
+    def feed():
+        for pos in range(0, len(audio), CHUNK):
+            process_chunk(session, audio[pos:pos + CHUNK], SAMPLE_RATE)
+
+    threads = [threading.Thread(target=feed) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not asr.overlapped
+
+
+def test_get_session_builds_one_session_per_user(monkeypatch, backends):
+    monkeypatch.setattr(pipeline, "BACKEND_FACTORY", backends)
+    monkeypatch.setattr(pipeline, "STORE", None)
+    monkeypatch.setattr(pipeline, "SESSIONS", {})
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(pipeline.get_session("same")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(session is results[0] for session in results)
+
+
+def test_stream_chunk_yields_live_text(backends):
+    session = SessionState("live", backends=backends())
+    audio = synthetic_speech(3)
+    kinds = set()
+    for pos in range(0, len(audio), CHUNK):
+        kinds.update(kind for kind, _ in stream_chunk(session, audio[pos:pos + CHUNK], SAMPLE_RATE))
+    assert {"asr", "translation", "audio"} <= kinds
+
+
+def test_process_chunk_only_synthesizes_the_played_language(backends):
+    session = SessionState("played", backends=backends())
+    session.set_target_langs(["hin_Deva", "spa_Latn"])
+    spoken = []
+    stream = session.tts.stream
+
+    def record(text, user_id, language="hi", normalizer=None):
+        spoken.append(language)
+        return stream(text, user_id, language, normalizer)
+
+    session.tts.stream = record
+    audio = synthetic_speech(6)
+    for pos in range(0, len(audio), CHUNK):
+        process_chunk(session, audio[pos:pos + CHUNK], SAMPLE_RATE)
+
+    assert spoken and set(spoken) == {"hi"}
+    assert set(session.last_translations) == {"hin_Deva", "spa_Latn"}
+
+
+def low_tier_session(backends, fallback):
+    from services.pipeline.overload import TIERS
+
+    session = SessionState("low-tier", backends=backends())
+    tier_backends = backends()
+    tier_backends["tts"].sample_rate = 16000  # the tier's own, English-only TTS
+    tier_backends["tts_fallback"] = backends()["tts"] if fallback else None
+    session.use_tier(2, TIERS[2], tier_backends)
+    session.set_target_langs(["hin_Deva", "eng_Latn"])
+
+    rates = {}
+    audio = synthetic_speech(6)
+    for pos in range(0, len(audio), CHUNK):
+        for kind, value in stream_chunk(session, audio[pos:pos + CHUNK], SAMPLE_RATE):
+            if kind == "audio":
+                rates.setdefault(value[0], set()).add(value[1])
+    assert set(session.last_translations) == {"hin_Deva", "eng_Latn"}
+    return rates
+
+
+def test_tier_falls_back_per_language(backends):
+    # English on the tier's TTS, Hindi still spoken by the full voice
+    assert low_tier_session(backends, fallback=True) == {"eng_Latn": {16000}, "hin_Deva": {24000}}
+
+
+def test_tier_without_a_fallback_is_text_only_for_other_languages(backends):
+    assert low_tier_session(backends, fallback=False) == {"eng_Latn": {16000}}
+
+
+def test_self_batching_tts_does_not_hold_executor_threads(monkeypatch, backends):
+    monkeypatch.setattr(SCHEDULER, "enabled", True)
+    session = SessionState("batched", backends=backends())
+    threads = []
+    stream = session.tts.stream
+
+    class BatchedTTS:
+        batched = True
+        sample_rate = session.tts.sample_rate
+
+        def stream(self, text, user_id, language="hi", normalizer=None):
+            threads.append(threading.current_thread().name)
+            yield from stream(text, user_id, language, normalizer)
+
+    session.tts = BatchedTTS()
+    audio = synthetic_speech(6)
+    for pos in range(0, len(audio), CHUNK):
+        process_chunk(session, audio[pos:pos + CHUNK], SAMPLE_RATE)
+
+    assert threads
+    assert not any(name.startswith("sched-") for name in threads)
@@ -0,0 +1,170 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from benchmarks.replay import SAMPLE_RATE, synthetic_speech
+from services.pipeline.checkpoint import CheckpointStore
+from services.pipeline.sharding import SESSION_MIGRATIONS, HashRing, WorkerPool
+from services.pipeline.startup import ModelSpec
+
+
+USERS = [f"user-{i}" for i in range(2000)]
+CHUNK = 1600
+
+# Workers load these instead of the real models
+STUBS = [
+    ModelSpec("asr", "benchmarks.replay:StubASR", latency=0.0),
+    ModelSpec("emotion", "benchmarks.replay:StubEmotion"),
+    ModelSpec("translator", "benchmarks.replay:StubTranslator", latency=0.0),
+    ModelSpec("tts", "benchmarks.replay:StubTTS", first_chunk_latency=0.0, chunk_latency=0.0),
+]
+BROKEN = STUBS[1:] + [ModelSpec("asr", "benchmarks.replay:MissingASR")]
+
+
+def owners(ring):
+    return {user: ring.lookup(user) for user in USERS}
+
+
+def test_lookup_is_stable_and_spread():
+    ring = HashRing()
+    for node in ("w0", "w1", "w2", "w3"):
+        ring.add(node)
+    first = owners(ring)
+    assert owners(ring) == first
+    assert len(ring) == 4
+
+    counts = {node: list(first.values()).count(node) for node in ("w0", "w1", "w2", "w3")}
+    assert min(counts.values()) > len(USERS) / 4 / 2
+
+
+def test_adding_a_node_only_moves_sessions_to_it():
+    ring = HashRing()
+    for node in ("w0", "w1", "w2"):
+        ring.add(node)
+    before = owners(ring)
+    ring.add("w3")
+    after = owners(ring)
+
+    moved = [user for user in USERS if before[user] != after[user]]
+    assert moved
+    assert all(after[user] == "w3" for user in moved)
+
+
+def test_removing_a_node_only_moves_its_sessions():
+    ring = HashRing()
+    for node in ("w0", "w1", "w2"):
+        ring.add(node)
+    before = owners(ring)
+    ring.remove("w1")
+    after = owners(ring)
+
+    for user in USERS:
+        if before[user] != "w1":
+            assert after[user] == before[user]
+        else:
+            assert after[user] != "w1"
+
+
+def test_empty_ring_raises():
+    with pytest.raises(LookupError):
+        HashRing().lookup("anyone")
+
+
+def test_crashed_worker_restarts_under_its_id():
+    pool = WorkerPool(2, monitor_interval=0.05, metrics_port=0, model_specs=STUBS)
+    try:
+        before = owners(pool.ring)
+        crashed = pool.workers["w0"]
+        crashed.process.kill()
+
+        deadline = time.monotonic() + 10
+        while pool.workers["w0"] is crashed and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        assert pool.workers["w0"] is not crashed
+        assert sorted(pool.workers) == ["w0", "w1"]
+        assert owners(pool.ring) == before
+    finally:
+        pool.close()
+
+
+def test_idle_owners_are_evicted():
+    pool = WorkerPool(1, monitor_interval=60, idle_seconds=0.0, metrics_port=0, model_specs=STUBS)
+    try:
+        pool._route("idle-user")
+        assert "idle-user" in pool.owners
+        pool._evict_idle()
+        assert "idle-user" not in pool.owners
+    finally:
+        pool.close()
+
+
+def settled_ready_route(pool):
+    """/ready once every worker has finished loading (or failing)"""
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        report = pool.readiness(timeout=10).values()
+        if all("models" in worker for worker in report):
+            states = {
+                model["state"] for worker in report for model in worker["models"].values()
+            }
+            if not {"loading", "pending"} & states:
+                break
+        time.sleep(0.05)
+    status, _, body = pool._ready_route()
+    return status, body
+
+
+def test_ready_reports_loaded_workers():
+    pool = WorkerPool(2, monitor_interval=60, metrics_port=0, model_specs=STUBS)
+    try:
+        status, body = settled_ready_route(pool)
+        assert status == 200
+        assert '"w0"' in body and '"w1"' in body
+    finally:
+        pool.close()
+
+
+def test_ready_reports_a_failed_model():
+    pool = WorkerPool(1, monitor_interval=60, metrics_port=0, model_specs=BROKEN)
+    try:
+        status, body = settled_ready_route(pool)
+        assert status == 503
+        report = pool.readiness(timeout=10)["w0"]
+        assert not report["ready"]
+        assert "failed to load: asr" in report["unavailable"]
+    finally:
+        pool.close()
+
+
+def test_moved_session_resumes_on_its_new_worker(tmp_path, monkeypatch):
+    # Workers inherit the environment: snapshots go to tmp_path
+    monkeypatch.setenv("DUBYOU_CHECKPOINT_DIR", str(tmp_path))
+    ring = HashRing()
+    ring.add("w0")
+    ring.add("w1")
+    user = next(user for user in USERS if ring.lookup(user) == "w1")
+
+    pool = WorkerPool(1, monitor_interval=60, metrics_port=0, model_specs=STUBS)
+    try:
+        assert settled_ready_route(pool)[0] == 200
+        audio = synthetic_speech(4)
+        for pos in range(0, len(audio), CHUNK):
+            pool.submit(user, audio[pos:pos + CHUNK], SAMPLE_RATE)
+        assert pool.owners[user] == "w0"
+        heard = pool.last_translations(user)
+        assert heard
+
+        migrations = SESSION_MIGRATIONS.value()
+        pool.add_worker()
+        pool.submit(user, np.zeros(CHUNK, dtype=np.float32), SAMPLE_RATE)
+
+        assert pool.owners[user] == "w1"
+        assert SESSION_MIGRATIONS.value() == migrations + 1
+        # w0 snapshotted the session on "drop"; w1 restored it
+        assert os.path.exists(CheckpointStore(str(tmp_path)).path(user))
+        assert pool.last_translations(user) == heard
+    finally:
+        pool.close()
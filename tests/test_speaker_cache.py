@@ -0,0 +1,18 @@
+from services.tts.speaker_cache import SpeakerCache
+
+
+def test_least_recently_used_speaker_is_dropped():
+    cache = SpeakerCache("test", max_size=2)
+    loads = []
+
+    def load(key):
+        return lambda: loads.append(key) or key.upper()
+
+    assert cache.get("a", load("a")) == "A"
+    cache.get("b", load("b"))
+    cache.get("a", load("a"))
+    cache.get("c", load("c"))
+
+    assert loads == ["a", "b", "c"]
+    assert "a" in cache and "b" not in cache
+    assert len(cache) == 2
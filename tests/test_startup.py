@@ -0,0 +1,59 @@
+import pytest
+
+from services.pipeline import startup
+from services.pipeline.startup import FAILED, READY, ModelLoader, ModelSpec
+
+
+FAILURES = []
+
+
+class Flaky:
+    """Fails while FAILURES has entries left"""
+
+    def __init__(self):
+        if FAILURES:
+            raise OSError(FAILURES.pop())
+
+
+def loader():
+    return ModelLoader([ModelSpec("flaky", f"{__name__}:Flaky", warmup=False)])
+
+
+def test_failed_model_is_retried_after_backoff(monkeypatch):
+    monkeypatch.setattr(startup, "LOAD_RETRY_SECONDS", 60.0)
+    FAILURES[:] = ["network down"]
+    models = loader()
+
+    with pytest.raises(OSError):
+        models.get("flaky")
+    assert models.states["flaky"] == FAILED
+    assert "network down" in models.unavailable(["flaky"])
+
+    # Within the backoff the failure is reported without a reload
+    with pytest.raises(RuntimeError):
+        models.get("flaky")
+
+    models.failed_at["flaky"] -= 60.0
+    assert isinstance(models.get("flaky"), Flaky)
+    assert models.states["flaky"] == READY
+    assert models.unavailable(["flaky"]) is None
+
+
+def test_backoff_doubles_per_failure(monkeypatch):
+    monkeypatch.setattr(startup, "LOAD_RETRY_SECONDS", 10.0)
+    FAILURES[:] = ["a", "b"]
+    models = loader()
+    for _ in range(2):
+        models.states["flaky"] = startup.PENDING
+        with pytest.raises(OSError):
+            models.get("flaky")
+    assert 19.0 < models.retry_in("flaky") <= 20.0
+
+
+def test_preload_retries_failed_models(monkeypatch):
+    monkeypatch.setattr(startup, "LOAD_RETRY_SECONDS", 0.01)
+    FAILURES[:] = ["a", "b"]
+    models = loader().start()
+    models.wait()
+    assert models.states["flaky"] == READY
+    assert models.attempts["flaky"] == 2
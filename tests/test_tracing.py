@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+from benchmarks.replay import SAMPLE_RATE, synthetic_speech
+from services.monitoring.tracing import NULL_TRACE, STAGES, Tracer
+from services.pipeline.session import SessionState, stream_chunk
+
+
+CHUNK = 1600
+
+
+pytestmark = pytest.mark.usefixtures("inline_scheduler")
+
+
+def traced(tracer):
+    trace = tracer.begin()
+    for stage in STAGES[1:]:
+        if stage == "commit":
+            tracer.commit(trace)
+        else:
+            trace.mark(stage)
+    tracer.finish(trace)
+    return trace
+
+
+def test_stages_are_ordered_and_summed():
+    tracer = Tracer("order", enabled=True)
+    trace = traced(tracer)
+    assert trace.stamps == sorted(trace.stamps)
+
+    latencies = tracer.stage_latencies()
+    assert set(latencies) == set(STAGES[1:]) | {"total"}
+    assert all(len(values) == 1 and values[0] >= 0 for values in latencies.values())
+    assert latencies["total"][0] == pytest.approx(
+        sum(latencies[name][0] for name in STAGES[1:])
+    )
+
+
+def test_ring_keeps_the_latest_traces():
+    tracer = Tracer("ring", capacity=3, enabled=True)
+    traces = [traced(tracer) for _ in range(5)]
+    assert tracer.records() == traces[2:]
+    assert len(tracer.stage_latencies()["total"]) == 3
+
+
+def test_one_trace_stays_open_until_commit():
+    tracer = Tracer("open", enabled=True)
+    first = tracer.begin(at=1.0)
+    assert tracer.begin(at=2.0) is first
+    assert first.stamps[0] == 1.0
+
+    tracer.commit(first)
+    second = tracer.begin()
+    assert second is not first
+
+    # A flush without a commit drops the open trace unrecorded
+    tracer.discard()
+    assert tracer.begin() is not second
+    assert tracer.records() == [first]
+    assert Tracer("off", enabled=False).begin() is NULL_TRACE
+
+
+def test_trace_spans_the_whole_phrase(backends):
+    session = SessionState("phrase", backends=backends())
+    session.tracer = Tracer("phrase", enabled=True)
+
+    audio = synthetic_speech(6)
+    starts = []
+    for pos in range(0, len(audio), CHUNK):
+        starts.append(time.perf_counter())
+        list(stream_chunk(session, audio[pos:pos + CHUNK], SAMPLE_RATE))
+
+    def chunk_at(stamp):
+        return max(i for i, start in enumerate(starts) if start <= stamp)
+
+    records = session.tracer.records()
+    assert records
+    for trace in records:
+        audio_at, vad_at, asr_at, commit_at = trace.stamps[:4]
+        # Opened by an earlier voiced chunk than the one that commits
+        assert chunk_at(audio_at) < chunk_at(commit_at)
+        assert audio_at <= vad_at <= asr_at <= commit_at
+        assert chunk_at(vad_at) == chunk_at(commit_at)
+        assert trace.stamps[-1] is not None
@@ -0,0 +1,154 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from services.monitoring.metrics import ERRORS
+from services.transport.client import StreamClient
+from services.transport.protocol import (
+    ASR_TEXT,
+    AUDIO_IN,
+    ERROR,
+    FLAG_REPLACE,
+    HEADER,
+    MAX_PAYLOAD,
+    ProtocolError,
+    decode_header,
+    encode_frame,
+    float_to_pcm16,
+    pack_lang,
+    pcm16_to_float,
+    text_update,
+    unpack_lang,
+)
+from services.transport.server import StreamServer, _Connection
+
+
+def test_frame_round_trip():
+    frame = encode_frame(AUDIO_IN, "ab12cd34", 7, b"\x01\x02", sample_rate=16000)
+    assert len(frame) == HEADER.size + 2
+    assert decode_header(frame[:HEADER.size]) == (AUDIO_IN, 0, "ab12cd34", 7, 16000, 2)
+
+
+def test_rejects_bad_frames():
+    with pytest.raises(ProtocolError):
+        encode_frame(AUDIO_IN, "x" * 17, 0)
+
+    frame = bytearray(encode_frame(AUDIO_IN, "a", 0))
+    frame[:2] = b"XX"
+    with pytest.raises(ProtocolError):
+        decode_header(bytes(frame))
+
+    header = HEADER.pack(b"DY", AUDIO_IN, 0, b"a", 0, 16000, MAX_PAYLOAD + 1)
+    with pytest.raises(ProtocolError):
+        decode_header(header)
+
+
+@pytest.mark.parametrize("sample_rate, length", [(16000, 3), (0, 4)])
+def test_rejects_audio_that_cannot_be_decoded(sample_rate, length):
+    with pytest.raises(ProtocolError):
+        decode_header(HEADER.pack(b"DY", AUDIO_IN, 0, b"a", 0, sample_rate, length))
+
+
+def test_lang_prefix_and_pcm():
+    lang, data = unpack_lang(pack_lang("hin_Deva", b"abc"))
+    assert (lang, data) == ("hin_Deva", b"abc")
+
+    audio = np.array([0.0, 0.5, -0.5, 1.5], dtype=np.float32)
+    decoded = pcm16_to_float(float_to_pcm16(audio))
+    assert np.allclose(decoded, np.clip(audio, -1, 1), atol=1e-3)
+
+
+def test_text_update():
+    assert text_update("hello", "hello") is None
+    assert text_update("hello", "hello world") == (b" world", 0)
+    assert text_update("hello", "help") == (b"help", FLAG_REPLACE)
+
+
+def test_connection_is_bound_to_its_first_session():
+    seen = []
+    lock = threading.Lock()
+
+    def events(user_id, chunk, sr, target_langs=None):
+        with lock:
+            seen.append(user_id)
+        yield "asr", f"{user_id}:{len(chunk)}"
+
+    server = StreamServer(events=events, host="127.0.0.1", port=0).start()
+    try:
+        client = StreamClient(port=server.port, session_id="first")
+        client.send_audio(np.zeros(160, dtype=np.float32))
+        assert client.frames.get(timeout=5)[:2] == (ASR_TEXT, 0)
+
+        # A frame for another session closes the connection unprocessed
+        client.session_id = "second"
+        client.send_audio(np.zeros(160, dtype=np.float32))
+        assert client.frames.get(timeout=5)[0] == ERROR
+        assert client.frames.get(timeout=5) is None
+        client.close()
+        assert seen == ["first"]
+    finally:
+        server.stop()
+
+
+def test_malformed_audio_gets_an_error_frame():
+    server = StreamServer(events=lambda *args: iter(()), host="127.0.0.1", port=0).start()
+    errors = ERRORS.value(stage="transport")
+    try:
+        client = StreamClient(port=server.port, session_id="odd")
+        client.sock.sendall(HEADER.pack(b"DY", AUDIO_IN, 0, b"odd", 0, 16000, 3) + b"abc")
+        frame_type, _, _, message = client.frames.get(timeout=5)
+        assert frame_type == ERROR and "int16" in message
+        assert client.frames.get(timeout=5) is None
+        client.close()
+        assert ERRORS.value(stage="transport") == errors + 1
+    finally:
+        server.stop()
+
+
+def test_pipeline_error_is_reported_per_chunk():
+    def events(user_id, chunk, sr, target_langs=None):
+        if len(chunk) == 1:
+            raise RuntimeError("boom")
+        yield "asr", "fine"
+
+    server = StreamServer(events=events, host="127.0.0.1", port=0).start()
+    try:
+        client = StreamClient(port=server.port, session_id="flaky")
+        client.send_audio(np.zeros(1, dtype=np.float32))
+        client.send_audio(np.zeros(160, dtype=np.float32))
+        assert client.frames.get(timeout=5)[:2] == (ERROR, 0)
+        # The connection survives the failed chunk
+        assert client.frames.get(timeout=5)[:2] == (ASR_TEXT, 1)
+        client.close()
+    finally:
+        server.stop()
+
+
+def test_full_queue_stops_reading_the_socket():
+    async def run():
+        reader = asyncio.StreamReader()
+        frame = encode_frame(AUDIO_IN, "slow", 0, b"\0\0" * 160, sample_rate=16000)
+        for _ in range(20):
+            reader.feed_data(frame)
+        reader.feed_eof()
+
+        conn = _Connection(reader, None, None, asyncio.get_running_loop(), queue_size=4)
+        task = asyncio.ensure_future(conn.read_loop())
+        await asyncio.sleep(0.05)
+        # No consumer: four chunks queued, the rest still in the socket
+        assert conn.queue.qsize() == 4
+        assert not task.done()
+
+        received = []
+        while True:
+            item = await conn.queue.get()
+            if item is None:
+                break
+            received.append(item)
+            assert conn.queue.qsize() <= 4
+        await task
+        assert len(received) == 20
+
+    asyncio.run(run())